@@ -0,0 +1,90 @@
+"""Measures the memory used per simulated vehicle in one region.
+
+Requires an installed simbev package (``pip install -e .``) and the input data of the scenario. Usage::
+
+    python benchmarks/memory_per_vehicle.py scenarios/default/configs/default.cfg --region 0
+
+Reports the peak of traced memory while the region is simulated, the memory that is held by the
+simulated vehicles (including their recorded events) and the number of garbage collections, each related to
+the number of vehicles.
+"""
+import argparse
+import gc
+import pathlib
+import tempfile
+import tracemalloc
+
+from simbev.simbev_class import SimBEV
+
+
+def measure(config_path, region_number=0):
+    """Simulates one region and measures its memory usage.
+
+    Parameters
+    ----------
+    config_path : pathlib.Path
+        Path to the config file of the scenario.
+    region_number : int
+        Index of the region in the regions file.
+
+    Returns
+    -------
+    dict
+        Number of vehicles, peak and retained bytes per vehicle and garbage collections.
+    """
+    simbev, _ = SimBEV.from_config(config_path)
+    simbev.num_threads = 1
+    simbev.setup()
+    region = simbev.regions[region_number]
+
+    # keep all simulated vehicles alive to measure the memory they hold
+    cars = []
+    simulate_car = simbev.simulate_car
+
+    def simulate_and_keep(car, car_region):
+        simulate_car(car, car_region)
+        cars.append(car)
+
+    simbev.simulate_car = simulate_and_keep
+
+    with tempfile.TemporaryDirectory() as directory:
+        simbev.save_directory = pathlib.Path(directory)
+        gc.collect()
+        collections_start = sum(stats["collections"] for stats in gc.get_stats())
+        tracemalloc.start()
+        memory_start = tracemalloc.get_traced_memory()[0]
+        simbev.run(region)
+        memory_end, memory_peak = tracemalloc.get_traced_memory()
+        car_amount = len(cars)
+        cars.clear()
+        gc.collect()
+        memory_without_cars = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        collections = (
+            sum(stats["collections"] for stats in gc.get_stats()) - collections_start
+        )
+
+    return {
+        "vehicles": car_amount,
+        "peak_bytes_per_vehicle": (memory_peak - memory_start) / car_amount,
+        "retained_bytes_per_vehicle": (memory_end - memory_without_cars) / car_amount,
+        "gc_collections_per_vehicle": collections / car_amount,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure memory usage per simulated vehicle."
+    )
+    parser.add_argument("config_path", help="Set the config path.")
+    parser.add_argument(
+        "--region", default=0, type=int, help="Index of the region to simulate."
+    )
+    p_args = parser.parse_args()
+    result = measure(pathlib.Path(p_args.config_path), p_args.region)
+    for key, value in result.items():
+        print("{}: {}".format(key, round(value, 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,139 @@
 import argparse
-from copy import deepcopy
+import json
 import pathlib
 import datetime
+import sys
 
 from simbev.simbev_class import SimBEV
+from simbev.shard import FAILURE_REPORT_FILE, merge_shards, parse_shard
 from simbev.helpers import helpers
 
 
-def main():
+def merge(args):
+    """Merges the result directories of a sharded run.
+
+    Parameters
+    ----------
+    args : list
+        Command line arguments after "merge".
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m simbev merge",
+        description="Combines the result directories of all shards of a run.",
+    )
+    parser.add_argument(
+        "shard_directories",
+        nargs="+",
+        type=pathlib.Path,
+        help="Result directories of the shards.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of the merged results, a new run directory by default.",
+    )
+    p_args = parser.parse_args(args)
+    save_directory = merge_shards(p_args.shard_directories, p_args.output)
+    print(f"Merged {len(p_args.shard_directories)} shards into {save_directory}")
+    report_path = pathlib.Path(save_directory, FAILURE_REPORT_FILE)
+    if report_path.is_file():
+        with open(report_path) as f:
+            failed = json.load(f)["regions_failed"]
+        raise SystemExit(
+            f"{failed} regions failed in the shards, results are incomplete. See {report_path}."
+        )
+
+
+def cache(args):
+    """Manages the cache of region type time series.
+
+    Parameters
+    ----------
+    args : list
+        Command line arguments after "cache".
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m simbev cache",
+        description="Fills the cache of region type time series for a scenario.",
+    )
+    parser.add_argument(
+        "action", choices=["warm"], help="warm: build and store all time series."
+    )
+    parser.add_argument(
+        "config_path",
+        default="scenarios/default/configs/default.cfg",
+        nargs="?",
+        help="Set the config path.",
+    )
+    p_args = parser.parse_args(args)
+    simbev_obj, _ = SimBEV.from_config(pathlib.Path(p_args.config_path))
+    if simbev_obj.cache_directory is None:
+        raise SystemExit("The cache is switched off in the config (cache = false).")
+    if simbev_obj.input_type != "probability":
+        raise SystemExit("Only time series of probability input are cached.")
+    region_types = simbev_obj.warm_cache()
+    print(
+        "Cached time series of {} region types in {}".format(
+            len(region_types), simbev_obj.cache_directory
+        )
+    )
+
+
+def compile_scenario(args):
+    """Compiles the input data of a scenario into a bundle.
+
+    Parameters
+    ----------
+    args : list
+        Command line arguments after "compile".
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m simbev compile",
+        description="Writes the input data of a scenario to a binary bundle that runs of the "
+        "config read instead of the text files.",
+    )
+    parser.add_argument(
+        "config_path",
+        default="scenarios/default/configs/default.cfg",
+        nargs="?",
+        help="Set the config path.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of the bundle, by default the bundle setting of the config.",
+    )
+    p_args = parser.parse_args(args)
+    bundle_path = SimBEV.compile_bundle(
+        pathlib.Path(p_args.config_path), p_args.output
+    )
+    print(f"Compiled input data into {bundle_path}")
+
+
+def main(args=None):
     """Standard way of running the SimBEV module."""
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] == "merge":
+        merge(args[1:])
+        return
+    if args and args[0] == "cache":
+        cache(args[1:])
+        return
+    if args and args[0] == "compile":
+        compile_scenario(args[1:])
+        return
+
     print(datetime.datetime.now())
     parser = argparse.ArgumentParser(
         description="SimBEV modelling tool for generating timeseries of electric "
-        "vehicles."
+        "vehicles. Use 'python -m simbev merge' to combine the results of shards, "
+        "'python -m simbev cache warm' to fill the time series cache and "
+        "'python -m simbev compile' to compile the input data into a bundle."
     )
     parser.add_argument(
         "config_path",
@@ -28,34 +149,39 @@ def main():
         type=int,
         help="Decide how often the simulation will be run.",
     )
-    p_args = parser.parse_args()
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="Only simulate the regions of shard i of n, given as i/n with i counted from 0.",
+    )
+    p_args = parser.parse_args(args)
 
     config_path = pathlib.Path(p_args.config_path)
     simbev_obj, cfg = SimBEV.from_config(config_path)
+    if p_args.shard is not None:
+        simbev_obj.set_shard(*parse_shard(p_args.shard))
 
+    # setup is run once, iterations share region types, car types and input data
+    simbev_obj.setup()
     if p_args.repeat > 1:
-        simbev_list = [None] * p_args.repeat
-        for i in range(p_args.repeat):
-            simbev_copy = deepcopy(simbev_obj)
-            simbev_copy.rng_seed += i
-            simbev_copy.rng = simbev_copy.get_rng()
-            simbev_copy.save_directory = pathlib.Path(
-                simbev_copy.save_directory, f"iteration_{i}"
-            )
-            simbev_list[i] = simbev_copy
+        simbev_list = [simbev_obj.create_iteration(i) for i in range(p_args.repeat)]
     else:
         simbev_list = [simbev_obj]
 
-    for simbev in simbev_list:
-        # setup simbev object
-        simbev.setup()
-        # run simulation with optional timing
-        helpers.timeitlog(simbev.output_options["timing"], simbev_obj.save_directory)(
-            simbev.run_multi
-        )()
+    # run all iterations on the same process pool with optional timing
+    helpers.timeitlog(simbev_obj.output_options["timing"], simbev_obj.save_directory)(
+        simbev_obj.run_multi
+    )(simbev_list)
 
+    for simbev in simbev_list:
         helpers.export_metadata(simbev, cfg)
 
+    failed = sum(len(simbev.failures) for simbev in simbev_list)
+    if failed:
+        raise SystemExit(
+            f"{failed} chunks failed, results are incomplete. See the failure report."
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,445 @@
+import copy
+import math
+
+import numpy as np
+
+# record of the analysis values of one vehicle, as written to analysis.csv
+ANALYSIS_DTYPE = np.dtype(
+    [
+        ("car_type", "U32"),
+        ("drive_count", np.int32),
+        ("drive_max_length", np.float32),
+        ("drive_min_length", np.float32),
+        ("drive_mean_length", np.float32),
+        ("drive_max_consumption", np.float32),
+        ("drive_min_consumption", np.float32),
+        ("drive_mean_consumption", np.float32),
+        ("average_driving_time", np.float32),
+        ("average_distance", np.float32),
+        ("distance_home", np.float32),
+        ("distance_work", np.float32),
+        ("distance_business", np.float32),
+        ("distance_school", np.float32),
+        ("distance_shopping", np.float32),
+        ("distance_private", np.float32),
+        ("distance_leisure", np.float32),
+        ("distance_hpc", np.float32),
+        ("distance_cumulated", np.float32),
+        ("charge_count", np.int32),
+        ("hpc_count", np.int32),
+        ("charge_max_length", np.float32),
+        ("charge_min_length", np.float32),
+        ("charge_mean_length", np.float32),
+        ("charge_max_energy", np.float32),
+        ("charge_min_energy", np.float32),
+        ("charge_mean_energy", np.float32),
+        ("hpc_mean_energy", np.float32),
+        ("home_mean_energy", np.float32),
+        ("work_mean_energy", np.float32),
+        ("public_mean_energy", np.float32),
+        ("public_count", np.int32),
+        ("private_count", np.int32),
+    ]
+)
+
+DESTINATIONS = (
+    "home",
+    "work",
+    "business",
+    "school",
+    "shopping",
+    "private",
+    "leisure",
+    "hpc",
+)
+HPC_USE_CASES = ("hpc", "public_fast", "public_highway")
+PUBLIC_ENERGY_USE_CASES = ("public", "retail")
+PUBLIC_USE_CASES = ("public", "hpc", "public_fast", "public_highway", "retail")
+PRIVATE_USE_CASES = ("home", "work")
+
+
+def _mean(total, count):
+    return total / count if count else math.nan
+
+
+class EventSummary:
+    """Count, minimum, maximum and sum of duration and energy of a kind of events."""
+
+    __slots__ = (
+        "count",
+        "time_min",
+        "time_max",
+        "time_sum",
+        "energy_min",
+        "energy_max",
+        "energy_sum",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.time_min = math.inf
+        self.time_max = -math.inf
+        self.time_sum = 0
+        self.energy_min = math.inf
+        self.energy_max = -math.inf
+        self.energy_sum = 0.0
+
+    def add(self, event_time, energy):
+        self.count += 1
+        self.time_min = min(self.time_min, event_time)
+        self.time_max = max(self.time_max, event_time)
+        self.time_sum += event_time
+        self.energy_min = min(self.energy_min, energy)
+        self.energy_max = max(self.energy_max, energy)
+        self.energy_sum += energy
+
+    @property
+    def time_range(self):
+        """Tuple of maximum and minimum duration, nan if there are no events."""
+        if not self.count:
+            return math.nan, math.nan
+        return self.time_max, self.time_min
+
+    @property
+    def energy_range(self):
+        """Tuple of maximum and minimum energy, nan if there are no events."""
+        if not self.count:
+            return math.nan, math.nan
+        return self.energy_max, self.energy_min
+
+
+class VehicleStatistics:
+    """Running statistics of the driving and charging events of one vehicle.
+
+    Events are added while the vehicle is simulated. Energies are derived from the rounded socs
+    in the same way as in the event output, events of the first week are left out and the first
+    event after it is cut to the output time frame.
+
+    Parameters
+    ----------
+    battery_capacity : float
+        Battery capacity of the vehicle in kWh.
+    step_size : int
+        Length of a time step in minutes.
+    soc : float
+        Soc at the start of the simulation.
+    """
+
+    __slots__ = (
+        "battery_capacity",
+        "step_size",
+        "week_time_steps",
+        "soc",
+        "started",
+        "pending",
+        "drive",
+        "charge",
+        "distance_sum",
+        "destination_distance",
+        "use_case_energy",
+    )
+
+    def __init__(self, battery_capacity, step_size, soc=1.0):
+        self.battery_capacity = battery_capacity
+        self.step_size = step_size
+        self.week_time_steps = int(24 * 7 * 60 / step_size)
+        self.soc = np.round(np.float32(soc), 4)
+        self.started = False
+        self.pending = None
+        self.drive = EventSummary()
+        self.charge = EventSummary()
+        self.distance_sum = 0.0
+        # destination / use case: [sum, count]
+        self.destination_distance = {}
+        self.use_case_energy = {}
+
+    def copy(self):
+        """Returns an independent copy of the statistics."""
+        return copy.deepcopy(self)
+
+    def add(
+        self,
+        event_start,
+        event_time,
+        use_case,
+        soc,
+        average_charging_power=0,
+        distance=0,
+        destination="",
+    ):
+        """Adds an event of the vehicle.
+
+        Parameters
+        ----------
+        event_start : int
+            Start time step of the event, including the first week.
+        event_time : int
+            Duration of the event in time steps.
+        use_case : str
+            Use case of a charging event.
+        soc : float
+            Soc at the end of the event.
+        average_charging_power : float
+            Average charging power of the event.
+        distance : float
+            Distance of a driving event.
+        destination : str
+            Destination of a driving event.
+        """
+        soc_end = np.round(np.float32(soc), 4)
+        energy = np.float32(
+            np.round(np.float64(soc_end - self.soc) * self.battery_capacity, 4)
+        )
+        self.soc = soc_end
+
+        start = event_start - self.week_time_steps
+        if self.pending is not None:
+            self._add_first_event(start)
+        if start + event_time <= 0:
+            return
+        event = (
+            start,
+            event_time,
+            energy,
+            use_case,
+            np.round(np.float32(average_charging_power), 4),
+            distance,
+            destination,
+        )
+        if not self.started and start < 0:
+            # first event is cut once the start of the next event is known
+            self.pending = event
+        else:
+            self._add_event(*event)
+        self.started = True
+
+    def _add_first_event(self, next_start):
+        """Adds the first event of the output time frame, cut to start at time step 0.
+
+        Parameters
+        ----------
+        next_start : int
+            Start of the following event.
+        """
+        (
+            start,
+            event_time,
+            energy,
+            use_case,
+            average_charging_power,
+            distance,
+            destination,
+        ) = self.pending
+        self.pending = None
+        post_event_len = next_start
+        pre_event_len = event_time - post_event_len
+        if energy > 0:
+            pre_demand = average_charging_power * pre_event_len * self.step_size / 60
+            energy = np.float32(round(max(energy - pre_demand, 0), 4))
+        elif energy < 0:
+            energy = np.float32(round(energy * (post_event_len / event_time), 4))
+        self._add_event(
+            0,
+            post_event_len,
+            energy,
+            use_case,
+            average_charging_power,
+            distance,
+            destination,
+        )
+
+    def _add_event(
+        self,
+        start,
+        event_time,
+        energy,
+        use_case,
+        average_charging_power,
+        distance,
+        destination,
+    ):
+        if energy < 0:
+            distance = float(np.float32(distance))
+            self.drive.add(event_time, float(energy))
+            self.distance_sum += distance
+            total = self.destination_distance.setdefault(destination, [0.0, 0])
+            total[0] += distance
+            total[1] += 1
+        elif energy > 0:
+            self.charge.add(event_time, float(energy))
+            total = self.use_case_energy.setdefault(use_case, [0.0, 0])
+            total[0] += float(energy)
+            total[1] += 1
+
+    def _use_case_total(self, use_cases):
+        """Sum of energy and number of charging events of the given use cases."""
+        energy = 0.0
+        count = 0
+        for use_case in use_cases:
+            use_case_energy, use_case_count = self.use_case_energy.get(use_case, (0, 0))
+            energy += use_case_energy
+            count += use_case_count
+        return energy, count
+
+    def record(self, car_type):
+        """Returns the analysis values of the vehicle.
+
+        Parameters
+        ----------
+        car_type : str
+            Name of the vehicle type.
+
+        Returns
+        -------
+        tuple
+            Analysis values in the order of ANALYSIS_DTYPE.
+        """
+        if self.pending is not None:
+            start, event_time = self.pending[:2]
+            self._add_first_event(start + event_time)
+
+        drive = self.drive
+        drive_max_time, drive_min_time = drive.time_range
+        drive_max_energy, drive_min_energy = drive.energy_range
+        drive_avg_time = round(_mean(drive.time_sum, drive.count), 4)
+        destination_means = [
+            round(_mean(*self.destination_distance.get(destination, (0, 0))), 4)
+            for destination in DESTINATIONS
+        ]
+
+        charge = self.charge
+        charge_max_time, charge_min_time = charge.time_range
+        charge_max_energy, charge_min_energy = charge.energy_range
+        hpc_energy, hpc_count = self._use_case_total(HPC_USE_CASES)
+        public_count = self._use_case_total(PUBLIC_USE_CASES)[1]
+        private_count = self._use_case_total(PRIVATE_USE_CASES)[1]
+
+        return (
+            car_type,
+            drive.count,
+            drive_max_time,
+            drive_min_time,
+            drive_avg_time,
+            abs(drive_min_energy),
+            abs(drive_max_energy),
+            round(abs(_mean(drive.energy_sum, drive.count)), 4),
+            drive_avg_time,
+            round(_mean(self.distance_sum, drive.count), 4),
+            *destination_means,
+            round(self.distance_sum, 4),
+            charge.count,
+            hpc_count,
+            charge_max_time,
+            charge_min_time,
+            round(_mean(charge.time_sum, charge.count), 4),
+            charge_max_energy,
+            round(charge_min_energy, 4),
+            round(_mean(charge.energy_sum, charge.count), 4),
+            round(_mean(hpc_energy, hpc_count), 4),
+            round(_mean(*self._use_case_total(("home",))), 4),
+            round(_mean(*self._use_case_total(("work",))), 4),
+            round(_mean(*self._use_case_total(PUBLIC_ENERGY_USE_CASES)), 4),
+            public_count,
+            private_count,
+        )
+
+
+class AnalysisSummary:
+    """Sums of the analysis records of a group of vehicles, by vehicle type.
+
+    Summaries of several regions are merged to get the national summary without keeping the
+    records of the single vehicles. Empty values (nan) are not counted.
+
+    Parameters
+    ----------
+    car_types : list
+        Names of the vehicle types.
+    sums : ndarray
+        Sum of each field in `fields` by vehicle type, shape (vehicle types, fields).
+    counts : ndarray
+        Number of non empty values of each field by vehicle type.
+    """
+
+    __slots__ = ("car_types", "sums", "counts")
+
+    fields = (
+        "drive_count",
+        "average_driving_time",
+        "average_distance",
+        *("distance_{}".format(destination) for destination in DESTINATIONS),
+        "distance_cumulated",
+        "public_count",
+        "private_count",
+    )
+
+    def __init__(self, car_types=(), sums=None, counts=None):
+        self.car_types = list(car_types)
+        shape = (len(self.car_types), len(self.fields))
+        self.sums = np.zeros(shape) if sums is None else sums
+        self.counts = np.zeros(shape, dtype=np.int64) if counts is None else counts
+
+    @classmethod
+    def from_records(cls, records):
+        """Sums up analysis records in one pass.
+
+        Parameters
+        ----------
+        records : ndarray
+            Analysis records of ANALYSIS_DTYPE.
+
+        Returns
+        -------
+        AnalysisSummary
+        """
+        car_types, group = np.unique(records["car_type"], return_inverse=True)
+        values = np.column_stack(
+            [records[field].astype(np.float64) for field in cls.fields]
+        )
+        valid = ~np.isnan(values)
+        summary = cls(car_types.tolist())
+        np.add.at(summary.sums, group, np.where(valid, values, 0))
+        np.add.at(summary.counts, group, valid)
+        return summary
+
+    def merge(self, other):
+        """Returns the summary of the vehicles of both summaries.
+
+        Parameters
+        ----------
+        other : AnalysisSummary
+
+        Returns
+        -------
+        AnalysisSummary
+        """
+        car_types = self.car_types + [
+            car_type for car_type in other.car_types if car_type not in self.car_types
+        ]
+        merged = AnalysisSummary(car_types)
+        for summary in (self, other):
+            rows = [car_types.index(car_type) for car_type in summary.car_types]
+            merged.sums[rows] += summary.sums
+            merged.counts[rows] += summary.counts
+        return merged
+
+    def _rows(self, car_type):
+        if car_type is None:
+            return slice(None)
+        if car_type not in self.car_types:
+            return []
+        return [self.car_types.index(car_type)]
+
+    @property
+    def vehicle_count(self):
+        """Number of vehicles in the summary."""
+        return int(self.counts[:, 0].sum())
+
+    def sum(self, field, car_type=None):
+        """Sum of a field, over all vehicles or the vehicles of one type."""
+        return self.sums[self._rows(car_type), self.fields.index(field)].sum()
+
+    def mean(self, field, car_type=None):
+        """Mean of the non empty values of a field, nan if there are none."""
+        column = self.fields.index(field)
+        rows = self._rows(car_type)
+        return _mean(self.sums[rows, column].sum(), self.counts[rows, column].sum())
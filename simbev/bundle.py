@@ -0,0 +1,399 @@
+import json
+import pathlib
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# increase if the layout of the bundle changes
+BUNDLE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def get_input_files(scenario_files, input_directory, region_types):
+    """Returns the input files of a bundle.
+
+    Parameters
+    ----------
+    scenario_files : list
+        Input files of the scenario directory.
+    input_directory : pathlib.Path
+        Path to probability data directory.
+    region_types : list
+        Region types in the bundle.
+
+    Returns
+    -------
+    list
+    """
+    input_files = list(scenario_files)
+    for rs7_type in region_types:
+        input_files.extend(pathlib.Path(input_directory, rs7_type).glob("*.csv"))
+    return input_files
+
+
+def get_source_files(file_paths):
+    """Returns path, size and modification time of the input files of a bundle.
+
+    Parameters
+    ----------
+    file_paths : list
+        Paths of the input files.
+
+    Returns
+    -------
+    list
+        Resolved path, size and modification time of each file, sorted by path.
+    """
+    sources = []
+    for file_path in file_paths:
+        file_path = pathlib.Path(file_path).resolve()
+        stat = file_path.stat()
+        sources.append([str(file_path), stat.st_size, stat.st_mtime_ns])
+    return sorted(sources)
+
+
+class BundleWriter:
+    """Writes the tables of a bundle as .npy files.
+
+    Parameters
+    ----------
+    bundle_path : pathlib.Path
+        Directory of the bundle, replaced if it exists.
+    """
+
+    def __init__(self, bundle_path):
+        self.bundle_path = pathlib.Path(bundle_path)
+        if self.bundle_path.exists():
+            shutil.rmtree(self.bundle_path)
+        pathlib.Path(self.bundle_path, "arrays").mkdir(parents=True)
+        self.array_count = 0
+
+    def _write_array(self, array):
+        array = np.asarray(array)
+        null = None
+        if array.dtype == object:
+            # strings with missing values, numpy files are written without pickle
+            null = self._write_array(pd.isna(array))
+            array = np.where(pd.isna(array), "", array).astype(str)
+        file_name = f"{self.array_count}.npy"
+        self.array_count += 1
+        np.save(pathlib.Path(self.bundle_path, "arrays", file_name), array)
+        if null is None:
+            return {"file": file_name}
+        return {"file": file_name, "null": null}
+
+    def write_frame(self, df):
+        """Writes a DataFrame and returns its entry of the manifest.
+
+        Parameters
+        ----------
+        df : DataFrame
+
+        Returns
+        -------
+        dict
+        """
+        if isinstance(df.index, pd.RangeIndex) and df.index.equals(
+            pd.RangeIndex(len(df.index))
+        ):
+            index = {"range": len(df.index)}
+        else:
+            index = self._write_array(df.index.to_numpy())
+        entry = {
+            "index": index,
+            "index_name": df.index.name,
+            "columns": [str(column) for column in df.columns],
+        }
+        dtypes = set(df.dtypes)
+        if len(dtypes) == 1 and object not in dtypes:
+            # one array, so that the DataFrame is a view of the mapped file
+            entry["block"] = self._write_array(df.to_numpy())
+        else:
+            entry["values"] = [
+                self._write_array(df.iloc[:, i].to_numpy())
+                for i in range(len(df.columns))
+            ]
+        return entry
+
+    def write_manifest(self, manifest):
+        """Writes the manifest, the bundle is complete afterwards.
+
+        Parameters
+        ----------
+        manifest : dict
+            Entries of the bundle.
+        """
+        manifest = dict(manifest, version=BUNDLE_VERSION)
+        with open(pathlib.Path(self.bundle_path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=4)
+
+
+def write_bundle(bundle_path, data_dict, region_types, sources):
+    """Writes the input data of a scenario to a bundle.
+
+    Parameters
+    ----------
+    bundle_path : pathlib.Path
+        Directory of the bundle, replaced if it exists.
+    data_dict : dict
+        Input tables of the scenario as returned by SimBEV.read_input_data.
+    region_types : dict
+        Probabilities (as returned by RegionType.get_probabilities) and weekly MiD-data by
+        season of each region type, keys "probabilities" and "week_data".
+    sources : list
+        Input files of the bundle as returned by get_source_files.
+    """
+    writer = BundleWriter(bundle_path)
+    frames = {}
+    for key, value in data_dict.items():
+        if isinstance(value, pd.DataFrame):
+            frames[key] = writer.write_frame(value)
+    charging_probabilities = {
+        charging_type: writer.write_frame(df)
+        for charging_type, df in data_dict["charging_probabilities"].items()
+    }
+    region_type_entries = {}
+    for rs7_type, region_type in region_types.items():
+        probabilities = {}
+        for key, value in region_type["probabilities"].items():
+            if isinstance(value, pd.DataFrame):
+                probabilities[key] = writer.write_frame(value)
+            else:
+                probabilities[key] = {
+                    purpose: writer.write_frame(df) for purpose, df in value.items()
+                }
+        region_type_entries[rs7_type] = {
+            "probabilities": probabilities,
+            "week_data": {
+                season: writer.write_frame(df)
+                for season, df in region_type["week_data"].items()
+            },
+        }
+    writer.write_manifest(
+        {
+            "sources": sources,
+            "frames": frames,
+            "charging_probabilities": charging_probabilities,
+            "hpc_data": data_dict["hpc_data"],
+            "region_types": region_type_entries,
+        }
+    )
+
+
+def _get_frame(bundle, key):
+    return bundle.get_frame(key)
+
+
+class BundleFrame(pd.DataFrame):
+    """DataFrame of a bundle, pickled as a reference to its entry instead of its values.
+
+    Pool processes that receive it map the arrays of the bundle again, so the scenario sent to
+    them doesn't contain copies of the input data.
+    """
+
+    _metadata = ["bundle", "bundle_key"]
+
+    @property
+    def _constructor(self):
+        # frames derived from it are not in the bundle
+        return pd.DataFrame
+
+    def __reduce__(self):
+        return _get_frame, (self.bundle, self.bundle_key)
+
+
+class Bundle:
+    """Compiled input data of a scenario, written by ``python -m simbev compile``.
+
+    Arrays are memory-mapped, so runs don't parse the text input files and processes that
+    open the same bundle share its pages.
+
+    Parameters
+    ----------
+    bundle_path : pathlib.Path
+        Directory of the bundle.
+
+    Attributes
+    ----------
+    bundle_path : pathlib.Path
+        Directory of the bundle.
+    manifest : dict
+        Entries of the bundle.
+
+    Raises
+    ------
+    ValueError
+        If the bundle was written by another version of SimBEV.
+    """
+
+    def __init__(self, bundle_path):
+        self.bundle_path = pathlib.Path(bundle_path)
+        with open(pathlib.Path(self.bundle_path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(
+                f"Bundle {self.bundle_path} has version {self.manifest.get('version')}, "
+                f"expected {BUNDLE_VERSION}. Run python -m simbev compile again."
+            )
+        self._frames = {}
+
+    def __getstate__(self):
+        # the arrays are mapped again where the bundle is unpickled
+        state = self.__dict__.copy()
+        state["_frames"] = {}
+        return state
+
+    @classmethod
+    def open(cls, bundle_path, scenario_files, input_directory):
+        """Opens a bundle if it is up to date.
+
+        Parameters
+        ----------
+        bundle_path : pathlib.Path
+            Directory of the bundle.
+        scenario_files : list
+            Current input files of the scenario directory.
+        input_directory : pathlib.Path
+            Path to probability data directory.
+
+        Returns
+        -------
+        Bundle
+            None if there is no bundle or it was compiled from other input files, which gives a
+            warning.
+        """
+        if not pathlib.Path(bundle_path, MANIFEST_FILE).is_file():
+            return None
+        try:
+            bundle = cls(bundle_path)
+            input_files = get_input_files(
+                scenario_files, input_directory, bundle.region_types
+            )
+            up_to_date = bundle.manifest["sources"] == get_source_files(input_files)
+        except (OSError, ValueError) as e:
+            warnings.warn(f"Bundle {bundle_path} can't be used: {e}")
+            return None
+        if not up_to_date:
+            warnings.warn(
+                f"Input files changed since bundle {bundle_path} was compiled, they are read "
+                "instead. Run python -m simbev compile again."
+            )
+            return None
+        return bundle
+
+    @property
+    def region_types(self):
+        """list: Region types in the bundle."""
+        return list(self.manifest["region_types"])
+
+    def _read_array(self, entry):
+        # copy-on-write, changes of a run are not written to the bundle
+        array = np.load(
+            pathlib.Path(self.bundle_path, "arrays", entry["file"]), mmap_mode="c"
+        )
+        if "null" in entry:
+            array = array.astype(object)
+            array[self._read_array(entry["null"])] = np.nan
+        return array
+
+    def _read_frame(self, entry):
+        if "range" in entry["index"]:
+            index = pd.RangeIndex(entry["index"]["range"], name=entry["index_name"])
+        else:
+            index = pd.Index(
+                self._read_array(entry["index"]), name=entry["index_name"]
+            )
+        if "block" in entry:
+            return BundleFrame(
+                self._read_array(entry["block"]),
+                index=index,
+                columns=entry["columns"],
+                copy=False,
+            )
+        values = [self._read_array(value) for value in entry["values"]]
+        return BundleFrame(dict(zip(entry["columns"], values)), index=index)
+
+    def get_frame(self, key):
+        """Returns a DataFrame of the bundle, its arrays are mapped on first use.
+
+        Parameters
+        ----------
+        key : tuple
+            Keys of the entry in the manifest.
+
+        Returns
+        -------
+        BundleFrame
+        """
+        if key not in self._frames:
+            entry = self.manifest
+            for part in key:
+                entry = entry[part]
+            df = self._read_frame(entry)
+            df.bundle = self
+            df.bundle_key = key
+            self._frames[key] = df
+        return self._frames[key]
+
+    def get_data_dict(self):
+        """Returns the input tables of the scenario.
+
+        Returns
+        -------
+        dict
+            Same structure as SimBEV.read_input_data.
+        """
+        data_dict = {
+            key: self.get_frame(("frames", key)) for key in self.manifest["frames"]
+        }
+        data_dict["charging_probabilities"] = {
+            charging_type: self.get_frame(("charging_probabilities", charging_type))
+            for charging_type in self.manifest["charging_probabilities"]
+        }
+        data_dict["hpc_data"] = self.manifest["hpc_data"]
+        return data_dict
+
+    def get_probabilities(self, rs7_type):
+        """Returns the probabilities of a region type.
+
+        Parameters
+        ----------
+        rs7_type : str
+            Type of the region defined by RegioStaR7.
+
+        Returns
+        -------
+        dict
+            Same structure as RegionType.probabilities.
+        """
+        probabilities = {}
+        entries = self.manifest["region_types"][rs7_type]["probabilities"]
+        for key, entry in entries.items():
+            entry_key = ("region_types", rs7_type, "probabilities", key)
+            if "index" in entry:
+                probabilities[key] = self.get_frame(entry_key)
+            else:
+                probabilities[key] = {
+                    purpose: self.get_frame(entry_key + (purpose,)) for purpose in entry
+                }
+        return probabilities
+
+    def get_week_data(self, rs7_type):
+        """Returns the weekly MiD-data of a region type by season.
+
+        Parameters
+        ----------
+        rs7_type : str
+            Type of the region defined by RegioStaR7.
+
+        Returns
+        -------
+        dict
+        """
+        entries = self.manifest["region_types"][rs7_type]["week_data"]
+        return {
+            season: self.get_frame(("region_types", rs7_type, "week_data", season))
+            for season in entries
+        }
@@ -6,6 +6,9 @@ import numpy as np
 import pandas as pd
 from scipy.interpolate import interp1d
 
+from simbev.event_log import EventLog, ChargingLog
+from simbev.analysis import VehicleStatistics
+
 
 @dataclass
 class UserGroup:
@@ -80,175 +83,6 @@ class CarType:
     label: str = None
 
 
-def analyze_charge_events(output_df: pd.DataFrame):
-    """Analyzes charging events in the timeseries of one vehicle.
-
-    Parameters
-    ----------
-    output_df : Dataframe
-        Specific time series for given vehicle.
-
-    Returns
-    -------
-    ndarray
-        Returns information about charging events of vehicle in whole timeframe.
-    """
-    # todo: addapt analysis to new use cases
-    charge_events = output_df.loc[output_df["energy"] > 0]
-    event_count = str(len(charge_events.index))
-    hpc_count = len(
-        charge_events.loc[
-            (charge_events["use_case"] == "hpc")
-            | (charge_events["use_case"] == "public_fast")
-            | (charge_events["use_case"] == "public_highway")
-        ].index
-    )
-    max_time = charge_events["event_time"].max()
-    min_time = charge_events["event_time"].min()
-    avg_time = round(charge_events["event_time"].mean(), 4)
-    max_charge = charge_events["energy"].max()
-    min_charge = round(charge_events["energy"].min(), 4)
-    avg_charge = round(charge_events["energy"].mean(), 4)
-    hpc_avg_charge = (
-        charge_events["energy"]
-        .loc[
-            (charge_events["use_case"] == "hpc")
-            | (charge_events["use_case"] == "public_fast")
-            | (charge_events["use_case"] == "public_highway")
-        ]
-        .mean()
-    )
-    home_avg_charge = (
-        charge_events["energy"].loc[charge_events["use_case"] == "home"].mean()
-    )
-    work_avg_charge = (
-        charge_events["energy"].loc[charge_events["use_case"] == "work"].mean()
-    )
-    public_avg_charge = (
-        charge_events["energy"]
-        .loc[
-            (charge_events["use_case"] == "public")
-            | (charge_events["use_case"] == "retail")
-        ]
-        .mean()
-    )
-
-    # counting public and private charging events
-    public_count = len(
-        charge_events.loc[
-            (charge_events["use_case"] == "public")
-            | (charge_events["use_case"] == "hpc")
-            | (charge_events["use_case"] == "public_fast")
-            | (charge_events["use_case"] == "public_highway")
-            | (charge_events["use_case"] == "retail")
-        ].index
-    )
-    private_count = len(
-        charge_events.loc[
-            (charge_events["use_case"] == "home")
-            | (charge_events["use_case"] == "work")
-        ].index
-    )
-
-    return np.array(
-        [
-            event_count,
-            hpc_count,
-            max_time,
-            min_time,
-            avg_time,
-            max_charge,
-            min_charge,
-            avg_charge,
-            hpc_avg_charge,
-            home_avg_charge,
-            work_avg_charge,
-            public_avg_charge,
-            public_count,
-            private_count,
-        ]
-    )
-
-
-def analyze_drive_events(output_df: pd.DataFrame, car_type: str):
-    """Analyzes driving events in the timeseries of one vehicle.
-
-    Parameters
-    ----------
-    output_df : Dataframe
-        Specific time series for given vehicle.
-    car_type : str
-        Type of vehicle.
-
-    Returns
-    -------
-    ndarray
-        Returns information about driving events of vehicle in whole timeframe.
-    """
-
-    drive_events = output_df.loc[output_df["energy"] < 0]
-    event_count = len(drive_events.index)
-    max_time = drive_events["event_time"].max()
-    min_time = drive_events["event_time"].min()
-    avg_time = round(drive_events["event_time"].mean(), 4)
-    max_consumption = abs(drive_events["energy"].min())
-    min_consumption = abs(drive_events["energy"].max())
-    avg_consumption = round(abs(drive_events["energy"].mean()), 4)
-    # mid analysis
-    avg_distance = round(drive_events["distance"].mean(), 4)
-    distance_cumulated = round(drive_events["distance"].sum(), 4)
-    distance_home = round(
-        drive_events["distance"].loc[drive_events["destination"] == "home"].mean(), 4
-    )
-    distance_work = round(
-        drive_events["distance"].loc[drive_events["destination"] == "work"].mean(), 4
-    )
-    distance_private = round(
-        drive_events["distance"].loc[drive_events["destination"] == "private"].mean(), 4
-    )
-    distance_leisure = round(
-        drive_events["distance"].loc[drive_events["destination"] == "leisure"].mean(), 4
-    )
-    distance_shopping = round(
-        drive_events["distance"].loc[drive_events["destination"] == "shopping"].mean(),
-        4,
-    )
-    distance_hpc = round(
-        drive_events["distance"].loc[drive_events["destination"] == "hpc"].mean(), 4
-    )
-    distance_school = round(
-        drive_events["distance"].loc[drive_events["destination"] == "school"].mean(), 4
-    )
-    distance_business = round(
-        drive_events["distance"].loc[drive_events["destination"] == "business"].mean(),
-        4,
-    )
-
-    return np.array(
-        [
-            car_type,
-            event_count,
-            max_time,
-            min_time,
-            avg_time,
-            max_consumption,
-            min_consumption,
-            avg_consumption,
-            avg_time,
-            avg_distance,
-            distance_home,
-            distance_work,
-            distance_business,
-            distance_school,
-            distance_shopping,
-            distance_private,
-            distance_leisure,
-            distance_hpc,
-            distance_cumulated,
-        ]
-    )
-
-
 class Car:
     """Describes a vehicle. Contains all information and methods of that vehicle.
 
@@ -272,6 +106,10 @@ class Car:
         Soc of car.
     status : str
         Location of car.
+    analyze : bool
+        Collect running statistics of the events for the analysis output.
+    rng : Generator
+        Random number generator of the vehicle.
 
     Attributes
     ----------
@@ -289,7 +127,7 @@ class Car:
         Value of attraction for hpc of vehicle.
     number : int
         Number of the vehicle.
-    output : dict
+    output : EventLog
         timeseries of vehicle that contains output-data for every event of vehicle.
     region : Region
         Includes data related to current region.
@@ -309,8 +147,37 @@ class Car:
         Identifier for private parking at work.
     work_capacity
         Power of charging-point at work
+    charging_log : ChargingLog
+        Charged time steps of vehicle, used for the grid time series of the region.
+    statistics : VehicleStatistics
+        Running statistics of the events of vehicle, None if the simulation is not analyzed.
+    rng : Generator
+        Random number generator of the vehicle, trips of the vehicle draw from it.
     """
 
+    __slots__ = (
+        "car_type",
+        "user_group",
+        "soc_start",
+        "soc",
+        "work_parking",
+        "home_parking",
+        "work_capacity",
+        "home_capacity",
+        "status",
+        "number",
+        "region",
+        "home_detached",
+        "private_only",
+        "fast_charging_threshold",
+        "driving_profile",
+        "output",
+        "charging_log",
+        "statistics",
+        "rng",
+        "file_name",
+    )
+
     def __init__(
         self,
         car_type: CarType,
@@ -326,6 +193,8 @@ class Car:
         status: str = "home",
         private_only=False,
         fast_charging_threshold=50,
+        analyze=False,
+        rng=None,
     ):
         self.car_type = car_type
         self.user_group = user_group
@@ -343,24 +212,17 @@ class Car:
         self.fast_charging_threshold = fast_charging_threshold
         self.driving_profile = None
 
-        # lists to track output data
-        self.output = {
-            "timestamp": [],
-            "event_start": [],
-            "event_time": [],
-            "location": [],
-            "use_case": [],
-            "charging_use_case": [],
-            "soc_start": [],
-            "soc_end": [],
-            "energy": [],
-            "station_charging_capacity": [],
-            "average_charging_power": [],
-            "destination": [],
-            "distance": [],
-        }
-
-        self.grid_timeseries_list = []
+        # columnar buffer to track output data
+        self.output = EventLog()
+        self.charging_log = ChargingLog()
+        self.statistics = (
+            VehicleStatistics(
+                car_type.battery_capacity, region.region_type.step_size, soc
+            )
+            if analyze
+            else None
+        )
+        self.rng = rng
 
         self.file_name = "{}_{:05d}_{}kWh_events.csv".format(
             car_type.name, number, car_type.battery_capacity
@@ -368,7 +230,6 @@ class Car:
 
     def _update_activity(
         self,
-        timestamp,
         event_start,
         event_time,
         distance=0,
@@ -381,8 +242,6 @@ class Car:
 
         Parameters
         ----------
-        timestamp : Timestamp
-            Date and time of event.
         event_start : int
             start timestep of event
         event_time : int
@@ -392,35 +251,28 @@ class Car:
         charging_power : int
             Charging-power of event.
         """
+        use_case = self._get_usecase(nominal_charging_capacity)
         if self.car_type.output:
-            self.output["timestamp"].append(timestamp)
-            self.output["event_start"].append(np.int32(event_start))
-            self.output["event_time"].append(np.int32(event_time))
-            self.output["location"].append(self.status)
-            self.output["use_case"].append(self._get_usecase(nominal_charging_capacity))
-            self.output["charging_use_case"].append(charging_use_case)
-            self.output["soc_start"].append(
-                round(
-                    np.float32(
-                        self.output["soc_end"][-1]
-                        if len(self.output["soc_end"]) > 0
-                        else self.soc_start
-                    ),
-                    4,
-                )
-            )
-            self.output["soc_end"].append(round(np.float32(self.soc), 4))
-            charging_demand = self._get_last_charging_demand()
-            consumption = self._get_last_consumption()
-            self.output["energy"].append(np.float32(charging_demand + consumption))
-            self.output["station_charging_capacity"].append(
-                np.float32(nominal_charging_capacity)
+            self.output.append(
+                event_start,
+                event_time,
+                self.status,
+                use_case,
+                charging_use_case,
+                self.soc,
+                nominal_charging_capacity,
+                charging_power,
             )
-            self.output["average_charging_power"].append(
-                round(np.float32(charging_power), 4)
+        if self.statistics is not None:
+            self.statistics.add(
+                event_start,
+                event_time,
+                use_case,
+                self.soc,
+                charging_power,
+                distance,
+                destination,
             )
-            self.output["distance"].append(np.float32(distance))
-            self.output["destination"].append(destination)
 
     def park(self, trip):
         """Parking event, used for standing times without charging.
@@ -429,9 +281,7 @@ class Car:
         ----------
         trip : Trip
         """
-        self._update_activity(
-            trip.park_timestamp, trip.park_start, trip.park_time, charging_use_case=""
-        )
+        self._update_activity(trip.park_start, trip.park_time, charging_use_case="")
 
     def charge(
         self,
@@ -491,7 +341,6 @@ class Car:
             else trip.park_time
         )
         self._update_activity(
-            trip.park_timestamp,
             trip.park_start,
             park_time,
             nominal_charging_capacity=power,
@@ -652,6 +501,9 @@ class Car:
         charging_time = sum(charging_time_array)
         charged_energy_list = []
         time_steps = math.ceil(charging_time / step_size)
+        occupancy_column, use_case_column = self.region.get_grid_columns(
+            charging_use_case, power
+        )
 
         # iterate through all timesteps the charging event is part of
         for charging_time_step in range(time_steps):
@@ -709,16 +561,15 @@ class Car:
                     else trip.park_start + trip.park_time
                 )
 
-            grid_dict = {
-                "charging_use_case": charging_use_case,
-                "chargepower_timestep": np.float32(chargepower_timestep),
-                "power": np.float32(power),
-                "start": trip.park_start + charging_time_step,
-                "end": trip.park_start + charging_time_step + 1,
-                "time": charging_time_step,
-                "park_ts_end": park_timestep_end,
-            }
-            self.grid_timeseries_list.append(grid_dict)
+            self.charging_log.append(
+                occupancy_column,
+                use_case_column,
+                chargepower_timestep,
+                trip.park_start + charging_time_step,
+                trip.park_start + charging_time_step + 1,
+                charging_time_step,
+                park_timestep_end,
+            )
 
         chargepower_avgerage = (
             sum(charged_energy_list) / len(charged_energy_list) * 60 / step_size
@@ -782,7 +633,6 @@ class Car:
                     )
                 )
         self._update_activity(
-            timestamp,
             start_time,
             duration,
             distance=distance,
@@ -857,34 +707,6 @@ class Car:
         """
         return self.soc - self.car_type.soc_min
 
-    def _get_last_charging_demand(self):
-        """Calculates energy used for last charging-event.
-
-        Returns
-        -------
-        float
-            Returns energy used for last charging-event.
-        """
-        if len(self.output["soc_start"]):
-            charging_demand = self.output["soc_end"][-1] - self.output["soc_start"][-1]
-            charging_demand *= self.car_type.battery_capacity
-            return max(round(charging_demand, 4), 0)
-        return 0
-
-    def _get_last_consumption(self):
-        """Calculates energy used for last driving-event.
-
-        Returns
-        -------
-        float
-            Returns energy used for last driving-event.
-        """
-        if len(self.output["soc_start"]):
-            last_consumption = self.output["soc_end"][-1] - self.output["soc_start"][-1]
-            last_consumption *= self.car_type.battery_capacity
-            return min(round(last_consumption, 4), 0)
-        return 0
-
     def _get_usecase(self, power):
         """Determines use-case of parking-event.
 
@@ -908,6 +730,92 @@ class Car:
             return "hpc"
         return "public"
 
+    def _get_activity(self, simbev):
+        """Builds the output columns of the vehicle from its event log.
+
+        Socs, energies and charging powers are rounded here, the first week is removed and
+        the first event is fitted to start at time step 0.
+
+        Parameters
+        ----------
+        simbev : :obj:`SimBEV`
+            SimBEV object with scenario information
+
+        Returns
+        -------
+        dict
+            Output columns of the vehicle as arrays.
+        """
+        log = self.output
+        soc_end = np.round(log["soc_end"], 4)
+        soc_start = np.empty_like(soc_end)
+        soc_start[:1] = np.round(np.float32(self.soc_start), 4)
+        soc_start[1:] = soc_end[:-1]
+        energy = np.round(
+            (soc_end - soc_start).astype(np.float64) * self.car_type.battery_capacity,
+            4,
+        ).astype(np.float32)
+
+        # remove first week
+        week_time_steps = int(24 * 7 * 60 / simbev.step_size)
+        event_start = log["event_start"] - week_time_steps
+        keep = np.flatnonzero((event_start + log["event_time"]) > 0)
+        time_index = self.region.region_type.time_series.index
+        activity = {
+            "timestamp": time_index.values[log["event_start"][keep]],
+            "event_start": event_start[keep],
+            "event_time": log["event_time"][keep],
+            "location": log.decode("location")[keep],
+            "use_case": log.decode("use_case")[keep],
+            "charging_use_case": log.decode("charging_use_case")[keep],
+            "soc_start": soc_start[keep],
+            "soc_end": soc_end[keep],
+            "energy": energy[keep],
+            "station_charging_capacity": log["station_charging_capacity"][keep],
+            "average_charging_power": np.round(log["average_charging_power"][keep], 4),
+        }
+
+        # change first row event if it has charging demand or consumption if it doesn't start at time step 0
+        if activity["event_start"][0] < 0:
+            energy = activity["energy"]
+            event_len = activity["event_time"][0]
+            post_event_len = activity["event_start"][1]
+            pre_event_len = event_len - post_event_len
+
+            # change charging events
+            if energy[0] > 0:
+                pre_demand = (
+                    activity["average_charging_power"][0]
+                    * pre_event_len
+                    * simbev.step_size
+                    / 60
+                )
+                energy[0] = round(max(energy[0] - pre_demand, 0), 4)
+
+            # change driving events
+            elif energy[0] < 0:
+                energy[0] = round(energy[0] * (post_event_len / event_len), 4)
+
+            # adjust value for starting soc in first row
+            activity["soc_start"][0] = round(
+                np.float32(
+                    activity["soc_end"][0] - energy[0] / self.car_type.battery_capacity
+                ),
+                4,
+            )
+
+            # adjust value for average charging power in first row
+            activity["average_charging_power"][0] = energy[0] / (
+                post_event_len * simbev.step_size / 60
+            )
+
+            # fit first row event to start at time step 0
+            activity["event_start"][0] = 0
+            activity["event_time"][0] = post_event_len
+            activity["timestamp"][0] = np.datetime64(simbev.start_date_output)
+
+        return activity
+
     def export(self, region_directory, simbev):
         """
         Exports the output values collected in car object to .csv file.
@@ -921,89 +829,15 @@ class Car:
 
         Returns
         -------
-        ndarray
-            Returns summarized information on charging- and driving-events.
+        tuple
+            Returns summarized information on charging- and driving-events as a record of ANALYSIS_DTYPE,
+            None if the vehicle is not analyzed.
         """
 
-        for charge_event in self.grid_timeseries_list:
-            self.region.update_grid_timeseries(
-                charge_event["charging_use_case"],
-                charge_event["chargepower_timestep"],
-                charge_event["power"],
-                charge_event["start"],
-                charge_event["end"],
-                charge_event["time"],
-                charge_event["park_ts_end"],
-                self.car_type.name,
-            )
-        if self.car_type.output:
-            activity = pd.DataFrame(self.output)
-
-            # remove first week from dataframe
-            week_time_steps = int(24 * 7 * 60 / simbev.step_size)
-            activity["event_start"] -= week_time_steps
-            activity = activity.loc[
-                (activity["event_start"] + activity["event_time"]) > 0
-            ]
-
-            # change first row event if it has charging demand or consumption if it doesn't start at time step 0
-            if activity.at[activity.index[0], "event_start"] < 0:
-                event_len = activity.at[activity.index[0], "event_time"]
-                post_event_len = activity.at[activity.index[1], "event_start"]
-                pre_event_len = event_len - post_event_len
-
-                # change charging events
-                if activity.at[activity.index[0], "energy"] > 0:
-                    pre_demand = (
-                        activity.at[activity.index[0], "average_charging_power"]
-                        * pre_event_len
-                        * simbev.step_size
-                        / 60
-                    )
-                    new_demand = round(
-                        max(activity.at[activity.index[0], "energy"] - pre_demand, 0), 4
-                    )
-                    activity.at[activity.index[0], "energy"] = new_demand
-
-                # change driving events
-                elif activity.at[activity.index[0], "energy"] < 0:
-                    new_consumption = round(
-                        activity.at[activity.index[0], "energy"]
-                        * (post_event_len / event_len),
-                        4,
-                    )
-                    activity.at[activity.index[0], "energy"] = new_consumption
-
-                # adjust value for starting soc in first row
-                activity.at[activity.index[0], "soc_start"] = round(
-                    np.float32(
-                        activity.at[activity.index[0], "soc_end"]
-                        - activity.at[activity.index[0], "energy"]
-                        / self.car_type.battery_capacity
-                    ),
-                    4,
-                )
-
-                # adjust value for average charging power in first row
-                activity.at[activity.index[0], "average_charging_power"] = activity.at[
-                    activity.index[0], "energy"
-                ] / (post_event_len * simbev.step_size / 60)
-
-                # fit first row event to start at time step 0
-                activity.at[activity.index[0], "event_start"] = 0
-                activity.at[activity.index[0], "event_time"] = post_event_len
-                activity.at[activity.index[0], "timestamp"] = simbev.start_date_output
-
-                activity["event_start"] = activity["event_start"]
-                activity["event_time"] = activity["event_time"]
-
-            drive_array = analyze_drive_events(activity, self.car_type.name)
-            charge_array = analyze_charge_events(activity)
-            if simbev.output_options["car"]:
-                activity = activity.drop(columns=["destination", "distance"])
-                activity = activity.reset_index(drop=True)
-                activity.to_csv(
-                    pathlib.Path(region_directory, self.file_name), index=False
-                )
+        self.region.update_grid_timeseries(self.charging_log, self.car_type.name)
+        if self.car_type.output and simbev.output_options["car"]:
+            activity = pd.DataFrame(self._get_activity(simbev), copy=False)
+            activity.to_csv(pathlib.Path(region_directory, self.file_name), index=False)
 
-            return np.hstack((drive_array, charge_array))
+        if self.statistics is not None:
+            return self.statistics.record(self.car_type.name)
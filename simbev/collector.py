@@ -0,0 +1,182 @@
+import collections
+
+from simbev.region import ChunkFailure
+
+
+class ChunkCollector:
+    """Collects the completed chunks of a run and exports a region once all of its chunks are done.
+
+    Chunks that fail are kept as failures of the current round, completed chunks of their region
+    are kept for the retry. With shared grid time series, the collector hands out the slots of the
+    regions and parks the partial grid time series of regions with failed chunks until the retry.
+    If a pool process is lost, the slots of all regions that had chunks in the pool may contain
+    incomplete additions, these regions are simulated again as a whole.
+
+    Parameters
+    ----------
+    simbevs : list
+        Scenarios that are simulated, one per iteration.
+    chunks : list
+        Number of the iteration and (region, first vehicle, vehicle after the last one) of all
+        chunks of the run.
+    shared_grid : SharedGridTimeSeries
+        Grid time series of the simulated regions in shared memory, None if chunks return their
+        grid time series.
+
+    Attributes
+    ----------
+    failures : list
+        Number of the iteration and ChunkFailure of the chunks that failed in the current round.
+    busy_time : float
+        CPU time of all completed chunks in seconds.
+    """
+
+    def __init__(self, simbevs, chunks, shared_grid=None):
+        self.simbevs = simbevs
+        self.shared_grid = shared_grid
+        self.regions = {region.number: region for region in simbevs[0].regions}
+        # position of a region in SimBEV.regions, used to find it in pool processes
+        self.region_index = {
+            region.number: index for index, region in enumerate(simbevs[0].regions)
+        }
+        self.region_chunks = collections.defaultdict(list)
+        for iteration, (region, start, stop) in chunks:
+            self.region_chunks[(iteration, region.number)].append((start, stop))
+        self.finished_chunks = collections.defaultdict(list)
+        self.pending_chunks = collections.Counter()
+        # summed grid time series of completed chunks of regions with failed chunks
+        self.parked_grids = {}
+        # regions whose shared grid time series are incomplete after a lost process
+        self.lost_regions = set()
+        self.failures = []
+        self.busy_time = 0.0
+
+    def start_round(self, chunks):
+        """Starts a round of chunks, failures of the last round are dropped.
+
+        Parameters
+        ----------
+        chunks : list
+            Number of the iteration and (region, first vehicle, vehicle after the last one) of the
+            chunks of the round.
+
+        Returns
+        -------
+        generator
+            Tasks of _run_chunk, slots are given out when a task is handed to the pool.
+        """
+        self.failures = []
+        self.pending_chunks = collections.Counter(
+            (iteration, region.number) for iteration, (region, _, _) in chunks
+        )
+        return self._get_tasks(chunks)
+
+    def _get_tasks(self, chunks):
+        for iteration, (region, start, stop) in chunks:
+            slot = None
+            if self.shared_grid is not None:
+                key = (iteration, region.number)
+                slot = self.shared_grid.slots.get(key)
+                if slot is None:
+                    slot = self.shared_grid.acquire(key)
+            yield iteration, self.region_index[region.number], start, stop, slot
+
+    def lose_chunk(self, task):
+        """Returns the failure of a task that was lost together with its pool process.
+
+        Parameters
+        ----------
+        task : tuple
+            Task of _run_chunk.
+
+        Returns
+        -------
+        tuple
+            Number of the iteration and ChunkFailure of the chunk.
+        """
+        iteration, region_index, start, stop, _ = task
+        region = self.simbevs[iteration].regions[region_index]
+        print(
+            "\nProcess lost (Region {}, vehicles {}-{})".format(
+                region.id, start + 1, stop
+            )
+        )
+        error = "Pool process was lost, e.g. killed by the out-of-memory killer"
+        return iteration, ChunkFailure(
+            region.number, start, stop, error, "", process_lost=True
+        )
+
+    def add(self, iteration, result):
+        """Adds the result of a chunk and exports its region if all chunks of it are done.
+
+        Parameters
+        ----------
+        iteration : int
+            Number of the iteration.
+        result : RegionChunk or ChunkFailure
+            Result of the chunk.
+        """
+        key = (iteration, result.region_number)
+        self.pending_chunks[key] -= 1
+        if isinstance(result, ChunkFailure):
+            # completed chunks are kept, the failed chunk is retried
+            self.failures.append((iteration, result))
+            if result.process_lost and self.shared_grid is not None:
+                self.lost_regions.add(key)
+                # processes of the next pool are started after this
+                self.shared_grid.reset_lock()
+        else:
+            self.busy_time += result.duration
+            self.finished_chunks[key].append(result)
+        if len(self.finished_chunks[key]) == len(self.region_chunks[key]):
+            self._export(key)
+        elif (
+            self.shared_grid is not None
+            and not self.pending_chunks[key]
+            and key in self.shared_grid.slots
+        ):
+            # the slot is needed by other regions until the retry
+            parked = self.parked_grids.get(key, 0)
+            self.parked_grids[key] = self.shared_grid.release(key) + parked
+
+    def _export(self, key):
+        iteration, region_number = key
+        region_chunks = self.finished_chunks.pop(key)
+        grid_time_series = None
+        if self.shared_grid is not None:
+            grid_time_series = self.shared_grid.release(key)
+            grid_time_series += self.parked_grids.pop(key, 0)
+        simbev = self.simbevs[iteration]
+        simbev._log_grid_data(
+            simbev.export_region(
+                self.regions[region_number], region_chunks, grid_time_series
+            )
+        )
+
+    def get_retry_chunks(self):
+        """Returns the chunks to retry after a round, all chunks of regions with a lost process.
+
+        Returns
+        -------
+        list
+            Number of the iteration and (region, first vehicle, vehicle after the last one) of the
+            chunks.
+        """
+        chunks = [
+            (
+                iteration,
+                (self.regions[failure.region_number], failure.start, failure.stop),
+            )
+            for iteration, failure in self.failures
+            if (iteration, failure.region_number) not in self.lost_regions
+        ]
+        for key in sorted(self.lost_regions):
+            iteration, region_number = key
+            self.finished_chunks.pop(key, None)
+            self.parked_grids.pop(key, None)
+            chunks.extend(
+                (iteration, (self.regions[region_number], start, stop))
+                for start, stop in self.region_chunks[key]
+            )
+        self.lost_regions = set()
+        return chunks
@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+# columns of the driving profiles that are used by the simulation
+PROFILE_COLUMNS = [
+    "id",
+    "day",
+    "location",
+    "departure_time",
+    "arrival_time",
+    "distance",
+    "charging_use_case",
+]
+CATEGORICAL_COLUMNS = ["location", "charging_use_case"]
+
+
+class DrivingProfiles:
+    """Driving profiles of one region type and car class, sorted by id.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Trips of all profiles, the trips of a profile are kept in their order.
+
+    Attributes
+    ----------
+    data : DataFrame
+        Trips of all profiles sorted by id.
+    columns : dict
+        Columns of data as arrays, categories as arrays of their values.
+    ids : ndarray
+        Ids of the profiles in ascending order.
+    offsets : ndarray
+        Position of the first trip of each profile in data, followed by the number of trips.
+    """
+
+    def __init__(self, data):
+        self.data = data.sort_values("id", kind="stable", ignore_index=True)
+        self.columns = {
+            column: self.data[column].to_numpy() for column in self.data.columns
+        }
+        id_values = self.columns["id"]
+        starts = np.flatnonzero(np.diff(id_values, prepend=id_values[:1] - 1))
+        self.ids = id_values[starts]
+        self.offsets = np.append(starts, len(id_values))
+
+    @classmethod
+    def from_parquet(cls, file_path):
+        """Reads the driving profiles of a parquet file.
+
+        Only the columns in PROFILE_COLUMNS are read, text columns are stored as categories.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+            Path of the parquet file.
+
+        Returns
+        -------
+        DrivingProfiles
+        """
+        data = pd.read_parquet(file_path, columns=PROFILE_COLUMNS)
+        data = data.astype({column: "category" for column in CATEGORICAL_COLUMNS})
+        return cls(data)
+
+    def get_profile(self, profile_id):
+        """Returns the trips of a profile without copying them.
+
+        Parameters
+        ----------
+        profile_id : int
+            Id of the profile.
+
+        Returns
+        -------
+        DataFrame
+        """
+        position = np.searchsorted(self.ids, profile_id)
+        return self.data.iloc[self.offsets[position] : self.offsets[position + 1]]
+
+
+def get_profile_weeks(start_date, end_date):
+    """Returns the weeks of the simulation timeframe that get a profile each.
+
+    The first and last week can be partial weeks.
+
+    Parameters
+    ----------
+    start_date : date
+        Start of simulation timeframe.
+    end_date : date
+        End of simulation timeframe.
+
+    Returns
+    -------
+    ndarray
+        Offset of the first day of the week from start_date, its weekday and the weekday of the
+        last day of the week, one row per week.
+    """
+    weekdays = pd.date_range(start_date, end_date, freq="D").weekday.to_numpy()
+    first_days = np.flatnonzero((weekdays == 0) | (np.arange(len(weekdays)) == 0))
+    last_days = np.append(first_days[1:], len(weekdays)) - 1
+    return np.column_stack([first_days, weekdays[first_days], weekdays[last_days]])
+
+
+@dataclass
+class ProfileBatch:
+    """Driving profiles of several vehicles, assembled from the weeks of DrivingProfiles.
+
+    Trips are stored as positions in the driving profiles instead of copies of their data.
+
+    Parameters
+    ----------
+    profiles : DrivingProfiles
+        Driving profiles the weeks are taken from.
+    rows : ndarray
+        Position of each trip in profiles.data, ordered by vehicle and time.
+    time_steps : ndarray
+        Time step of the departure of each trip.
+    offsets : ndarray
+        Position of the first trip of each vehicle in rows, followed by the number of trips.
+    """
+
+    profiles: DrivingProfiles
+    rows: np.ndarray
+    time_steps: np.ndarray
+    offsets: np.ndarray
+
+    def get_vehicle_profile(self, vehicle):
+        """Returns the driving profile of a vehicle.
+
+        Parameters
+        ----------
+        vehicle : int
+            Number of the vehicle in the batch.
+
+        Returns
+        -------
+        dict
+            Trips of the vehicle as arrays by column of the driving profiles, their time steps
+            under "time_step".
+        """
+        start, stop = self.offsets[vehicle], self.offsets[vehicle + 1]
+        rows = self.rows[start:stop]
+        profile = {
+            column: values[rows] for column, values in self.profiles.columns.items()
+        }
+        profile["time_step"] = self.time_steps[start:stop]
+        return profile
+
+
+def assemble_profiles(profiles, draws, weeks, step_size):
+    """Assembles the driving profiles of several vehicles at once.
+
+    Each week of a vehicle gets the profile chosen by its draw, restricted to the days of the week
+    that are part of the simulation timeframe.
+
+    Parameters
+    ----------
+    profiles : DrivingProfiles
+        Driving profiles of the region type and car class of the vehicles.
+    draws : ndarray
+        Random numbers in [0, 1) that choose the profiles, one row per vehicle and one column
+        per week.
+    weeks : ndarray
+        Weeks of the simulation as returned by get_profile_weeks.
+    step_size : int
+        Step size of the simulation in minutes.
+
+    Returns
+    -------
+    ProfileBatch
+    """
+    vehicle_count, week_count = draws.shape
+    positions = (draws * len(profiles.ids)).astype(np.int64).ravel()
+    starts = profiles.offsets[positions]
+    lengths = profiles.offsets[positions + 1] - starts
+
+    # all trips of the chosen profiles, by vehicle and week
+    profile_weeks = np.repeat(np.arange(len(positions)), lengths)
+    rows = (
+        np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        + np.arange(lengths.sum())
+    )
+    week_numbers = profile_weeks % week_count
+    days = profiles.columns["day"][rows]
+    in_timeframe = (days >= weeks[week_numbers, 1]) & (days <= weeks[week_numbers, 2])
+    rows = rows[in_timeframe]
+    profile_weeks = profile_weeks[in_timeframe]
+    week_numbers = week_numbers[in_timeframe]
+    days = days[in_timeframe]
+
+    steps_per_day = 1440 / step_size
+    day_offsets = weeks[week_numbers, 0] + days - weeks[week_numbers, 1]
+    time_steps = np.floor(
+        day_offsets * steps_per_day
+        + profiles.columns["departure_time"][rows] / step_size
+    )
+    offsets = np.searchsorted(profile_weeks // week_count, np.arange(vehicle_count + 1))
+    return ProfileBatch(profiles, rows, time_steps, offsets)
+
+
+class DrivingProfileInput:
+    """Driving profiles of all region types and car classes, read when they are first used.
+
+    Files are named <prefix>_<rs3 type>_<car class>.gzip. Read profiles are not pickled, so
+    processes only read the files of the regions and car types they simulate.
+
+    Parameters
+    ----------
+    input_directory : pathlib.Path
+        Directory of the driving profiles.
+
+    Attributes
+    ----------
+    file_paths : dict
+        Paths of the files by rs3 type and car class.
+    """
+
+    def __init__(self, input_directory):
+        self.file_paths = {}
+        for file_path in pathlib.Path(input_directory).glob("*.gzip"):
+            file_path_parts = file_path.stem.split("_")
+            self.file_paths[(file_path_parts[-2], file_path_parts[-1])] = file_path
+        self._profiles = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_profiles"] = {}
+        return state
+
+    def get(self, rs3_type, car_class):
+        """Returns the driving profiles of a region type and car class.
+
+        Parameters
+        ----------
+        rs3_type : str
+            Type of the region defined by RegioStaR3.
+        car_class : str
+            Class of the car type, e.g. mini.
+
+        Returns
+        -------
+        DrivingProfiles
+
+        Raises
+        ------
+        FileNotFoundError
+            If there are no driving profiles for the region type and car class.
+        """
+        key = (rs3_type, car_class)
+        if key not in self._profiles:
+            if key not in self.file_paths:
+                raise FileNotFoundError(
+                    f"No driving profiles for {rs3_type} {car_class} vehicles found."
+                )
+            # threads that read the same file at once only read it twice
+            self._profiles[key] = DrivingProfiles.from_parquet(self.file_paths[key])
+        return self._profiles[key]
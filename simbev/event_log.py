@@ -0,0 +1,197 @@
+import numpy as np
+
+# string values that can occur in the categorical columns, known values get fixed codes
+CATEGORIES = (
+    "",
+    "driving",
+    "home",
+    "work",
+    "business",
+    "school",
+    "shopping",
+    "private",
+    "leisure",
+    "hpc",
+    "public",
+    "home_detached",
+    "home_apartment",
+    "street",
+    "retail",
+    "urban_fast",
+    "highway_fast",
+)
+
+
+class ColumnarLog:
+    """Growable columnar buffer with one typed array per column.
+
+    Subclasses define the columns and their dtypes. Strings in categorical columns are stored as int8 codes.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of rows the buffer is preallocated for. The buffer doubles its size when it runs full.
+
+    Attributes
+    ----------
+    categories : list
+        Decoding table of the categorical columns, the code of a string is its index in this list.
+    """
+
+    __slots__ = ("_size", "_data", "categories", "_codes")
+
+    columns = {}
+    categorical_columns = ()
+
+    def __init__(self, capacity=128):
+        self._size = 0
+        self._data = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in self.columns.items()
+        }
+        self.categories = list(CATEGORIES)
+        self._codes = {value: code for code, value in enumerate(self.categories)}
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, name):
+        """Returns a view of the recorded values of a column. Categorical columns are returned as codes."""
+        return self._data[name][: self._size]
+
+    def code(self, value):
+        """Returns the code of a string value of the categorical columns.
+
+        Parameters
+        ----------
+        value : str
+            Value to encode. None is treated as an empty string.
+
+        Returns
+        -------
+        int
+        """
+        if value is None:
+            value = ""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.categories)
+            if code > np.iinfo(np.int8).max:
+                raise ValueError(
+                    "Too many different values in categorical columns of {}.".format(
+                        type(self).__name__
+                    )
+                )
+            self.categories.append(value)
+            self._codes[value] = code
+        return code
+
+    def decode(self, name):
+        """Returns the recorded strings of a categorical column.
+
+        Parameters
+        ----------
+        name : str
+            Name of the column.
+
+        Returns
+        -------
+        ndarray
+            Array of strings (dtype object).
+        """
+        return np.asarray(self.categories, dtype=object)[self[name]]
+
+    def append(self, *values):
+        """Records a new row. Values are given in the order of the columns, strings are encoded."""
+        if self._size == len(next(iter(self._data.values()))):
+            self._grow()
+        i = self._size
+        for (name, column), value in zip(self._data.items(), values):
+            if name in self.categorical_columns:
+                value = self.code(value)
+            column[i] = value
+        self._size += 1
+
+    def extend(self, *values):
+        """Records several rows at once. Values are given as arrays in the order of the columns.
+
+        Categorical columns have to be given as codes.
+        """
+        count = len(values[0])
+        capacity = len(next(iter(self._data.values())))
+        while self._size + count > capacity:
+            self._grow()
+            capacity = len(next(iter(self._data.values())))
+        for column, value in zip(self._data.values(), values):
+            column[self._size : self._size + count] = value
+        self._size += count
+
+    def copy(self):
+        """Returns an independent copy of the buffer."""
+        log = type(self)(0)
+        log._size = self._size
+        log._data = {name: values.copy() for name, values in self._data.items()}
+        log.categories = list(self.categories)
+        log._codes = dict(self._codes)
+        return log
+
+    def _grow(self):
+        """Doubles the capacity of all columns."""
+        for name, values in self._data.items():
+            grown = np.zeros(max(2 * len(values), 1), dtype=values.dtype)
+            grown[: len(values)] = values
+            self._data[name] = grown
+
+
+class EventLog(ColumnarLog):
+    """Records the events of one vehicle.
+
+    Steps are stored as int32, values as float32 and strings (location and use cases) as int8 codes.
+    Values are stored unrounded, rounding happens on export.
+    """
+
+    __slots__ = ()
+
+    columns = {
+        "event_start": np.int32,
+        "event_time": np.int32,
+        "location": np.int8,
+        "use_case": np.int8,
+        "charging_use_case": np.int8,
+        "soc_end": np.float32,
+        "station_charging_capacity": np.float32,
+        "average_charging_power": np.float32,
+    }
+    categorical_columns = ("location", "use_case", "charging_use_case")
+
+
+class ChargingLog(ColumnarLog):
+    """Records every charged time step of one vehicle, used to fill the grid time series of the region.
+
+    Charging use case and power are stored as the columns of the grid time series they count to,
+    -1 if there is no such column.
+    """
+
+    __slots__ = ()
+
+    columns = {
+        "occupancy_column": np.int16,
+        "use_case_column": np.int16,
+        "chargepower_timestep": np.float32,
+        "start": np.int32,
+        "end": np.int32,
+        "time": np.int32,
+        "park_ts_end": np.int32,
+    }
+
+
+class GridIntervalLog(ColumnarLog):
+    """Records intervals [start, end) in which a value is added to one column of a grid time series."""
+
+    __slots__ = ()
+
+    columns = {
+        "column": np.int32,
+        "start": np.int32,
+        "end": np.int32,
+        "value": np.float64,
+    }
@@ -0,0 +1,223 @@
+import concurrent.futures
+import itertools
+
+EXECUTORS = ("serial", "process", "thread")
+# tasks that are handed to a pool at a time per process or thread
+TASKS_PER_WORKER = 2
+
+
+def _imap_unordered(executor, func, tasks, on_lost=None):
+    """Yields the results of func for all tasks as they are completed by the pool of an executor.
+
+    Tasks are taken from the iterable only when a worker is about to become free, at most
+    TASKS_PER_WORKER per worker are submitted at a time. A generator of tasks is resumed after the
+    results handed out before were processed, so it can depend on them.
+
+    If a process of the pool is lost, e.g. killed by the out-of-memory killer, the pool breaks and
+    all of its unfinished tasks are lost. With on_lost, the result of on_lost(task) is yielded for
+    each of them and the remaining tasks run on a new pool, otherwise BrokenExecutor is raised.
+    Submitted tasks are kept in executor.pending until their results are handed out.
+    """
+    tasks = iter(tasks)
+    pending = executor.pending
+    while True:
+        free = TASKS_PER_WORKER * executor.num_threads - len(pending)
+        for task in itertools.islice(tasks, free):
+            pending[executor.pool.submit(func, task)] = task
+        if not pending:
+            return
+        done, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if on_lost is not None and any(_is_lost(future) for future in done):
+            # a new pool is started when the next task is submitted
+            executor.restart()
+            done = list(pending)
+        for future in done:
+            task = pending.pop(future)
+            if on_lost is not None and _is_lost(future):
+                yield on_lost(task)
+            else:
+                yield future.result()
+
+
+def _is_lost(future):
+    return isinstance(future.exception(), concurrent.futures.BrokenExecutor)
+
+
+def _shutdown(executor):
+    """Cancels the submitted tasks that have not started and waits for the running ones."""
+    # shutdown(cancel_futures=True) is not available before Python 3.9
+    for future in executor.pending:
+        future.cancel()
+    executor.pending.clear()
+    executor.pool.shutdown(wait=True)
+
+
+class SerialExecutor:
+    """Runs tasks one after another in the main process.
+
+    Parameters
+    ----------
+    num_threads : int
+        Not used, all tasks run in the main process.
+    initializer : callable
+        Called once before the first task.
+    initargs : tuple
+        Arguments of initializer.
+    """
+
+    def __init__(self, num_threads=1, initializer=None, initargs=()):
+        self.num_threads = 1
+        if initializer is not None:
+            initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        return False
+
+    def imap_unordered(self, func, tasks, on_lost=None):
+        """Yields the results of func for all tasks in the order of the tasks.
+
+        on_lost is not used, tasks run in the main process and can't be lost.
+        """
+        for task in tasks:
+            yield func(task)
+
+
+class ProcessExecutor:
+    """Runs tasks on a pool of processes.
+
+    Every process gets its own copy of the initializer arguments, results are pickled and sent back.
+    At most TASKS_PER_WORKER tasks per process are handed to the pool at a time. If a process is lost,
+    the pool is replaced by a new one (see imap_unordered).
+
+    Parameters
+    ----------
+    num_threads : int
+        Number of processes.
+    initializer : callable
+        Called once in every process.
+    initargs : tuple
+        Arguments of initializer.
+    """
+
+    def __init__(self, num_threads, initializer=None, initargs=()):
+        self.num_threads = num_threads
+        self.initializer = initializer
+        self.initargs = initargs
+        self.pool = self._create_pool()
+        self.pending = {}
+
+    def _create_pool(self):
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.num_threads,
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        # tasks that have not started yet are dropped, e.g. after a failed task, and the
+        # running ones are finished, at most TASKS_PER_WORKER per process are submitted
+        _shutdown(self)
+        return False
+
+    def restart(self):
+        """Replaces a broken pool, its processes are started with the current initializer arguments."""
+        # waits until all tasks of the broken pool are marked as lost
+        self.pool.shutdown(wait=True)
+        self.pool = self._create_pool()
+
+    def imap_unordered(self, func, tasks, on_lost=None):
+        """Yields the results of func for all tasks as they are completed.
+
+        Parameters
+        ----------
+        func : callable
+            Function that is run for each task in a pool process.
+        tasks : iterable
+            Arguments of func.
+        on_lost : callable
+            Called with each task that was lost together with a process of the pool, its return value
+            is yielded instead of the result. BrokenProcessPool is raised if None.
+        """
+        return _imap_unordered(self, func, tasks, on_lost)
+
+
+class ThreadExecutor:
+    """Runs tasks on a pool of threads in the main process.
+
+    Threads share the initializer arguments without copying them, tasks must not write to shared objects.
+    Tasks only run in parallel on free-threaded Python builds, otherwise the GIL lets one thread run at a time.
+    At most TASKS_PER_WORKER tasks per thread are handed to the pool at a time.
+
+    Parameters
+    ----------
+    num_threads : int
+        Number of threads.
+    initializer : callable
+        Called once before the first task.
+    initargs : tuple
+        Arguments of initializer.
+    """
+
+    def __init__(self, num_threads, initializer=None, initargs=()):
+        self.num_threads = num_threads
+        if initializer is not None:
+            initializer(*initargs)
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=num_threads)
+        self.pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        # tasks that have not started yet are dropped, e.g. after a failed task
+        _shutdown(self)
+        return False
+
+    def imap_unordered(self, func, tasks, on_lost=None):
+        """Yields the results of func for all tasks as they are completed.
+
+        on_lost is not used, threads can't be lost without the main process.
+        """
+        return _imap_unordered(self, func, tasks)
+
+
+def get_executor(name, num_threads, initializer=None, initargs=()):
+    """Creates the executor that runs the tasks of a simulation.
+
+    Parameters
+    ----------
+    name : str
+        Backend of the executor, one of EXECUTORS.
+    num_threads : int
+        Number of processes or threads.
+    initializer : callable
+        Called once before the tasks, in every process for the process backend.
+    initargs : tuple
+        Arguments of initializer.
+
+    Returns
+    -------
+    SerialExecutor, ProcessExecutor or ThreadExecutor
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown.
+    """
+    if name == "serial":
+        return SerialExecutor(num_threads, initializer, initargs)
+    if name == "process":
+        return ProcessExecutor(num_threads, initializer, initargs)
+    if name == "thread":
+        return ThreadExecutor(num_threads, initializer, initargs)
+    raise ValueError(
+        "Unknown executor {}, choose one of {}.".format(name, ", ".join(EXECUTORS))
+    )
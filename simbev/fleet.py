@@ -0,0 +1,223 @@
+import pathlib
+import warnings
+
+import numpy as np
+
+from simbev.helpers import helpers
+
+# vehicle streams of a region use spawn keys (region number, vehicle index), the fleet
+# stream uses an index that no vehicle reaches
+FLEET_STREAM = 2**32
+
+# attributes of one vehicle, drawn before the simulation of its region
+FLEET_DTYPE = np.dtype(
+    [
+        # index of the car type in Region.car_dict
+        ("car_type", np.uint8),
+        ("charging_capacity_slow", np.float64),
+        ("charging_capacity_fast", np.float64),
+        ("work_parking", np.bool_),
+        ("home_parking", np.bool_),
+        ("work_capacity", np.float64),
+        ("home_capacity", np.float64),
+        ("user_group", np.int8),
+        ("home_detached", np.bool_),
+    ]
+)
+# columns of the random numbers of a vehicle
+DRAW_COLUMNS = (
+    "charging_capacity_slow",
+    "charging_capacity_fast",
+    "work_parking",
+    "home_parking",
+    "work_capacity",
+    "home_capacity",
+    "home_detached",
+)
+
+
+def get_car_types(region):
+    """Returns the car type of every vehicle of a region as index in Region.car_dict.
+
+    Vehicles are numbered through all car types of the region, like in SimBEV.run_chunk.
+
+    Parameters
+    ----------
+    region : Region
+        Region of the vehicles.
+
+    Returns
+    -------
+    ndarray
+    """
+    return np.repeat(
+        np.arange(len(region.car_dict), dtype=FLEET_DTYPE["car_type"]),
+        list(region.car_dict.values()),
+    )
+
+
+def get_user_groups(work_parking, home_parking, work_capacity, home_capacity):
+    """Decides on the user groups based on the private charging infrastructure available.
+
+    Works on single vehicles and on arrays of vehicles. A capacity of 0 or None counts as no
+    charging point.
+
+    Parameters
+    ----------
+    work_parking : bool or ndarray
+        Vehicle has a parking spot at work.
+    home_parking : bool or ndarray
+        Vehicle has a parking spot at home.
+    work_capacity : float or ndarray
+        Charging capacity at work.
+    home_capacity : float or ndarray
+        Charging capacity at home.
+
+    Returns
+    -------
+    ndarray
+        0: private charging at home and at work, 1: only at home, 2: only at work, 3: none.
+    """
+    home = np.logical_and(home_parking, np.not_equal(home_capacity, 0))
+    home &= np.not_equal(home_capacity, None)
+    work = np.logical_and(work_parking, np.not_equal(work_capacity, 0))
+    work &= np.not_equal(work_capacity, None)
+    return np.where(home, np.where(work, 0, 1), np.where(work, 2, 3)).astype(
+        FLEET_DTYPE["user_group"]
+    )
+
+
+def _get_capacities(probability_series, random_numbers):
+    # column names end with the capacity, e.g. charging_capacity_slow_11
+    capacities = probability_series.set_axis(
+        [float(str(column).split("_")[-1]) for column in probability_series.index]
+    )
+    return helpers.get_columns_by_random_numbers(capacities, random_numbers)
+
+
+def generate_fleet(simbev, region, rng, start=0, stop=None):
+    """Draws the attributes of the vehicles of a region at once.
+
+    Every vehicle gets one row of random numbers (see DRAW_COLUMNS), the attributes of all
+    vehicles are chosen from them with array operations. A part of the fleet skips the random
+    numbers of the vehicles before it and equals that part of the whole fleet.
+
+    Parameters
+    ----------
+    simbev : SimBEV
+        Scenario with tech data and probabilities.
+    region : Region
+        Region of the vehicles.
+    rng : Generator
+        Random number generator of the fleet at the start of its stream, see SimBEV.get_fleet_rng.
+    start : int
+        Number of the first vehicle.
+    stop : int
+        Number of the vehicle after the last one, all vehicles of the region if None.
+
+    Returns
+    -------
+    ndarray
+        Record array with FLEET_DTYPE, one record per vehicle.
+    """
+    if stop is None:
+        stop = region.car_amount
+    # every random number of the default generator uses one output of its bit generator
+    rng.bit_generator.advance(start * len(DRAW_COLUMNS))
+    fleet = np.zeros(stop - start, dtype=FLEET_DTYPE)
+    draws = rng.random((stop - start, len(DRAW_COLUMNS)))
+    draws = {column: draws[:, i] for i, column in enumerate(DRAW_COLUMNS)}
+    fleet["car_type"] = get_car_types(region)[start:stop]
+
+    tech_data = simbev.tech_data
+    for car_type, car_type_name in enumerate(region.car_dict):
+        vehicles = fleet["car_type"] == car_type
+        for charging_type in ("slow", "fast"):
+            column = f"charging_capacity_{charging_type}"
+            if "max_charging_capacity_slow" in tech_data.columns:
+                fleet[column][vehicles] = tech_data.at[
+                    car_type_name, f"max_charging_capacity_{charging_type}"
+                ]
+            else:
+                # tech data by probability
+                columns = [col for col in tech_data.columns if charging_type in col]
+                fleet[column][vehicles] = _get_capacities(
+                    tech_data.loc[car_type_name, columns], draws[column][vehicles]
+                )
+
+    rs7_type = region.region_type.rs7_type
+    for location in ("work", "home"):
+        parking_probability = getattr(simbev, f"{location}_parking")[rs7_type]
+        parking = parking_probability >= draws[f"{location}_parking"]
+        capacities = _get_capacities(
+            simbev.get_charging_probability(location, use_case=location),
+            draws[f"{location}_capacity"],
+        )
+        fleet[f"{location}_parking"] = parking
+        fleet[f"{location}_capacity"] = np.where(parking, capacities, np.nan)
+
+    fleet["user_group"] = get_user_groups(
+        fleet["work_parking"],
+        fleet["home_parking"],
+        fleet["work_capacity"],
+        fleet["home_capacity"],
+    )
+    fleet["home_detached"] = (
+        draws["home_detached"] <= simbev.probability_detached_home[rs7_type]
+    )
+    return fleet
+
+
+def load_fleet(fleet_path, region):
+    """Loads the stored fleet of a region.
+
+    Parameters
+    ----------
+    fleet_path : pathlib.Path
+        Path of the .npy file.
+    region : Region
+        Region of the fleet.
+
+    Returns
+    -------
+    ndarray
+        Record array with FLEET_DTYPE, None if the file doesn't exist.
+
+    Raises
+    ------
+    ValueError
+        If the stored fleet doesn't have the vehicles of the region.
+    """
+    if not pathlib.Path(fleet_path).is_file():
+        return None
+    fleet = np.load(fleet_path, allow_pickle=False)
+    if fleet.dtype != FLEET_DTYPE or not np.array_equal(
+        fleet["car_type"], get_car_types(region)
+    ):
+        raise ValueError(
+            f"Fleet {fleet_path} doesn't match the vehicles of region {region.id}. "
+            "Delete it to generate the fleet again."
+        )
+    return fleet
+
+
+def store_fleet(fleet_path, fleet):
+    """Stores the fleet of a region.
+
+    The file is written with helpers.write_atomically, a fleet that can't be written only gives a
+    warning.
+
+    Parameters
+    ----------
+    fleet_path : pathlib.Path
+        Path of the .npy file.
+    fleet : ndarray
+        Record array with FLEET_DTYPE.
+    """
+    try:
+        with helpers.write_atomically(fleet_path) as f:
+            np.save(f, fleet)
+    except OSError as e:
+        warnings.warn(
+            f"Fleet could not be stored in {pathlib.Path(fleet_path).parent}: {e}"
+        )
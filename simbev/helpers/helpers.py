@@ -1,11 +1,17 @@
+import contextlib
 import json
+import os
 from pathlib import Path
 import datetime
 from functools import wraps
+import shutil
+import tempfile
 import time
+import numpy as np
 import pandas as pd
 from scipy.interpolate import interp1d
 from simbev import __version__
+from simbev.analysis import AnalysisSummary
 
 
 def date_string_to_datetime(date_str):
@@ -51,6 +57,27 @@ def get_column_by_random_number(probability_series, random_number):
     return probability_series.index[0]
 
 
+def get_columns_by_random_numbers(probability_series, random_numbers):
+    """
+    Chooses a column name for each random number like get_column_by_random_number.
+
+    Parameters
+    ----------
+    probability_series : Series
+        Contains probabilities for charging power.
+    random_numbers : ndarray
+        Random numbers.
+
+    Returns
+    -------
+    ndarray
+    """
+    cumulative = (probability_series / probability_series.sum()).cumsum().to_numpy()
+    cumulative[-1] = 1
+    positions = np.searchsorted(cumulative, random_numbers, side="right")
+    return probability_series.index.to_numpy()[positions]
+
+
 def export_metadata(simbev, config):
     """Export metadata of run to JSON file in result's root directory
 
@@ -87,18 +114,42 @@ def export_metadata(simbev, config):
         "car_sum": cars.sum().to_dict(),
         "car_amounts": cars.to_dict(orient="index"),
     }
+    if simbev.shard is not None:
+        # needed to merge the results of all shards
+        meta_dict["shard"] = {
+            "index": simbev.shard[0],
+            "count": simbev.shard[1],
+            "regions": [[region.number, str(region.id)] for region in simbev.regions],
+        }
     outfile = Path(simbev.save_directory, "metadata_simbev_run.json")
     with open(outfile, "w") as f:
         json.dump(meta_dict, f, indent=4)
 
 
+def get_share(count, total):
+    """Returns the share of count in total rounded to 4 digits, None (null in json) if total is 0.
+
+    Parameters
+    ----------
+    count : float
+    total : float
+
+    Returns
+    -------
+    float
+    """
+    if not total:
+        return None
+    return round(count / total, 4)
+
+
 def export_analysis(analysis_array, directory, start_date, end_date, region_id):
     """Generates csv and json file for analysis of simulation-output.
 
     Parameters
     ---------
     analysis_array: ndarray
-        Contains Data for analysis of characteristic values.
+        Contains Data for analysis of characteristic values, one record (ANALYSIS_DTYPE) per vehicle.
     directory: WindowsPath
         Directory for saving files.
     start_date: datetime
@@ -107,6 +158,11 @@ def export_analysis(analysis_array, directory, start_date, end_date, region_id):
         End of simulation.
     region_id: str
         Identifier of region.
+
+    Returns
+    -------
+    AnalysisSummary
+        Summary of the analysis of the region, to be merged into the national summary.
     """
 
     vehicle_array = [
@@ -128,154 +184,144 @@ def export_analysis(analysis_array, directory, start_date, end_date, region_id):
         "distance_hpc",
     ]
 
+    pd.DataFrame(analysis_array).to_csv(
+        Path(directory, "analysis.csv"), index=False, na_rep="nan"
+    )
+
+    # extract further analysis data and save it in json-format.
+    summary = AnalysisSummary.from_records(analysis_array)
+
+    start_date = start_date.date()
+    number_of_days = end_date - start_date
+    number_of_days = number_of_days.days + 1
+
+    private_count = summary.sum("private_count")
+    public_count = summary.sum("public_count")
     analysis_mid_dict = {
-        "average_drive_time": float,
-        "average_distance": float,
-        "average_trip_count": int,
+        # general
+        "average_drive_time": round(summary.mean("average_driving_time"), 4),
+        "average_distance": round(summary.mean("average_distance"), 4),
+        "average_trip_count": round(summary.mean("drive_count") / number_of_days, 4),
+        # by car-type: trip count by day, average drive time and distance by trip
         "by_car_type": {
             "average_trip_count": {
-                "bev_mini": float,
-                "bev_medium": float,
-                "bev_luxury": float,
-                "phev_mini": float,
-                "phev_medium": float,
-                "phev_luxury": float,
+                vehicle: round(summary.mean("drive_count", vehicle) / number_of_days, 4)
+                for vehicle in vehicle_array
             },
             "average_drive_time": {
-                "bev_mini": float,
-                "bev_medium": float,
-                "bev_luxury": float,
-                "phev_mini": float,
-                "phev_medium": float,
-                "phev_luxury": float,
+                vehicle: round(summary.mean("average_driving_time", vehicle), 4)
+                for vehicle in vehicle_array
             },
             "average_distance": {
-                "bev_mini": float,
-                "bev_medium": float,
-                "bev_luxury": float,
-                "phev_mini": float,
-                "phev_medium": float,
-                "phev_luxury": float,
+                vehicle: round(summary.mean("average_distance", vehicle), 4)
+                for vehicle in vehicle_array
             },
         },
         "by_destination": {
             "average_distance": {
-                "distance_home": float,
-                "distance_work": float,
-                "distance_business": float,
-                "distance_school": float,
-                "distance_shopping": float,
-                "distance_private": float,
-                "distance_leisure": float,
-                "distance_hpc": float,
+                destination: round(summary.mean(destination), 4)
+                for destination in destination_array
             }
         },
+        # regions without charging events have no shares
+        "charging_event_share_private": get_share(
+            private_count, private_count + public_count
+        ),
+        "charging_event_share_public": get_share(
+            public_count, private_count + public_count
+        ),
     }
-    df = pd.DataFrame(
-        analysis_array,
-        columns=[
-            "car_type",
-            "drive_count",
-            "drive_max_length",
-            "drive_min_length",
-            "drive_mean_length",
-            "drive_max_consumption",
-            "drive_min_consumption",
-            "drive_mean_consumption",
-            "average_driving_time",
-            "average_distance",
-            "distance_home",
-            "distance_work",
-            "distance_business",
-            "distance_school",
-            "distance_shopping",
-            "distance_private",
-            "distance_leisure",
-            "distance_hpc",
-            "distance_cumulated",
-            "charge_count",
-            "hpc_count",
-            "charge_max_length",
-            "charge_min_length",
-            "charge_mean_length",
-            "charge_max_energy",
-            "charge_min_energy",
-            "charge_mean_energy",
-            "hpc_mean_energy",
-            "home_mean_energy",
-            "work_mean_energy",
-            "public_mean_energy",
-            "public_count",
-            "private_count",
-        ],
-    )
 
-    df.to_csv(Path(directory, "analysis.csv"), index=False)
+    # save json-file
+    with open(
+        Path(directory, "analysis_mid_{}.json".format(region_id)), "w"
+    ) as outfile:
+        json.dump(analysis_mid_dict, outfile, indent=4, sort_keys=False)
 
-    # extract further analysis data and save it in json-format.
-    array_to_numeric = [
-        "drive_count",
-        "average_driving_time",
-        "average_distance",
-        "private_count",
-        "public_count",
-    ]
-    a = array_to_numeric + destination_array
-    for item in a:
-        df[item] = df[item].replace("nan", "-1")
-        df[item] = pd.to_numeric(df[[item]].squeeze())
+    return summary
 
-    start_date = start_date.date()
-    number_of_days = end_date - start_date
-    number_of_days = number_of_days.days + 1
 
-    # general
-    analysis_mid_dict["average_trip_count"] = round(
-        df["drive_count"].mean() / number_of_days, 4
-    )
-    analysis_mid_dict["average_drive_time"] = round(
-        df["average_driving_time"].mean(), 4
-    )
-    analysis_mid_dict["average_distance"] = round(df["average_distance"].mean(), 4)
+def export_analysis_all_regions(
+    region_files, summary, analysis_path, json_path, start_date, end_date
+):
+    """Generates csv and json file for analysis of all regions.
 
-    analysis_mid_dict["charging_event_share_private"] = round(
-        df[["private_count"]].sum().iloc[0]
-        / (df[["private_count"]].sum().iloc[0] + df[["public_count"]].sum()).iloc[0],
-        4,
-    )
-    analysis_mid_dict["charging_event_share_public"] = round(
-        df[["public_count"]].sum().iloc[0]
-        / (df[["private_count"]].sum().iloc[0] + df[["public_count"]].sum()).iloc[0],
-        4,
-    )
+    Parameters
+    ----------
+    region_files : list
+        Analysis csv files of the regions, in region order.
+    summary : AnalysisSummary
+        Merged analysis summary of all regions.
+    analysis_path : Path
+        Path of the csv file with the vehicles of all regions.
+    json_path : Path
+        Path of the json file.
+    start_date : date
+        Start of simulation output (without the first week).
+    end_date : date
+        End of simulation.
+    """
+    number_of_days = (end_date - start_date).days + 1
+    # vehicle records are copied from the region files instead of being kept in memory
+    with open(analysis_path, "w") as outfile:
+        header_written = False
+        for region_file in region_files:
+            if not Path(region_file).is_file():
+                continue
+            with open(region_file) as infile:
+                header = infile.readline()
+                if not header_written:
+                    outfile.write(header)
+                    header_written = True
+                shutil.copyfileobj(infile, outfile)
+
+    # get share of private and public charging events and save in .json.
+    private_sum = summary.sum("private_count")
+    public_sum = summary.sum("public_count")
+    drive_sum = summary.sum("drive_count")
+    distance_sum = summary.sum("distance_cumulated")
+    vehicle_count = summary.vehicle_count
+    share_dict = {
+        "share_private": get_share(private_sum, private_sum + public_sum),
+        "share_public": get_share(public_sum, private_sum + public_sum),
+        "trips_a_day": drive_sum / vehicle_count / number_of_days,
+        "average_distance_per_trip:": round(distance_sum / drive_sum, 4),
+        "average_distance_per_day": round(
+            distance_sum / vehicle_count / number_of_days, 4
+        ),
+    }
 
-    # by car-type
-    # trip count by day
-    for vehicle in vehicle_array:
-        analysis_mid_dict["by_car_type"]["average_trip_count"][vehicle] = round(
-            df["drive_count"].loc[df["car_type"] == vehicle].mean() / number_of_days, 4
-        )
-    # average drive time by trip
-    for vehicle in vehicle_array:
-        analysis_mid_dict["by_car_type"]["average_drive_time"][vehicle] = round(
-            df["average_driving_time"].loc[df["car_type"] == vehicle].mean(), 4
-        )
-    # average distance by trip
-    for vehicle in vehicle_array:
-        analysis_mid_dict["by_car_type"]["average_distance"][vehicle] = round(
-            df["average_distance"].loc[df["car_type"] == vehicle].mean(), 4
-        )
-    # by destination
-    for destination in destination_array:
-        analysis_mid_dict["by_destination"]["average_distance"][destination] = round(
-            df[destination].loc[df[destination] != (-1)].mean(), 4
-        )
+    with open(json_path, "w") as outfile:
+        json.dump(share_dict, outfile, indent=4, sort_keys=False)
 
-    # save json-file
-    with open(
-        Path(directory, "analysis_mid_{}.json".format(region_id)), "w"
-    ) as outfile:
-        json.dump(analysis_mid_dict, outfile, indent=4, sort_keys=False)
+
+def export_grid_timeseries_all_regions(grid_time_series, template, timestamps, path):
+    """Exports the summed grid time series of all regions to a csv file.
+
+    Parameters
+    ----------
+    grid_time_series : ndarray
+        Sum of the grid time series of all regions, without the timestamp column.
+    template : DataFrame
+        Empty grid time series of a region, gives columns and data types.
+    timestamps : ndarray
+        Timestamps of the grid time series.
+    path : Path
+        Path of the csv file.
+
+    Returns
+    -------
+    DataFrame
+        Grid time series of all regions.
+    """
+    columns = template.columns.drop("timestamp")
+    grid_ts_collection = pd.DataFrame(grid_time_series, columns=columns).astype(
+        template[columns].dtypes.to_dict()
+    )
+    grid_ts_collection.insert(0, "timestamp", timestamps)
+    grid_ts_collection = grid_ts_collection.round(4)
+    grid_ts_collection.to_csv(path, index=False)
+    return grid_ts_collection
 
 
 def timeitlog(timing, save_directory):
@@ -315,6 +361,38 @@ def timeitlog(timing, save_directory):
     return decorator
 
 
+@contextlib.contextmanager
+def write_atomically(path):
+    """Opens a temporary file that replaces the file at path once it is written.
+
+    The temporary file is created next to path and renamed, so runs that share a directory never
+    read an incomplete file. It is removed if writing fails.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path of the file.
+
+    Yields
+    ------
+    file
+        Temporary file, opened for writing in binary mode.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False)
+    try:
+        with f:
+            yield f
+        # readable for other users of a shared directory
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(f.name)
+        raise
+
+
 def interpolate_charging_curve(x, y):
     """Cubic interpolation between x and y.
 
@@ -1,5 +1,3 @@
-import random
-import math
 import datetime
 from pathlib import Path
 
@@ -105,11 +103,61 @@ def get_name_csv(region, season, data_directory):
     return Path(data_directory, region, season + ".csv")
 
 
+def read_week_data(region, season, data_directory):
+    """Reads the weekly MiD-data of a season.
+
+    Parameters
+    ----------
+    region : str
+        Region.
+    season : str
+        Season of the data.
+    data_directory : pathlib.Path
+        Path to probability data directory
+
+    Returns
+    -------
+    DataFrame
+        Trips started by usecase for each minute of a week, starting on Monday 0:00.
+    """
+    file_name = get_name_csv(region, season, data_directory)
+    return pd.read_csv(file_name, sep=";", decimal=",", usecols=range(1, 8))
+
+
+def get_week_template(data_df, stepsize):
+    """Resamples the weekly MiD-data of a season to the step size.
+
+    Parameters
+    ----------
+    data_df : DataFrame
+        Weekly MiD-data as returned by read_week_data.
+    stepsize : int
+        Stepsize of simulation.
+
+    Returns
+    -------
+    ndarray
+        Trips started by usecase for each time step of a week, starting on Monday 0:00.
+    """
+    # any Monday, bins start at midnight like the bins of the simulation days
+    index = pd.date_range("2018-01-01", periods=len(data_df.index), freq="min")
+    data_df = data_df.set_axis(index)
+    return data_df.resample(datetime.timedelta(minutes=stepsize)).sum().to_numpy()
+
+
 # main function, returns pandas
 def get_timeseries(
-    start: datetime.date, end: datetime.date, region, stepsize, data_directory
+    start: datetime.date,
+    end: datetime.date,
+    region,
+    stepsize,
+    data_directory,
+    week_data=None,
 ):
-    """
+    """Builds the time series of trip starts for the simulation timeframe.
+
+    The weekly data of each season is resampled once and then repeated for every day of the
+    season, each day gets the data of its weekday.
 
     Parameters
     ----------
@@ -123,85 +171,47 @@ def get_timeseries(
         Stepsize of simulation.
     data_directory : pathlib.Path
         Path to probability data directory
+    week_data : dict, optional
+        Weekly MiD-data by season, e.g. from a bundle. Read from data_directory if not given.
 
     Returns
     -------
     pd_result : DataFrame
         Timeseries of processed MiD-data, that includes amount of trips started by usecase and time.
-    """
 
-    # build a matrix containing information about each season during the time span
-    weekdays = 7
+    Raises
+    ------
+    ValueError
+        If the stepsize doesn't divide a day.
+    """
     min_per_day = 1440
-    # set up variables
-    pd_result = pd.DataFrame()
-    weekdays_left = weekdays - start.weekday()
-    # weeklist: 0 - season, 1 - weeks, 2 - days, 3 - start date, 4 - end date
-    weeklist = []
-    # build a matrix containing information about each season during the time span
-    while start < end:
-        cutoff = get_cutoff(start)
-        if cutoff < end:  # use the whole season
-            delta = cutoff - start
-            weeklist.append(
-                [
-                    get_season(start),
-                    math.floor(delta.days / 7),
-                    delta.days % 7,
-                    start,
-                    cutoff,
-                ]
-            )
-        else:  # end date is during this season
-            delta = end - start + datetime.timedelta(1)
-            weeklist.append(
-                [
-                    get_season(start),
-                    math.floor(delta.days / 7),
-                    delta.days % 7,
-                    start,
-                    end + datetime.timedelta(1),
-                ]
-            )
-        start = cutoff
-
-    # iteration over the created matrix. uses weeklist information to create time series dataframe
-    for current_season in weeklist:
-        file_name = get_name_csv(region, current_season[0], data_directory)
-        data_df = pd.read_csv(file_name, sep=";", decimal=",", usecols=range(1, 8))
-        temp = pd.DataFrame()
-        # check if weekdays are left over from last month, add to start of series
-        if weekdays_left < weekdays:
-            if current_season[2] < weekdays_left and current_season[1] == 0:
-                temp = pd.concat([temp, data_df.tail(current_season[2] * min_per_day)])
-                current_season[2] = 0
-            else:
-                temp = pd.concat([temp, data_df.tail(weekdays_left * min_per_day)])
-                if current_season[2] < weekdays_left:
-                    current_season[2] = current_season[2] - weekdays_left + 7
-                    current_season[1] = current_season[1] - 1
-                else:
-                    current_season[2] = current_season[2] - weekdays_left
-        # add full weeks to the series
-        for _ in range(0, current_season[1]):
-            temp = pd.concat([temp, data_df], ignore_index=True)
-        # add leftover partial week at the end of series
-        temp = pd.concat(
-            [temp, data_df.head(current_season[2] * min_per_day)], ignore_index=True
-        )
-
-        date_rng = pd.date_range(
-            current_season[3], current_season[4], freq="min", inclusive="left"
-        )
-
-        # date = pd.DatetimeIndex(date_rng)
-        # day_key = date.day_name()
-
-        temp.index = date_rng
-        temp = temp.resample(datetime.timedelta(minutes=stepsize)).sum()
-        pd_result = pd.concat([pd_result, temp])
-        weekdays_left = weekdays - current_season[2]
+    if min_per_day % stepsize:
+        raise ValueError(f"Stepsize of {stepsize} min doesn't divide a day.")
+    steps_per_day = min_per_day // stepsize
+
+    days = pd.date_range(start, end, freq="D")
+    seasons = [get_season(day) for day in days]
+    season_names = list(dict.fromkeys(seasons))
+    if week_data is None:
+        week_data = {
+            season: read_week_data(region, season, data_directory)
+            for season in season_names
+        }
+    templates = np.stack(
+        [get_week_template(week_data[season], stepsize) for season in season_names]
+    )
 
+    # row of each time step in the template of its season
+    season_idx = np.array([season_names.index(season) for season in seasons])
+    rows = (days.weekday.to_numpy() * steps_per_day)[:, np.newaxis] + np.arange(
+        steps_per_day
+    )
+    values = templates[season_idx[:, np.newaxis], rows].reshape(-1, templates.shape[2])
+
+    date_rng = pd.date_range(
+        start, periods=len(values), freq=datetime.timedelta(minutes=stepsize)
+    )
+    pd_result = pd.DataFrame(values, index=date_rng)
     pd_result.columns = [
         "work",
         "business",
@@ -221,81 +231,3 @@ def get_empty_timeseries(start_date, end_date, step_size):
         start_date, end_date, freq=f"{step_size}min", inclusive="left"
     )
     return pd.DataFrame([0] * len(date_range), index=date_range)
-
-
-def get_profile_time_series(start_date, end_date, step_size, df):
-    """
-    Returns a time series starting from the start date up until the end date filled with
-    week data chosen at random from the input DataFrame for each week.
-
-    Parameters
-    ----------
-    start_date : str or datetime
-        The start date of the time series in yyyy-mm-dd format.
-    end_date : str or datetime
-        The end date of the time series in yyyy-mm-dd format.
-    step_size : int
-        Step size of the simulation in minutes.
-    df : pd.DataFrame
-        The input DataFrame containing week data, where each entry with the same ID belongs to the same week.
-
-    Returns
-    -------
-    pandas DataFrame
-        The resulting time series.
-    """
-    # Convert start and end dates to datetime if needed
-    if not isinstance(start_date, pd.Timestamp):
-        start_date = pd.to_datetime(start_date)
-    if not isinstance(end_date, pd.Timestamp):
-        end_date = pd.to_datetime(end_date)
-
-    df["time_step"] = 0
-    # Create an empty DataFrame to hold the time series
-    time_series = pd.DataFrame(columns=df.columns)
-    ids = df["id"].unique()
-    # Loop through each week between the start and end dates
-    week_start = start_date
-    time_step = 0
-    steps_per_day = 1440 / step_size
-    while week_start <= end_date:
-        # Select a random ID from the input DataFrame
-
-        random_id = random.choice(ids)
-
-        # Get the week data for the chosen ID
-        week_data = df[df["id"] == random_id]
-
-        # Determine the end date for the current week
-        num_days = 7 - week_start.weekday()
-        week_end = week_start + pd.Timedelta(days=num_days - 1)
-
-        # If the week end date is beyond the end date of the time series, adjust it accordingly
-        week_end = min(week_end, end_date)
-
-        # Get the data for this week that falls within the desired date range
-        week_data_filtered = week_data[
-            (week_data["day"] >= (week_start.weekday()))
-            & (week_data["day"] <= (week_end.weekday()))
-        ].copy()
-        if not week_data_filtered.empty:
-            week_data_filtered["time_step"] = (
-                time_step
-                + (week_data_filtered["departure_time"] / step_size)
-                + (week_data_filtered["day"] - week_start.weekday()) * steps_per_day
-            )
-            week_data_filtered["time_step"] = week_data_filtered["time_step"].apply(
-                np.floor
-            )
-
-            # Append the filtered week data to the time series
-            time_series = pd.concat([time_series, week_data_filtered])
-
-        # Move to the next week
-        week_start = week_end + pd.Timedelta(days=1)
-
-        time_step += num_days * steps_per_day
-
-        time_series = time_series.reset_index(drop=True)
-
-    return time_series
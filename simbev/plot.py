@@ -1,5 +1,5 @@
-def plot_gridtimeseries_by_usecase(simbev, grid_timeseries_all):
-    """Create grid timeseries plots split by use case."""
+def _plot_use_cases(simbev, grid_timeseries, figname):
+    """Create a plot of the grid timeseries split by use case."""
     import plotly.express as px
 
     plot_list = [
@@ -22,17 +22,19 @@ def plot_gridtimeseries_by_usecase(simbev, grid_timeseries_all):
     ]
     y_title = "P in kW"
 
-    if simbev.output_options["region_plot"]:
-        for idx, data in enumerate(simbev.grid_data_list):
-            df_results = data.set_index("timestamp")
-            figname = "grid-time-series region {}".format(idx + 1)
-            fig = px.line(df_results[plot_list], title=figname, labels=label_list)
-            fig.update_layout(yaxis_title=y_title)
-            fig.write_html("{}/{}.html".format(simbev.save_directory, figname))
+    df_results = grid_timeseries.set_index("timestamp")
+    fig = px.line(df_results[plot_list], title=figname, labels=label_list)
+    fig.update_layout(yaxis_title=y_title)
+    fig.write_html("{}/{}.html".format(simbev.save_directory, figname))
+
+
+def plot_region_gridtimeseries(simbev, region_number, grid_timeseries):
+    """Create grid timeseries plot of a region split by use case."""
+    _plot_use_cases(
+        simbev, grid_timeseries, "grid-time-series region {}".format(region_number + 1)
+    )
 
-    if simbev.output_options["collective_plot"]:
-        df_results = grid_timeseries_all.set_index("timestamp")
-        figname = "grid-time-series all regions"
-        fig = px.line(df_results[plot_list], title=figname, labels=label_list)
-        fig.update_layout(yaxis_title=y_title)
-        fig.write_html("{}/{}.html".format(simbev.save_directory, figname))
+
+def plot_gridtimeseries_by_usecase(simbev, grid_timeseries_all):
+    """Create grid timeseries plot of all regions split by use case."""
+    _plot_use_cases(simbev, grid_timeseries_all, "grid-time-series all regions")
@@ -1,10 +1,13 @@
+from dataclasses import dataclass
 import pathlib
 
 import pandas as pd
 import numpy as np
 
 from simbev.mid_timeseries import get_timeseries, get_empty_timeseries
+from simbev import timeseries_cache
 from simbev.helpers import helpers
+from simbev.event_log import GridIntervalLog
 
 
 class RegionType:
@@ -54,20 +57,53 @@ class RegionType:
         Parameters
         ----------
         simbev : SimBEV object
-            Used attributes are start_date, end_date, step_size and the input_directory.
+            Used attributes are start_date, end_date, step_size, the input_directory, the
+            cache_directory and the bundle, time series of probability input are read from the
+            cache if possible.
         """
 
         if not self.time_series:
             if simbev.input_type == "probability":
+                cached = None
+                if simbev.cache_directory is not None:
+                    cache_key = timeseries_cache.get_cache_key(
+                        self.rs7_type,
+                        simbev.start_date,
+                        simbev.end_date,
+                        simbev.step_size,
+                        simbev.input_directory,
+                    )
+                    cached = timeseries_cache.load_timeseries(
+                        simbev.cache_directory, self.rs7_type, cache_key
+                    )
+                if cached is not None:
+                    self.time_series, self.trip_starts = cached
+                    return
+
+                week_data = None
+                if (
+                    simbev.bundle is not None
+                    and self.rs7_type in simbev.bundle.region_types
+                ):
+                    week_data = simbev.bundle.get_week_data(self.rs7_type)
                 self.time_series = get_timeseries(
                     simbev.start_date,
                     simbev.end_date,
                     self.rs7_type,
                     simbev.step_size,
                     simbev.input_directory,
+                    week_data,
                 )
                 self.trip_starts = self.time_series.sum(axis=1)
                 self.trip_starts = self.trip_starts / self.trip_starts.max()
+                if simbev.cache_directory is not None:
+                    timeseries_cache.store_timeseries(
+                        simbev.cache_directory,
+                        self.rs7_type,
+                        cache_key,
+                        self.time_series,
+                        self.trip_starts,
+                    )
             else:
                 self.time_series = get_empty_timeseries(
                     simbev.start_date,
@@ -109,6 +145,68 @@ class RegionType:
                     self.probabilities[key][purpose_key] = df
 
 
+@dataclass
+class RegionChunk:
+    """Results of a chunk of the vehicles of a region.
+
+    Parameters
+    ----------
+    region_number : int
+        Counter of the region.
+    start : int
+        Number of the first vehicle of the chunk.
+    stop : int
+        Number of the vehicle after the last one of the chunk.
+    grid_time_series : ndarray
+        Unrounded grid time series of the vehicles, None if there is no grid output.
+    analysis : ndarray
+        Analysis records (ANALYSIS_DTYPE) of the vehicles, None if the simulation is not analyzed.
+    exception_count : int
+        Number of vehicles that couldn't run private only.
+    public_count : int
+        Number of vehicles without private charging.
+    duration : float
+        CPU time in seconds of the thread that simulated the chunk.
+    """
+
+    region_number: int
+    start: int
+    stop: int
+    grid_time_series: np.ndarray
+    analysis: np.ndarray
+    exception_count: int
+    public_count: int
+    duration: float = 0.0
+
+
+@dataclass
+class ChunkFailure:
+    """Exception that occurred while a chunk of the vehicles of a region was simulated.
+
+    Parameters
+    ----------
+    region_number : int
+        Counter of the region.
+    start : int
+        Number of the first vehicle of the chunk.
+    stop : int
+        Number of the vehicle after the last one of the chunk.
+    error : str
+        Type and message of the exception.
+    traceback : str
+        Formatted traceback of the exception.
+    process_lost : bool
+        The chunk was lost together with its pool process, e.g. killed by the out-of-memory killer.
+    """
+
+    region_number: int
+    start: int
+    stop: int
+    error: str
+    traceback: str
+    process_lost: bool = False
+
+
 class Region:
     """
     Class that contains information and methods related to the region.
@@ -134,12 +232,20 @@ class Region:
         Distribution of car-types.
     file_name : str
         Name of csv-file for grid timeseries of specific region.
-    grid_data_frame : list
+    grid_data_frame : DataFrame
         Summarized time-series for whole region.
+    grid_intervals : GridIntervalLog
+        Charging intervals that are summed up to the grid time series. Only allocated while the region is simulated.
     grid_time_series : ndarray
         Summarized time-series for whole region.
     header_grid_ts : list
         Header of grid-time-series.
+    occupancy_columns : dict
+        Column of grid-time-series for occupied charging points by use case and power.
+    use_case_columns : dict
+        Column of grid-time-series for the total power by use case.
+    total_power_column : int
+        Column of grid-time-series for the total power.
     id : str
         Identifier of region.
     last_time_step : int
@@ -162,16 +268,18 @@ class Region:
         self.car_dict = {}
 
         self.header_grid_ts = []
-        self.grid_time_series = []
-        self.grid_data_frame = []
+        self.total_power_column = None
+        self.use_case_columns = {}
+        self.occupancy_columns = {}
+        self.grid_intervals = None
+        self.grid_time_series = None
+        self.grid_data_frame = None
         self.car_dict = car_dict
         self.analyze_array = None
         self.scaling = scaling
 
         self.file_name = "{}_grid_time_series_{}.csv".format(self.number, self.id)
 
-        self.create_grid_timeseries()
-
     @property
     def car_amount(self):
         """Returns number of vehicles
@@ -183,62 +291,121 @@ class Region:
         """
         return sum(self.car_dict.values())
 
-    def update_grid_timeseries(
-        self,
-        use_case,
-        chargepower,
-        power_lis,
-        timestep_start,
-        timestep_end,
-        i,
-        park_ts_end,
-        car_type,
-    ):
-        """Writes values in grid-time-series
+    def update_grid_timeseries(self, charging_log, car_type):
+        """Collects the charged time steps of a vehicle as intervals of the grid time series.
 
         Parameters
         ----------
-        use_case : str
-            Use-case of event.
-        chargepower : float
-            Average power of charging-event.
-        power_lis : float
-            Maximum power of charging-point.
-        timestep_start : int
-            Start of event.
-        timestep_end : int
-            End of event.
-        i : int
-            Counter for steps in charging curve.
-        park_ts_end : int
-            End of parking-time.
+        charging_log : ChargingLog
+            Charged time steps of the vehicle.
         car_type : str
             Type of car (BEV/PHEV and Segment).
         """
 
-        # distribute power to use cases dependent on power
-        if self.region_type.output:
-            code = "cars_{}_{}".format(use_case, power_lis)
-            if code in self.header_grid_ts:
-                column = self.header_grid_ts.index(code)
-                if i == 0:
-                    self.grid_time_series[
-                        timestep_start:park_ts_end, column
-                    ] += np.float32(1 * self.scaling[car_type])
+        if self.region_type.output and len(charging_log):
+            scaling = self.scaling[car_type]
+            start = charging_log["start"]
+            end = charging_log["end"]
+            chargepower = (
+                charging_log["chargepower_timestep"].astype(np.float64) * scaling
+            )
+
+            # occupied charging points by use case and power, from first charged step until end of parking
+            occupancy_column = charging_log["occupancy_column"]
+            occupied = (charging_log["time"] == 0) & (occupancy_column >= 0)
             # distribute to use cases total
-            code_uc_ges = "{}_total_power".format(use_case)
-            if code_uc_ges in self.header_grid_ts:
-                column = self.header_grid_ts.index(code_uc_ges)
-                self.grid_time_series[
-                    timestep_start:timestep_end, column
-                ] += np.float32(chargepower * self.scaling[car_type])
-
-            # add to total amount
-            column = self.header_grid_ts.index("total_power")
-            self.grid_time_series[timestep_start:timestep_end, column] += np.float32(
-                chargepower * self.scaling[car_type]
+            use_case_column = charging_log["use_case_column"]
+            by_use_case = use_case_column >= 0
+            total = np.full(len(charging_log), self.total_power_column)
+
+            self.grid_intervals.extend(
+                np.concatenate(
+                    (occupancy_column[occupied], use_case_column[by_use_case], total)
+                ),
+                np.concatenate((start[occupied], start[by_use_case], start)),
+                np.concatenate(
+                    (
+                        charging_log["park_ts_end"][occupied],
+                        end[by_use_case],
+                        end,
+                    )
+                ),
+                np.concatenate(
+                    (
+                        np.full(np.count_nonzero(occupied), scaling),
+                        chargepower[by_use_case],
+                        chargepower,
+                    )
+                ),
             )
 
+    def get_grid_columns(self, use_case, power):
+        """Returns the grid time series columns a charging event counts to.
+
+        Parameters
+        ----------
+        use_case : str
+            Charging use case of event.
+        power : float
+            Maximum power of charging-point.
+
+        Returns
+        -------
+        tuple[int, int]
+            Columns of occupied charging points and of the use case total power, -1 if there is no such column.
+        """
+        return (
+            self.occupancy_columns.get((use_case, float(power)), -1),
+            self.use_case_columns.get(use_case, -1),
+        )
+
+    def accumulate_grid_timeseries(self):
+        """Sums up the collected charging intervals to the grid time series.
+
+        Each interval adds its value at its start and subtracts it at its end in a difference array,
+        a cumulative sum over time then gives the time series.
+
+        Returns
+        -------
+        ndarray
+            Unrounded grid time series (time steps x columns), partial results can be added up.
+        """
+        time_steps = len(self.region_type.time_series.index)
+        column_count = len(self.header_grid_ts)
+        intervals = self.grid_intervals
+        columns = intervals["column"]
+        starts = intervals["start"].astype(np.int64)
+        ends = np.minimum(intervals["end"], time_steps).astype(np.int64)
+        values = intervals["value"]
+
+        # intervals outside of the time range or without length don't contribute
+        valid = (starts < ends) & (starts >= 0)
+        columns, starts, ends, values = (
+            columns[valid],
+            starts[valid],
+            ends[valid],
+            values[valid],
+        )
+
+        size = (time_steps + 1) * column_count
+        difference = np.bincount(
+            starts * column_count + columns, weights=values, minlength=size
+        ) - np.bincount(ends * column_count + columns, weights=values, minlength=size)
+        difference = difference.reshape(time_steps + 1, column_count)[:time_steps]
+        return np.cumsum(difference, axis=0)
+
+    def set_grid_timeseries(self, grid_time_series):
+        """Stores the grid time series of the region.
+
+        Parameters
+        ----------
+        grid_time_series : ndarray
+            Unrounded grid time series, e.g. the sum of the partial time series of all chunks of the region.
+        """
+        # remove floating point residue of added and subtracted values, also turns -0.0 into 0.0
+        grid_time_series = np.round(grid_time_series, 6) + 0.0
+        self.grid_time_series = grid_time_series.astype(np.float32)
+
     def get_purpose(self, rng, time_step):
         """Determinants purpose of trip.
 
@@ -290,15 +457,16 @@ class Region:
         return prob.iat[0, -1]
 
     def create_grid_timeseries(self):
-        """Constructs grid-time-series"""
+        """Constructs header and column lookups of the grid-time-series and the buffer for its charging intervals.
+
+        Called when the region gets simulated, so only regions that are simulated in a process hold grid data.
+        """
         header_slow = list(self.region_type.charging_probabilities["slow"].columns)
         header_fast = list(self.region_type.charging_probabilities["fast"].columns)
         if "0" in header_slow:
             header_slow.remove("0")
         if "0" in header_fast:
             header_fast.remove("0")
-        time_series = self.region_type.time_series
-        time_stamps = np.array(time_series.index.to_pydatetime())
         self.header_grid_ts = ["timestep", "timestamp", "total_power"]
         use_cases = [
             "home_detached",
@@ -309,19 +477,23 @@ class Region:
             "urban_fast",
             "highway_fast",
         ]
+        self.total_power_column = self.header_grid_ts.index("total_power")
+        self.use_case_columns = {}
+        self.occupancy_columns = {}
         for uc in use_cases:
+            self.use_case_columns[uc] = len(self.header_grid_ts)
             self.header_grid_ts.append("{}_total_power".format(uc))
-            if uc in ("home_detached", "home_apartment", "work", "retail", "street"):
-                for power in header_slow:
-                    self.header_grid_ts.append("cars_{}_{}".format(uc, power))
-
-            if "_fast" in uc:
-                for power in header_fast:
-                    self.header_grid_ts.append("cars_{}_{}".format(uc, power))
-
-        self.grid_time_series = np.float32(
-            np.zeros((len(time_stamps), len(self.header_grid_ts)))
-        )
+            powers = header_fast if "_fast" in uc else header_slow
+            for power in powers:
+                self.occupancy_columns[(uc, float(power))] = len(self.header_grid_ts)
+                self.header_grid_ts.append("cars_{}_{}".format(uc, power))
+        self.grid_intervals = GridIntervalLog()
+
+    def release_grid_timeseries(self):
+        """Releases the grid data of the region after its results have been handed on."""
+        self.grid_intervals = None
+        self.grid_time_series = None
+        self.grid_data_frame = None
 
     def export_grid_timeseries(self, region_directory):
         """
@@ -333,6 +505,8 @@ class Region:
             Save-directory for the region.
         """
         if self.region_type.output:
+            if self.grid_time_series is None:
+                self.set_grid_timeseries(self.accumulate_grid_timeseries())
             data = pd.DataFrame(self.grid_time_series)
             data.columns = self.header_grid_ts
             data["timestamp"] = self.region_type.time_series.index
@@ -351,6 +525,9 @@ class Region:
             self.grid_data_frame.to_csv(
                 pathlib.Path(region_directory, self.file_name), index=False
             )
+            # intervals and matrix are not needed anymore once the data frame is written
+            self.grid_intervals = None
+            self.grid_time_series = None
 
 
 def _get_rs3_type(rs7_type):
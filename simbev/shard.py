@@ -0,0 +1,277 @@
+import datetime
+import json
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from simbev.analysis import ANALYSIS_DTYPE, AnalysisSummary
+from simbev.helpers import helpers
+
+METADATA_FILE = "metadata_simbev_run.json"
+FAILURE_REPORT_FILE = "failed_regions.json"
+
+
+def parse_shard(shard):
+    """Parses a shard given as "i/n" on the command line.
+
+    Parameters
+    ----------
+    shard : str
+        Number of the shard (counted from 0) and number of shards, e.g. "0/4".
+
+    Returns
+    -------
+    tuple
+        Number of the shard and number of shards.
+
+    Raises
+    ------
+    ValueError
+        If the shard is malformed or out of range.
+    """
+    try:
+        index, count = (int(value) for value in shard.split("/"))
+    except ValueError:
+        raise ValueError(
+            f'Shard "{shard}" is not of the form i/n, e.g. 0/4 for the first of four shards.'
+        )
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f'Shard "{shard}" is out of range, i has to be in 0..n-1.')
+    return index, count
+
+
+def get_shard_region_numbers(car_amounts, index, count):
+    """Assigns regions to shards and returns the regions of one shard.
+
+    Regions are handed out largest first to the shard with the least vehicles so far, ties are
+    broken by region and shard number. The assignment only depends on the region data, so every
+    shard of a run gets the same result.
+
+    Parameters
+    ----------
+    car_amounts : list
+        Number of vehicles of each region, by region counter.
+    index : int
+        Number of the shard.
+    count : int
+        Number of shards.
+
+    Returns
+    -------
+    list
+        Counters of the regions of the shard, in ascending order.
+
+    Raises
+    ------
+    ValueError
+        If the shard gets no regions.
+    """
+    loads = [0] * count
+    region_numbers = []
+    for number in sorted(range(len(car_amounts)), key=lambda n: (-car_amounts[n], n)):
+        shard = min(range(count), key=lambda s: (loads[s], s))
+        loads[shard] += car_amounts[number]
+        if shard == index:
+            region_numbers.append(number)
+    if not region_numbers:
+        raise ValueError(
+            f"Shard {index}/{count} has no regions, use at most {len(car_amounts)} shards."
+        )
+    return sorted(region_numbers)
+
+
+def _read_grid_time_series(file_path):
+    """Reads a region grid time series with the data types it was written with."""
+    data = pd.read_csv(file_path)
+    power_columns = [column for column in data.columns if "total" in column]
+    return data.astype({column: np.float32 for column in power_columns})
+
+
+def _read_analysis(file_path):
+    """Reads the analysis records of a region."""
+    data = pd.read_csv(file_path, dtype={"car_type": str})
+    records = np.zeros(len(data.index), dtype=ANALYSIS_DTYPE)
+    for field in ANALYSIS_DTYPE.names:
+        records[field] = data[field].to_numpy()
+    return records
+
+
+def _merge_failure_reports(shard_directories, save_directory, region_count):
+    """Combines the failure reports of the shards, nothing is written if no region failed."""
+    reports = []
+    for directory in shard_directories:
+        report_path = pathlib.Path(directory, FAILURE_REPORT_FILE)
+        if report_path.is_file():
+            with open(report_path) as f:
+                reports.append(json.load(f))
+    if not reports:
+        return
+    failed_regions = sorted(
+        (
+            failed_region
+            for report in reports
+            for failed_region in report["failed_regions"]
+        ),
+        key=lambda failed_region: failed_region["region_number"],
+    )
+    report = {
+        "attempts": max(report["attempts"] for report in reports),
+        "regions_total": region_count,
+        "regions_failed": len(failed_regions),
+        "failed_regions": failed_regions,
+    }
+    with open(pathlib.Path(save_directory, FAILURE_REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=4)
+
+
+def _read_shard_metadata(shard_directories):
+    """Reads the metadata of the shards and checks that they are the complete set of shards of one run."""
+    metadata = []
+    for directory in shard_directories:
+        metadata_path = pathlib.Path(directory, METADATA_FILE)
+        if not metadata_path.is_file():
+            raise FileNotFoundError(f"No {METADATA_FILE} found in {directory}.")
+        with open(metadata_path) as f:
+            shard_metadata = json.load(f)
+        if "shard" not in shard_metadata:
+            raise ValueError(f"{directory} is not the result of a sharded run.")
+        metadata.append(shard_metadata)
+
+    count = metadata[0]["shard"]["count"]
+    indices = sorted(shard_metadata["shard"]["index"] for shard_metadata in metadata)
+    if indices != list(range(count)):
+        raise ValueError(
+            f"Expected the results of shards 0 to {count - 1}, got shards {indices}."
+        )
+    for shard_metadata in metadata[1:]:
+        if (
+            shard_metadata["scenario"] != metadata[0]["scenario"]
+            or shard_metadata["config"] != metadata[0]["config"]
+            or shard_metadata["shard"]["count"] != count
+        ):
+            raise ValueError("Shards belong to different scenarios or configs.")
+    return metadata
+
+
+def _copy_regions(regions, save_directory):
+    """Copies the region directories and sums up their grid time series and analysis.
+
+    Returns the summed grid time series with an empty frame of its columns and its timestamps,
+    the analysis files and the merged AnalysisSummary, None where the regions have no such results.
+    """
+    grid_time_series_total = None
+    grid_time_series_template = None
+    grid_timestamps = None
+    analysis_files = []
+    analysis_summary = None
+    for number, region_id, directory in regions:
+        region_directory = pathlib.Path(save_directory, str(region_id))
+        shutil.copytree(pathlib.Path(directory, str(region_id)), region_directory)
+
+        grid_file = pathlib.Path(
+            region_directory, "{}_grid_time_series_{}.csv".format(number, region_id)
+        )
+        if grid_file.is_file():
+            grid_data_frame = _read_grid_time_series(grid_file)
+            values = grid_data_frame.drop(columns="timestamp").to_numpy(
+                dtype=np.float64
+            )
+            if grid_time_series_total is None:
+                grid_time_series_total = values
+                grid_time_series_template = grid_data_frame.iloc[:0]
+                grid_timestamps = grid_data_frame["timestamp"].to_numpy()
+            else:
+                grid_time_series_total += values
+
+        analysis_file = pathlib.Path(region_directory, "analysis.csv")
+        if analysis_file.is_file():
+            analysis_files.append(analysis_file)
+            summary = AnalysisSummary.from_records(_read_analysis(analysis_file))
+            if analysis_summary is None:
+                analysis_summary = summary
+            else:
+                analysis_summary = analysis_summary.merge(summary)
+    grid = (grid_time_series_total, grid_time_series_template, grid_timestamps)
+    return grid, analysis_files, analysis_summary
+
+
+def _export_all_regions(save_directory, config, grid, analysis_files, analysis_summary):
+    """Exports the results of all regions from the sums of _copy_regions."""
+    if analysis_summary is not None:
+        helpers.export_analysis_all_regions(
+            analysis_files,
+            analysis_summary,
+            pathlib.Path(save_directory, "analysis_all_regions.csv"),
+            pathlib.Path(save_directory, "analysis_all_regions.json"),
+            helpers.date_string_to_datetime(config["basic"]["start_date"]),
+            helpers.date_string_to_datetime(config["basic"]["end_date"]),
+        )
+    if grid[0] is not None:
+        helpers.export_grid_timeseries_all_regions(
+            *grid, pathlib.Path(save_directory, "grid_time_series_all_regions.csv")
+        )
+
+
+def merge_shards(shard_directories, save_directory=None):
+    """Combines the result directories of all shards of a run.
+
+    Region directories are copied, the results of all regions and the metadata are built as if
+    the regions had been simulated in one run. If regions of a shard failed, their failure reports
+    are combined into the failure report of the merged results, which are incomplete then.
+
+    Parameters
+    ----------
+    shard_directories : list
+        Result directories of the shards.
+    save_directory : pathlib.Path
+        Directory of the merged results, by default a new run directory next to the first shard.
+
+    Returns
+    -------
+    pathlib.Path
+        Directory of the merged results, it contains FAILURE_REPORT_FILE if regions failed.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a directory has no metadata.
+    ValueError
+        If the directories are not the complete set of shards of one scenario.
+    """
+    metadata = _read_shard_metadata(shard_directories)
+
+    if save_directory is None:
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        save_directory = pathlib.Path(
+            shard_directories[0],
+            "..",
+            "{}_{}_simbev_run".format(metadata[0]["scenario"], timestamp),
+        ).resolve()
+    save_directory = pathlib.Path(save_directory)
+    save_directory.mkdir(parents=True, exist_ok=False)
+
+    # regions of all shards in the order of the region counter
+    regions = sorted(
+        (number, region_id, directory)
+        for directory, shard_metadata in zip(shard_directories, metadata)
+        for number, region_id in shard_metadata["shard"]["regions"]
+    )
+    _export_all_regions(
+        save_directory, metadata[0]["config"], *_copy_regions(regions, save_directory)
+    )
+    _merge_failure_reports(shard_directories, save_directory, len(regions))
+
+    merged_metadata = dict(metadata[0])
+    del merged_metadata["shard"]
+    merged_metadata["timestamp_start"] = min(
+        shard_metadata["timestamp_start"] for shard_metadata in metadata
+    )
+    merged_metadata["timestamp_end"] = max(
+        shard_metadata["timestamp_end"] for shard_metadata in metadata
+    )
+    merged_metadata["shards"] = [str(directory) for directory in shard_directories]
+    with open(pathlib.Path(save_directory, METADATA_FILE), "w") as f:
+        json.dump(merged_metadata, f, indent=4)
+    return save_directory
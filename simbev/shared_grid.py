@@ -0,0 +1,166 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import pathlib
+import shutil
+import warnings
+
+import numpy as np
+
+
+class SharedGridTimeSeries:
+    """Unrounded grid time series of the regions that are being simulated, in shared memory.
+
+    The block has a fixed number of slots. The main process gives a region a slot before its first chunk
+    is handed out and frees it once the region is exported, pool processes add the grid time series of
+    their chunks to the slot in place. Only small completion messages have to be sent back to the main
+    process and the size of the block doesn't depend on the number of regions.
+
+    Parameters
+    ----------
+    shape : tuple
+        Number of slots, time steps and columns of the grid time series.
+    name : str
+        Name of the shared memory block to attach to, a new block is created if None.
+    lock : Lock
+        Lock that guards additions, a new lock is created if None.
+
+    Attributes
+    ----------
+    slots : dict
+        Slot of each region that is being simulated, by key of the region. Only kept in the main process.
+    free_slots : list
+        Slots without a region.
+    """
+
+    def __init__(self, shape, name=None, lock=None):
+        self.shape = shape
+        # a new block is filled with zeros by the operating system
+        self.memory = shared_memory.SharedMemory(
+            name=name, create=name is None, size=max(int(np.prod(shape)) * 8, 1)
+        )
+        self.array = np.ndarray(shape, dtype=np.float64, buffer=self.memory.buf)
+        self.lock = mp.Lock() if lock is None else lock
+        self.slots = {}
+        self.free_slots = list(range(shape[0] - 1, -1, -1))
+
+    @classmethod
+    def create(cls, shape):
+        """Creates the shared grid time series if there is enough shared memory.
+
+        Parameters
+        ----------
+        shape : tuple
+            Number of slots, time steps and columns of the grid time series.
+
+        Returns
+        -------
+        SharedGridTimeSeries
+            None if there is no or not enough shared memory, grid time series are then sent back to the
+            main process.
+        """
+        size = int(np.prod(shape)) * 8
+        shm_path = pathlib.Path("/dev/shm")
+        if shm_path.is_dir() and shutil.disk_usage(shm_path).free < size:
+            warnings.warn(
+                "Not enough shared memory for the grid time series ({} MB), "
+                "results are sent back to the main process instead.".format(
+                    size // 2**20
+                )
+            )
+            return None
+        try:
+            return cls(shape)
+        except OSError as e:
+            warnings.warn(
+                "Shared memory for the grid time series could not be created ({}), "
+                "results are sent back to the main process instead.".format(e)
+            )
+            return None
+
+    def __getstate__(self):
+        # pool processes attach to the existing block
+        return self.shape, self.memory.name, self.lock
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def acquire(self, key):
+        """Gives a region a free slot.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the region, e.g. number of the iteration and of the region.
+
+        Returns
+        -------
+        int
+            Slot of the region.
+
+        Raises
+        ------
+        RuntimeError
+            If all slots are taken.
+        """
+        if not self.free_slots:
+            raise RuntimeError(
+                "All {} slots of the shared grid time series are taken.".format(
+                    self.shape[0]
+                )
+            )
+        slot = self.free_slots.pop()
+        self.slots[key] = slot
+        return slot
+
+    def add(self, slot, grid_time_series):
+        """Adds a partial grid time series to a slot.
+
+        Parameters
+        ----------
+        slot : int
+            Slot of the region.
+        grid_time_series : ndarray
+            Unrounded grid time series of a chunk of the region.
+        """
+        with self.lock:
+            self.array[slot] += grid_time_series
+
+    def release(self, key):
+        """Returns the grid time series of a region and frees its slot.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the region.
+
+        Returns
+        -------
+        ndarray
+            Copy of the summed grid time series.
+        """
+        slot = self.slots.pop(key)
+        grid_time_series = self.array[slot].copy()
+        self.array[slot] = 0
+        self.free_slots.append(slot)
+        return grid_time_series
+
+    def reset_lock(self):
+        """Replaces the lock after a pool process was lost, it may have been holding it.
+
+        Processes that are started afterwards use the new lock, slots the lost process added to
+        have to be discarded.
+        """
+        self.lock = mp.Lock()
+
+    def close(self, unlink=False):
+        """Detaches from the shared memory block, the main process also removes it.
+
+        Parameters
+        ----------
+        unlink : bool
+            Remove the shared memory block.
+        """
+        self.array = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
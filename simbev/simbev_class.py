@@ -1,25 +1,110 @@
+import collections
 import datetime
 import math
 import traceback
 import configparser as cp
-import json
 import copy
+import json
 import warnings
-import multiprocessing as mp
 import pathlib
+import time
 from typing import List
 
 import pandas as pd
 import numpy as np
 
 from simbev.helpers import helpers
-from simbev.region import Region, RegionType
+from simbev.region import ChunkFailure, Region, RegionChunk, RegionType
+from simbev.collector import ChunkCollector
+from simbev.shared_grid import SharedGridTimeSeries
+from simbev.executor import TASKS_PER_WORKER, get_executor
+from simbev.shard import get_shard_region_numbers
 from simbev.car import CarType, Car, UserGroup
+from simbev.analysis import ANALYSIS_DTYPE
+from simbev.fleet import (
+    FLEET_STREAM,
+    generate_fleet,
+    get_user_groups,
+    load_fleet,
+    store_fleet,
+)
 from simbev.trip import Trip
-from simbev.mid_timeseries import get_profile_time_series
+from simbev.mid_timeseries import read_week_data
+from simbev.driving_profiles import (
+    DrivingProfileInput,
+    assemble_profiles,
+    get_profile_weeks,
+)
+from simbev import timeseries_cache
+from simbev.bundle import Bundle, get_input_files, get_source_files, write_bundle
 from simbev import plot
 from simbev.helpers.errors import SoCError
 
+# scenarios and shared grid time series of a pool process, set once by the pool initializer
+_worker_simbevs = None
+_worker_grid = None
+
+
+def _init_worker(simbevs, shared_grid=None):
+    """Stores the scenarios in a pool process, so that tasks only have to send a region descriptor.
+
+    Parameters
+    ----------
+    simbevs : list
+        Scenarios that are simulated, one per iteration. Iterations share their input data,
+        which is only sent once.
+    shared_grid : SharedGridTimeSeries
+        Grid time series of the simulated regions in shared memory, None if chunks return their
+        grid time series.
+    """
+    global _worker_simbevs, _worker_grid
+    _worker_simbevs = simbevs
+    _worker_grid = shared_grid
+
+
+def _run_chunk(chunk):
+    """Simulates a chunk of a region with the scenarios of the pool process.
+
+    Parameters
+    ----------
+    chunk : tuple
+        Number of the iteration, index of the region in SimBEV.regions, number of the
+        first vehicle and of the vehicle after the last one of the chunk and slot of the region
+        in the shared grid time series (None without them).
+
+    Returns
+    -------
+    tuple
+        Number of the iteration and the RegionChunk, or a ChunkFailure if the chunk failed. With
+        shared grid time series, the grid time series of the chunk is added there and not returned.
+    """
+    iteration, region_index, start, stop, slot = chunk
+    simbev = _worker_simbevs[iteration]
+    chunk = simbev.run_chunk(simbev.regions[region_index], start, stop)
+    if (
+        isinstance(chunk, RegionChunk)
+        and slot is not None
+        and chunk.grid_time_series is not None
+    ):
+        _worker_grid.add(slot, chunk.grid_time_series)
+        chunk.grid_time_series = None
+    return iteration, chunk
+
+
+def _build_region_type(region_type):
+    """Creates a region type with the scenario of the pool process.
+
+    Parameters
+    ----------
+    region_type : str
+        Type of Region.
+
+    Returns
+    -------
+    RegionType
+    """
+    return _worker_simbevs[0]._create_region_type(region_type)
+
 
 class SimBEV:
     """
@@ -143,6 +228,21 @@ class SimBEV:
     num_threads : int
         Number of threads used in the simulation.
 
+    chunk_size : int
+        Number of vehicles simulated in one task with multiprocessing, 0 to choose it from the number of vehicles.
+
+    executor : str
+        Backend that runs the tasks if num_threads is larger than 1: serial, process or thread.
+
+    max_retries : int
+        Number of times a failed chunk is simulated again with multiprocessing.
+
+    retry_serial : bool
+        Retry failed chunks one after another in the main process, e.g. for debugging.
+
+    shard : tuple
+        Number of the shard and number of shards if only a part of the regions is simulated, None for all regions.
+
     output_options : list
         List of output options.
 
@@ -152,8 +252,21 @@ class SimBEV:
     input_directory : pathlib.Path
         Path to the input directory.
 
-    input_data : dict
-        A dictionary containing input data for different regions.
+    cache_directory : pathlib.Path
+        Directory of the cache of region type time series, None if the cache is not used.
+
+    bundle : Bundle
+        Compiled input data the scenario was read from, None if it was read from text files.
+
+    fleet_directory : pathlib.Path
+        Directory the fleets of the regions are stored in and read from, None if they are generated for every run.
+
+    fleets : dict
+        Vehicle attributes (see simbev.fleet) of the regions by region number, only kept with a fleet
+        directory (see load_fleets).
+
+    input_data : DrivingProfileInput
+        Driving profiles by region type and car class, None for probability input.
 
     scaling : float
         Scaling factor for vehicle numbers.
@@ -170,14 +283,20 @@ class SimBEV:
     user_groups : dict
         Dictionary of user groups.
 
-    grid_data_list : list
-        List of grid data.
+    grid_time_series_total : ndarray
+        Sum of the grid time series of all exported regions, without the timestamp column.
 
-    analysis_data_list : list
-        List of analysis data.
+    grid_time_series_template : DataFrame
+        Empty grid time series of a region, gives columns and data types of the sum.
 
-    terminated : bool
-        Flag indicating if the simulation has terminated.
+    grid_timestamps : ndarray
+        Timestamps of the grid time series.
+
+    analysis_summary : AnalysisSummary
+        Merged analysis summary of all simulated regions.
+
+    failures : list
+        Chunks (ChunkFailure) that still failed after all retries, their regions are missing in the results.
 
     charging_probability_warning_flag : bool
         Flag indicating charging probability warning.
@@ -200,6 +319,9 @@ class SimBEV:
     file_name_analysis_all_json : str
         File name for analysis data in JSON format for all regions.
 
+    file_name_failure_report : str
+        File name for the report of regions that could not be simulated.
+
     step_size_str : str
         Time step size as a string representation with 'min' suffix.
 
@@ -238,6 +360,9 @@ class SimBEV:
         self.fast_charge_threshold = config_dict["fast_charge_threshold"]
         self.consumption_factor_highway = config_dict["consumption_factor_highway"]
         self.rng_seed = config_dict["rng_seed"]
+        if self.rng_seed is None:
+            # all vehicle streams of a run are derived from the same seed
+            self.rng_seed = np.random.SeedSequence().entropy
         self.rng = self.get_rng()
         self.eta_cp = config_dict["eta_cp"]
         self.start_date_input = config_dict["start_date"]
@@ -265,26 +390,33 @@ class SimBEV:
         )
 
         self.num_threads = config_dict["num_threads"]
+        self.chunk_size = config_dict["chunk_size"]
+        self.executor = config_dict["executor"]
+        self.shard = None
+        self.max_retries = config_dict["max_retries"]
+        self.retry_serial = config_dict["retry_serial"]
         self.output_options = config_dict["output_options"]
 
         self.input_type = config_dict["input_type"]
         self.input_directory = pathlib.Path(config_dict["input_directory"])
-        self.input_data = {"rural": {}, "suburban": {}, "urban": {}}
+        self.cache_directory = config_dict["cache_directory"]
+        self.bundle = config_dict["bundle"]
+        self.fleet_directory = config_dict["fleet_directory"]
+        self.fleets = {}
+        self.input_data = None
         if self.input_type == "profile":
-            for file_path in self.input_directory.glob("*.gzip"):
-                file_path_parts = file_path.stem.split("_")
-                self.input_data[file_path_parts[-2]][
-                    file_path_parts[-1]
-                ] = pd.read_parquet(file_path)
+            self.input_data = DrivingProfileInput(self.input_directory)
         self.scaling = config_dict["scaling"]
         # additional parameters
         self.regions: List[Region] = []
         self.created_region_types = {}
         self.car_types = {}
         self.user_groups = {}
-        self.grid_data_list = []
-        self.analysis_data_list = []
-        self.terminated = False
+        self.grid_time_series_total = None
+        self.grid_time_series_template = None
+        self.grid_timestamps = None
+        self.analysis_summary = None
+        self.failures = []
         self.charging_probability_warning_flag = False
 
         self.name = name
@@ -296,6 +428,7 @@ class SimBEV:
         self.file_name_all = "grid_time_series_all_regions.csv"
         self.file_name_analysis_all = "analysis_all_regions.csv"
         self.file_name_analysis_all_json = "analysis_all_regions.json"
+        self.file_name_failure_report = "failed_regions.json"
 
         self.step_size_str = str(self.step_size) + "min"
 
@@ -393,6 +526,10 @@ class SimBEV:
         ----------
         region_type : str
             Type of Region.
+
+        Returns
+        -------
+        RegionType
         """
 
         rs7_region = RegionType(
@@ -404,15 +541,60 @@ class SimBEV:
 
         rs7_region.create_timeseries(self)
         if self.input_type == "probability":
-            rs7_region.get_probabilities(self.input_directory)
+            if self.bundle is not None and region_type in self.bundle.region_types:
+                rs7_region.probabilities = self.bundle.get_probabilities(region_type)
+            else:
+                rs7_region.get_probabilities(self.input_directory)
+
+        return rs7_region
+
+    def _create_region_types(self, region_types):
+        """Creates the region-types of the simulated regions, in parallel if there are several.
+
+        Region-types are built on the executor of the simulation. Each one reads and resamples its
+        own input files, so they don't depend on each other.
 
-        self.created_region_types[region_type] = rs7_region
+        Parameters
+        ----------
+        region_types : list
+            Types of the simulated regions.
+        """
+        region_types = sorted(
+            set(region_types) - set(self.created_region_types), key=str
+        )
+        num_threads = min(self.num_threads, len(region_types))
+        executor = self.executor
+        # profile input only needs empty time series, which is not worth sending to processes
+        if num_threads <= 1 or self.input_type != "probability":
+            executor = "serial"
+        with get_executor(
+            executor, num_threads, initializer=_init_worker, initargs=([self],)
+        ) as pool:
+            for rs7_region in pool.imap_unordered(_build_region_type, region_types):
+                self.created_region_types[rs7_region.rs7_type] = rs7_region
+        _init_worker(None)
 
     def _add_regions_from_dataframe(self):
         """Parses region input dataframe and creates Region objects"""
 
-        # variable to check which region types have been created
-        for region_counter in range(len(self.region_data.index)):
+        region_numbers = range(len(self.region_data.index))
+        if self.shard is not None:
+            car_amounts = (
+                (self.region_data.iloc[:, 1:] / self.scaling)
+                .apply(np.ceil)
+                .astype(int)
+                .sum(axis=1)
+            )
+            region_numbers = get_shard_region_numbers(car_amounts.tolist(), *self.shard)
+
+        self._create_region_types(
+            [
+                self.region_data.iat[region_counter, 0]
+                for region_counter in region_numbers
+            ]
+        )
+
+        for region_counter in region_numbers:
             # get data from inputs
             region_id = self.region_data.index[region_counter]
             region_type = self.region_data.iat[region_counter, 0]
@@ -429,10 +611,6 @@ class SimBEV:
                 .astype(int)
             ).to_dict()
 
-            # create region_type
-            if region_type not in self.created_region_types:
-                self._create_region_type(region_type)
-
             # create region objects
             new_region = Region(
                 region_id,
@@ -447,51 +625,418 @@ class SimBEV:
         """Create RNG based on the given rng seed."""
         return np.random.default_rng(self.rng_seed)
 
-    def run_multi(self):
+    def get_vehicle_rng(self, region, vehicle_index):
+        """Create RNG of a single vehicle based on the given rng seed.
+
+        Parameters
+        ----------
+        region : Region
+            Region of the vehicle.
+        vehicle_index : int
+            Number of the vehicle in its region, counted through all car types.
+
+        Returns
+        -------
+        Generator
+        """
+        return np.random.default_rng(
+            np.random.SeedSequence(
+                self.rng_seed, spawn_key=(region.number, vehicle_index)
+            )
+        )
+
+    def get_profile_rng(self, region):
+        """Create RNG that chooses the driving profiles of a region based on the given rng seed.
+
+        Parameters
+        ----------
+        region : Region
+            Region of the vehicles.
+
+        Returns
+        -------
+        Generator
+        """
+        return np.random.default_rng(
+            np.random.SeedSequence(self.rng_seed, spawn_key=(region.number,))
+        )
+
+    def get_profile_draws(self, region, start, stop, week_count):
+        """Returns the random numbers that choose the driving profiles of a part of the vehicles of a region.
+
+        Every vehicle gets one random number per week from the profile stream of the region, the
+        numbers of the vehicles before start are skipped. A part equals that part of the numbers of
+        the whole region, so profiles don't depend on the chunks.
+
+        Parameters
+        ----------
+        region : Region
+            Region of the vehicles.
+        start : int
+            Number of the first vehicle.
+        stop : int
+            Number of the vehicle after the last one.
+        week_count : int
+            Number of simulated weeks.
+
+        Returns
+        -------
+        ndarray
+            Random numbers, one row per vehicle and one column per week.
+        """
+        rng = self.get_profile_rng(region)
+        # every random number of the default generator uses one output of its bit generator
+        rng.bit_generator.advance(start * week_count)
+        return rng.random((stop - start, week_count))
+
+    def get_fleet_rng(self, region):
+        """Create RNG that draws the vehicle attributes of a region based on the given rng seed.
+
+        Parameters
+        ----------
+        region : Region
+            Region of the vehicles.
+
+        Returns
+        -------
+        Generator
+        """
+        return np.random.default_rng(
+            np.random.SeedSequence(
+                self.rng_seed, spawn_key=(region.number, FLEET_STREAM)
+            )
+        )
+
+    def get_fleet(self, region, start=0, stop=None):
+        """Returns the vehicle attributes of a part of the vehicles of a region.
+
+        Fleets loaded by load_fleets are used, otherwise only the requested vehicles are drawn from
+        the fleet stream of the region, so chunks of a region can generate their part of the fleet
+        where they are simulated.
+
+        Parameters
+        ----------
+        region : Region
+            Region of the vehicles.
+        start : int
+            Number of the first vehicle.
+        stop : int
+            Number of the vehicle after the last one, all vehicles of the region if None.
+
+        Returns
+        -------
+        ndarray
+            Record array with FLEET_DTYPE, one record per vehicle.
+        """
+        fleet = self.fleets.get(region.number)
+        if fleet is not None:
+            return fleet[start:stop]
+        return generate_fleet(self, region, self.get_fleet_rng(region), start, stop)
+
+    def load_fleets(self):
+        """Reads the fleets of all regions from the fleet directory, missing fleets are generated and stored.
+
+        The fleet of a region is stored as <region id>_<rng seed>.npy, so later runs and variants of
+        the scenario simulate the same vehicles. Fleets are kept in fleets for the simulation.
+        """
+        for region in self.regions:
+            fleet_path = pathlib.Path(
+                self.fleet_directory, f"{region.id}_{self.rng_seed}.npy"
+            )
+            fleet = load_fleet(fleet_path, region)
+            if fleet is None:
+                fleet = generate_fleet(self, region, self.get_fleet_rng(region))
+                store_fleet(fleet_path, fleet)
+            self.fleets[region.number] = fleet
+
+    def create_iteration(self, iteration):
+        """Returns a repetition of the scenario with its own seed and result directory.
+
+        Region types, car types, user groups and input data are shared with this scenario and
+        not copied, so setup only has to be run once for all iterations.
+
+        Parameters
+        ----------
+        iteration : int
+            Number of the iteration, it is added to the rng seed.
+
+        Returns
+        -------
+        SimBEV
+        """
+        simbev = copy.copy(self)
+        simbev.rng_seed = self.rng_seed + iteration
+        simbev.rng = simbev.get_rng()
+        simbev.fleets = {}
+        simbev.save_directory = pathlib.Path(
+            self.save_directory, f"iteration_{iteration}"
+        )
+        simbev.grid_time_series_total = None
+        simbev.grid_time_series_template = None
+        simbev.grid_timestamps = None
+        simbev.analysis_summary = None
+        simbev.failures = []
+        return simbev
+
+    def set_shard(self, index, count):
+        """Restricts the simulation to the regions of one shard, must be called before setup.
+
+        Regions keep their counter and RNG streams, so merged shards give the results of a run of all regions.
+
+        Parameters
+        ----------
+        index : int
+            Number of the shard, counted from 0.
+        count : int
+            Number of shards.
+        """
+        self.shard = (index, count)
+        self.save_directory = self.save_directory.with_name(
+            "{}_shard_{}_of_{}".format(self.save_directory.name, index, count)
+        )
+
+    def warm_cache(self):
+        """Builds the region types of all regions, so that their time series are stored in the cache.
+
+        Returns
+        -------
+        list
+            Region types that were built.
+        """
+        region_types = sorted(set(self.region_data.iloc[:, 0]), key=str)
+        self._create_region_types(region_types)
+        return region_types
+
+    def run_multi(self, iterations=None):
         """Runs Simulation for multiprocessing
 
-        Raises
-        ------
-        SystemExit
-            If an Exception occurred during multiprocessing and the simulation stopped.
+        Parameters
+        ----------
+        iterations : list
+            Repetitions of the scenario (see create_iteration) that are simulated on the same
+            process pool. Only this scenario is simulated if None.
+
+        With more than one process, chunks that fail or are lost with their pool process are retried
+        up to max_retries times while the results of all other chunks are kept. Regions that still
+        fail are left out of the results and listed in the failure report (see export_failure_report).
 
         """
+        simbevs = iterations or [self]
         print(
             "Scaling set to {}: 1 simulated vehicle represents {} vehicles in grid time series".format(
                 self.scaling, self.scaling
             )
         )
-        self.num_threads = min(self.num_threads, len(self.regions))
-        if self.num_threads == 1:
-            for region in self.regions:
-                grid_data = self.run(region)
+        executor, num_threads, chunks = self.get_run_chunks(simbevs)
+        for simbev in simbevs:
+            simbev.num_threads = num_threads
+            # stored fleets are only read and written by this process, other fleets are
+            # generated by the chunks
+            if simbev.fleet_directory is not None:
+                simbev.load_fleets()
+
+        shared_grid = None
+        if executor == "process":
+            shared_grid = self.create_shared_grid(num_threads, len(chunks))
+        collector = ChunkCollector(simbevs, chunks, shared_grid)
+
+        pool_start = time.perf_counter()
+        try:
+            attempts = self._run_chunks(collector, executor, num_threads, chunks)
+        finally:
+            # serial and thread executors set the scenarios in this process
+            _init_worker(None)
+            if shared_grid is not None:
+                shared_grid.close(unlink=True)
+        for simbev in simbevs:
+            simbev.failures = []
+        for iteration, failure in collector.failures:
+            simbevs[iteration].failures.append(failure)
+        if num_threads > 1:
+            # CPU time of the chunks, time spent waiting for a processor or the GIL doesn't count
+            wall_time = time.perf_counter() - pool_start
+            print(
+                "Parallel efficiency: {:.0%} (speedup {:.1f} on {} {}: {:.1f} s CPU time in {:.1f} s)".format(
+                    collector.busy_time / (wall_time * num_threads),
+                    collector.busy_time / wall_time,
+                    num_threads,
+                    "threads" if executor == "thread" else "processes",
+                    collector.busy_time,
+                    wall_time,
+                )
+            )
+        for simbev in simbevs:
+            simbev.export_all_regions(attempts)
 
-                self._log_grid_data(grid_data)
+    def get_run_chunks(self, simbevs):
+        """Returns the executor, number of processes or threads and chunks of a run.
 
-        else:
-            pool = mp.Pool(processes=self.num_threads)
-
-            # define local callback function for error handling and data logging
-            def callback(result):
-                if result[0] is None:
-                    self.terminated = True
-                    pool.terminate()
-
-                self._log_grid_data(result)
-
-            for region in self.regions:
-                pool.apply_async(self.run, (region,), callback=callback)
-            pool.close()
-            pool.join()
-        if self.terminated:
-            raise SystemExit(
-                "Exception occurred during multiprocessing, simulation stopped. See above for further information."
-            )
+        Parameters
+        ----------
+        simbevs : list
+            Scenarios that are simulated, one per iteration.
+
+        Returns
+        -------
+        tuple
+            Executor backend, number of processes or threads and number of the iteration and
+            (region, first vehicle, vehicle after the last one) of the chunks in the order they
+            are handed out. Without parallelism, the chunks are the whole regions in region order.
+        """
+        if self.executor == "serial" or self.num_threads == 1:
+            chunks = [
+                (iteration, (region, 0, region.car_amount))
+                for iteration, simbev in enumerate(simbevs)
+                for region in simbev.regions
+            ]
+            return "serial", 1, chunks
+        chunks = self.order_chunks(
+            [
+                (iteration, chunk)
+                for iteration, simbev in enumerate(simbevs)
+                for chunk in simbev.get_chunks()
+            ]
+        )
+        num_threads = min(self.num_threads, len(chunks))
+        return self.executor if num_threads > 1 else "serial", num_threads, chunks
+
+    def create_shared_grid(self, num_threads, chunk_count):
+        """Creates the shared grid time series of a run on a process pool.
+
+        Parameters
+        ----------
+        num_threads : int
+            Number of processes.
+        chunk_count : int
+            Number of chunks of the run.
+
+        Returns
+        -------
+        SharedGridTimeSeries
+            None without grid output or if there is not enough shared memory.
+        """
+        if not self.output_options["grid"]:
+            return None
+        # a region holds a slot while it has chunks in the pool, chunks of a region are
+        # handed out one after another, so at most one region per pending task holds one
+        slot_count = min(TASKS_PER_WORKER * num_threads, chunk_count)
+        return SharedGridTimeSeries.create((slot_count, *self.get_grid_shape()))
+
+    def _run_chunks(self, collector, executor, num_threads, chunks):
+        """Runs the chunks and retries failed chunks up to max_retries times.
+
+        Parameters
+        ----------
+        collector : ChunkCollector
+            Collects the results and exports the regions, holds the failures of the last round.
+        executor : str
+            Executor backend.
+        num_threads : int
+            Number of processes or threads.
+        chunks : list
+            Number of the iteration and (region, first vehicle, vehicle after the last one) of the
+            chunks.
+
+        Returns
+        -------
+        int
+            Number of attempts made.
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                chunks = self.order_chunks(collector.get_retry_chunks())
+                print(
+                    "\nRetrying {} failed chunks (attempt {}/{})".format(
+                        len(chunks), attempt, self.max_retries
+                    )
+                )
+                # retries can run in this process one after another for debugging
+                if self.retry_serial:
+                    executor = "serial"
+            # the scenarios are handed to every process once, tasks only contain
+            # iteration, region number, vehicles and slot
+            with get_executor(
+                executor,
+                num_threads,
+                initializer=_init_worker,
+                initargs=(collector.simbevs, collector.shared_grid),
+            ) as pool:
+                # results are reduced as they come in, a region is exported once all
+                # of its chunks are done
+                for iteration, result in pool.imap_unordered(
+                    _run_chunk, collector.start_round(chunks), collector.lose_chunk
+                ):
+                    collector.add(iteration, result)
+            if not collector.failures:
+                break
+        return attempt + 1
+
+    def export_all_regions(self, attempts):
+        """Exports the results of all regions after a run and the failure report if regions failed.
+
+        Parameters
+        ----------
+        attempts : int
+            Number of attempts made for the failed chunks.
+        """
         grid_time_series_all_regions = helpers.timeitlog(
             self.output_options["timing"], self.save_directory
         )(self.export_grid_timeseries_all_regions)()
-        if self.output_options["region_plot"] or self.output_options["collective_plot"]:
+        if self.output_options["collective_plot"]:
             plot.plot_gridtimeseries_by_usecase(self, grid_time_series_all_regions)
+        if self.failures:
+            self.export_failure_report(attempts)
+
+    def export_failure_report(self, attempts):
+        """Exports the regions that could not be simulated and prints a summary.
+
+        Results of all other regions are complete, the failed regions are missing in the results of
+        all regions.
+
+        Parameters
+        ----------
+        attempts : int
+            Number of attempts made for the failed chunks.
+        """
+        failed_regions = collections.defaultdict(list)
+        for failure in sorted(
+            self.failures, key=lambda failure: (failure.region_number, failure.start)
+        ):
+            failed_regions[failure.region_number].append(failure)
+        regions = {region.number: region for region in self.regions}
+
+        report = {
+            "attempts": attempts,
+            "regions_total": len(self.regions),
+            "regions_failed": len(failed_regions),
+            "failed_regions": [
+                {
+                    "region_id": str(regions[region_number].id),
+                    "region_number": region_number,
+                    "failed_chunks": [
+                        {
+                            "vehicles": [failure.start, failure.stop],
+                            "error": failure.error,
+                            "traceback": failure.traceback,
+                        }
+                        for failure in failures
+                    ],
+                }
+                for region_number, failures in failed_regions.items()
+            ],
+        }
+        self.save_directory.mkdir(parents=True, exist_ok=True)
+        report_path = pathlib.Path(self.save_directory, self.file_name_failure_report)
+        with open(report_path, "w") as outfile:
+            json.dump(report, outfile, indent=4)
+
+        print(
+            "\nPartial results: {} of {} regions failed after {} attempts, see {}".format(
+                len(failed_regions), len(self.regions), attempts, report_path
+            )
+        )
+        for region_number, failures in failed_regions.items():
+            print(f"  {regions[region_number].id}: {failures[0].error}")
 
     def run(self, region):
         """Runs Simulation for single-processing
@@ -503,186 +1048,402 @@ class SimBEV:
 
         Returns
         -------
-        DataFrame
-            Returns grid-data for current region.
+        tuple
+            Returns grid-data and analysis summary for current region.
         """
+        chunk = self.run_chunk(region, 0, region.car_amount)
+        return self.export_region(region, [chunk])
 
-        try:
-            if self.num_threads == 1:
-                print(
-                    f"===== Region: {region.id} ({region.number + 1}/{len(self.regions)}) ====="
-                )
-            else:
-                print(
-                    f"Starting Region {region.id} ({region.number + 1}/{len(self.regions)})"
+    def get_chunks(self):
+        """Splits the vehicles of all regions into chunks that are simulated as separate tasks.
+
+        Without a configured chunk size, regions are split so that there are about four tasks per process.
+
+        Returns
+        -------
+        list
+            Tuples of region, first vehicle and vehicle after the last one of each chunk.
+        """
+        chunk_size = self.chunk_size
+        if not chunk_size:
+            vehicle_count = sum(region.car_amount for region in self.regions)
+            chunk_size = max(math.ceil(vehicle_count / (4 * self.num_threads)), 1)
+        chunks = []
+        for region in self.regions:
+            # regions without vehicles get an empty chunk so that they are exported as well
+            for start in range(0, max(region.car_amount, 1), chunk_size):
+                chunks.append(
+                    (region, start, min(start + chunk_size, region.car_amount))
                 )
-            region_directory = pathlib.Path(self.save_directory, str(region.id))
-            region_directory.mkdir(parents=True, exist_ok=True)
+        return chunks
 
-            cars_simulated = 0
-            exception_count = 0
-            public_count = 0
-            for car_type_name, car_count in region.car_dict.items():
-                for car_number in range(car_count):
-                    # Create new car
-                    if "max_charging_capacity_slow" in self.tech_data.columns:
-                        car_type = self.car_types[car_type_name]
-                    else:
-                        # tech data by probability
-                        slow_cols = [
-                            col for col in self.tech_data.columns if "slow" in col
-                        ]
-                        fast_cols = [
-                            col for col in self.tech_data.columns if "fast" in col
-                        ]
-
-                        charging_capacity_slow = float(
-                            helpers.get_column_by_random_number(
-                                self.tech_data.loc[car_type_name, slow_cols],
-                                self.rng.random(),
-                            ).split("_")[-1]
-                        )
+    def get_grid_shape(self):
+        """Returns the shape of the grid time series of a region.
 
-                        charging_capacity_fast = float(
-                            helpers.get_column_by_random_number(
-                                self.tech_data.loc[car_type_name, fast_cols],
-                                self.rng.random(),
-                            ).split("_")[-1]
-                        )
-                        car_type = self.car_types[
-                            "{}_{}_{}".format(
-                                car_type_name,
-                                charging_capacity_slow,
-                                charging_capacity_fast,
-                            )
-                        ]
-
-                    # create new car objects
-                    work_parking = (
-                        self.work_parking[region.region_type.rs7_type]
-                        >= self.rng.random()
-                    )
-                    home_parking = (
-                        self.home_parking[region.region_type.rs7_type]
-                        >= self.rng.random()
-                    )
-                    work_power = (
-                        self.get_charging_capacity("work", use_case="work")
-                        if work_parking
-                        else None
-                    )
-                    home_power = (
-                        self.get_charging_capacity("home", use_case="home")
-                        if home_parking
-                        else None
-                    )
-                    user_group_id = self.set_user_group(
-                        work_parking, home_parking, work_power, home_power
-                    )
+        Returns
+        -------
+        tuple
+            Number of time steps and columns of the grid time series.
+        """
+        region = self.regions[0]
+        region.create_grid_timeseries()
+        shape = (
+            len(region.region_type.time_series.index),
+            len(region.header_grid_ts),
+        )
+        region.release_grid_timeseries()
+        return shape
 
-                    home_detached = (
-                        self.rng.random()
-                        <= self.probability_detached_home[region.region_type.rs7_type]
-                    )
+    def order_chunks(self, chunks):
+        """Orders the chunks of a run so that the largest regions are simulated first.
 
-                    car = Car(
-                        car_type,
-                        self.user_groups[user_group_id],
-                        car_number,
-                        work_parking,
-                        home_parking,
-                        work_power,
-                        home_power,
-                        region,
-                        home_detached,
-                        1,
-                        fast_charging_threshold=self.fast_charge_threshold,
-                    )
+        No long task is left running alone at the end of the run. Chunks of a region stay together and
+        start with the largest one, so a region is complete and exported soon after its first chunk.
 
-                    if self.input_type == "profile":
-                        car.driving_profile = get_profile_time_series(
-                            self.start_date,
-                            self.end_date,
-                            self.step_size,
-                            self.input_data[region.region_type.rs3_type][
-                                car_type_name.split("_")[-1]
-                            ],
-                        )
+        Parameters
+        ----------
+        chunks : list
+            Tuples of the number of the iteration and a chunk (see get_chunks).
 
-                    if self.num_threads == 1:
-                        print(
-                            "\r{}% {} {} / {}".format(
-                                round(
-                                    (cars_simulated + car_number + 1)
-                                    * 100
-                                    / region.car_amount
-                                ),
-                                car.car_type.name,
-                                (car.number + 1),
-                                region.car_dict[car.car_type.name],
-                            ),
-                            end="",
-                            flush=True,
-                        )
+        Returns
+        -------
+        list
+        """
+        region_costs = collections.Counter()
+        for iteration, chunk in chunks:
+            cost = self.estimate_chunk_cost(chunk)
+            region_costs[(iteration, chunk[0].number)] += cost
+        return sorted(
+            chunks,
+            key=lambda item: (
+                -region_costs[(item[0], item[1][0].number)],
+                item[0],
+                item[1][0].number,
+                -self.estimate_chunk_cost(item[1]),
+            ),
+        )
 
-                    # if private run, check if private charging infrastructure is available
-                    if self.private_only_run and (work_power or home_power):
-                        try:
-                            private_car = copy.copy(car)
-                            private_car.output = copy.deepcopy(car.output)
-                            private_car.private_only = True
-                            self.simulate_car(private_car, region)
-                            car = private_car
-                        except SoCError:
-                            exception_count += 1
-                            self.simulate_car(car, region)
-                    else:
-                        public_count += 1
-                        self.simulate_car(car, region)
-
-                    # export vehicle csv
-                    if self.output_options["analyze"]:
-                        car_array = car.export(region_directory, self)
-                        if region.analyze_array is None:
-                            region.analyze_array = car_array
-                        else:
-                            region.analyze_array = np.vstack(
-                                (region.analyze_array, car_array)
-                            )
-                    else:
-                        car.export(region_directory, self)
-                cars_simulated += car_count
-            if self.private_only_run:
-                print(
-                    "\nNumber of cars that couldn't run private only: {}/{}\nCars without private charging: {}".format(
-                        exception_count, cars_simulated - public_count, public_count
-                    )
-                )
+    def estimate_chunk_cost(self, chunk):
+        """Estimates the computational cost of a chunk.
+
+        The cost grows with the number of vehicles and the number of simulated time steps. Input type and
+        simulated period are the same for all chunks of a run, so they don't change the order of the chunks.
+
+        Parameters
+        ----------
+        chunk : tuple
+            Region, first vehicle and vehicle after the last one of the chunk.
 
-            region.export_grid_timeseries(region_directory)
+        Returns
+        -------
+        int
+            Estimated cost in simulated vehicle time steps.
+        """
+        region, start, stop = chunk
+        return (stop - start) * len(region.region_type.time_series.index)
+
+    def run_chunk(self, region, start, stop):
+        """Simulates a chunk of the vehicles of a region.
+
+        Vehicles are numbered through all car types of the region. Their attributes are taken from the
+        fleet of the region (see get_fleet) and every vehicle gets its own RNG stream for its trips,
+        so results don't depend on how a region is split into chunks. The chunk collects its grid data
+        in its own copy of the region and doesn't write to the scenario, so chunks can run on threads.
+
+        Parameters
+        ----------
+        region : Region
+            Includes all properties of current region.
+        start : int
+            Number of the first vehicle of the chunk.
+        stop : int
+            Number of the vehicle after the last one of the chunk.
+
+        Returns
+        -------
+        RegionChunk
+            Partial grid time series and analysis records of the chunk. A ChunkFailure with the
+            traceback if an exception occurred during multiprocessing.
+        """
+
+        chunk_start = time.thread_time()
+        try:
+            self._print_chunk_start(region, start, stop)
+            region_directory = pathlib.Path(self.save_directory, str(region.id))
+            region_directory.mkdir(parents=True, exist_ok=True)
+            # grid data of the chunk, the region itself is shared with other chunks
+            region = copy.copy(region)
+            region.create_grid_timeseries()
+            analysis = None
             if self.output_options["analyze"]:
-                helpers.export_analysis(
-                    region.analyze_array,
-                    region_directory,
-                    self.start_date_output,
-                    self.end_date,
-                    region.id,
-                )
-            print(f" - done (Region {region.number + 1}) at {datetime.datetime.now()}")
-            return region.grid_data_frame, region.analyze_array
+                analysis = np.zeros(stop - start, dtype=ANALYSIS_DTYPE)
+
+            counts = self._run_car_types(
+                region, start, stop, region_directory, analysis
+            )
+
+            grid_time_series = None
+            if region.region_type.output:
+                grid_time_series = region.accumulate_grid_timeseries()
+            region.release_grid_timeseries()
+            return RegionChunk(
+                region.number,
+                start,
+                stop,
+                grid_time_series,
+                analysis,
+                counts["exception"],
+                counts["public"],
+                time.thread_time() - chunk_start,
+            )
         except Exception as e:
             if self.num_threads > 1:
-                print("\n{}: {}".format(type(e).__name__, e))
+                error = "{}: {}".format(type(e).__name__, e)
+                trace = "".join(traceback.format_exception(type(e), e, e.__traceback__))
                 print(
-                    "EXCEPTION TRACE  PRINT:\n{}".format(
-                        "".join(traceback.format_exception(type(e), e, e.__traceback__))
+                    "\n{} (Region {}, vehicles {}-{})".format(
+                        error, region.id, start + 1, stop
                     )
                 )
+                print("EXCEPTION TRACE  PRINT:\n{}".format(trace))
 
-                return None, None
+                return ChunkFailure(region.number, start, stop, error, trace)
             raise e
 
-    def get_charging_capacity(self, location=None, use_case=None, distance=None):
+    def _print_chunk_start(self, region, start, stop):
+        if self.num_threads == 1:
+            print(
+                f"===== Region: {region.id} ({region.number + 1}/{len(self.region_data)}) ====="
+            )
+        else:
+            vehicles = (
+                ""
+                if start == 0 and stop == region.car_amount
+                else f", vehicles {start + 1}-{stop}"
+            )
+            print(
+                f"Starting Region {region.id} ({region.number + 1}/{len(self.region_data)}){vehicles}"
+            )
+
+    def _run_car_types(self, region, start, stop, region_directory, analysis):
+        """Simulates the vehicles of a chunk car type by car type.
+
+        Parameters
+        ----------
+        region : Region
+            Copy of the region that collects the grid data of the chunk.
+        start : int
+            Number of the first vehicle of the chunk.
+        stop : int
+            Number of the vehicle after the last one of the chunk.
+        region_directory : pathlib.Path
+            Directory of the vehicle results of the region.
+        analysis : ndarray
+            Analysis records of the chunk, filled in place, None without analysis.
+
+        Returns
+        -------
+        Counter
+            Number of vehicles that failed the private-only simulation ("exception") and of
+            vehicles simulated with public charging ("public").
+        """
+        counts = collections.Counter(exception=0, public=0)
+        fleet = self.get_fleet(region, start, stop)
+        if self.input_type == "profile":
+            profile_weeks = get_profile_weeks(self.start_date, self.end_date)
+            profile_draws = self.get_profile_draws(
+                region, start, stop, len(profile_weeks)
+            )
+        vehicle_offset = 0
+        for car_type_name, car_count in region.car_dict.items():
+            first = max(start - vehicle_offset, 0)
+            last = min(stop - vehicle_offset, car_count)
+            if self.input_type == "profile" and first < last:
+                # rows of the chunk start at its first vehicle
+                rows = slice(
+                    vehicle_offset + first - start, vehicle_offset + last - start
+                )
+                profile_batch = self._get_profile_batch(
+                    region, car_type_name, profile_draws[rows], profile_weeks
+                )
+            for car_number in range(first, last):
+                vehicle_index = vehicle_offset + car_number
+                car = self._create_car(
+                    region,
+                    car_type_name,
+                    car_number,
+                    fleet[vehicle_index - start],
+                    self.get_vehicle_rng(region, vehicle_index),
+                )
+                if self.input_type == "profile":
+                    car.driving_profile = profile_batch.get_vehicle_profile(
+                        car_number - first
+                    )
+
+                if self.num_threads == 1:
+                    print(
+                        "\r{}% {} {} / {}".format(
+                            round((vehicle_index + 1) * 100 / region.car_amount),
+                            car.car_type.name,
+                            (car.number + 1),
+                            region.car_dict[car.car_type.name],
+                        ),
+                        end="",
+                        flush=True,
+                    )
+
+                car = self._simulate_chunk_car(car, region, counts)
+
+                # export vehicle csv
+                if self.output_options["analyze"]:
+                    analysis[vehicle_index - start] = car.export(region_directory, self)
+                else:
+                    car.export(region_directory, self)
+            vehicle_offset += car_count
+        return counts
+
+    def _get_profile_batch(self, region, car_type_name, profile_draws, profile_weeks):
+        """Assembles the driving profiles of consecutive vehicles of a car type from their random numbers."""
+        return assemble_profiles(
+            self.input_data.get(
+                region.region_type.rs3_type, car_type_name.split("_")[-1]
+            ),
+            profile_draws,
+            profile_weeks,
+            self.step_size,
+        )
+
+    def _create_car(self, region, car_type_name, car_number, vehicle, rng):
+        """Creates a car from its record in the fleet of the region.
+
+        Parameters
+        ----------
+        region : Region
+            Region of the car.
+        car_type_name : str
+            Name of the car type in Region.car_dict.
+        car_number : int
+            Number of the car within its car type.
+        vehicle : numpy.void
+            Record of the car with FLEET_DTYPE.
+        rng : Generator
+            Random number generator of the car.
+
+        Returns
+        -------
+        Car
+        """
+        if "max_charging_capacity_slow" in self.tech_data.columns:
+            car_type = self.car_types[car_type_name]
+        else:
+            # tech data by probability
+            car_type = self.car_types[
+                "{}_{}_{}".format(
+                    car_type_name,
+                    float(vehicle["charging_capacity_slow"]),
+                    float(vehicle["charging_capacity_fast"]),
+                )
+            ]
+
+        work_parking = vehicle["work_parking"]
+        home_parking = vehicle["home_parking"]
+        return Car(
+            car_type,
+            self.user_groups[int(vehicle["user_group"])],
+            car_number,
+            work_parking,
+            home_parking,
+            float(vehicle["work_capacity"]) if work_parking else None,
+            float(vehicle["home_capacity"]) if home_parking else None,
+            region,
+            vehicle["home_detached"],
+            1,
+            fast_charging_threshold=self.fast_charge_threshold,
+            analyze=self.output_options["analyze"],
+            rng=rng,
+        )
+
+    def _simulate_chunk_car(self, car, region, counts):
+        """Simulates a car, only with private charging points in a private-only run if it can.
+
+        Returns the simulated car and counts it in counts (see _run_car_types).
+        """
+        # if private run, check if private charging infrastructure is available
+        if self.private_only_run and (car.work_capacity or car.home_capacity):
+            try:
+                private_car = copy.copy(car)
+                private_car.output = car.output.copy()
+                private_car.charging_log = car.charging_log.copy()
+                if car.statistics is not None:
+                    private_car.statistics = car.statistics.copy()
+                private_car.private_only = True
+                self.simulate_car(private_car, region)
+                return private_car
+            except SoCError:
+                counts["exception"] += 1
+                self.simulate_car(car, region)
+        else:
+            counts["public"] += 1
+            self.simulate_car(car, region)
+        return car
+
+    def export_region(self, region, chunks, grid_time_series=None):
+        """Exports grid time series and analysis of a region from its simulated chunks.
+
+        Parameters
+        ----------
+        region : Region
+            Includes all properties of current region.
+        chunks : list
+            All simulated chunks (RegionChunk) of the region.
+        grid_time_series : ndarray
+            Unrounded grid time series of the region if it was summed up in shared memory,
+            otherwise the grid time series of the chunks are added up.
+
+        Returns
+        -------
+        tuple
+            Returns grid-data and analysis summary for current region.
+        """
+        chunks = sorted(chunks, key=lambda chunk: chunk.start)
+        if self.private_only_run:
+            exception_count = sum(chunk.exception_count for chunk in chunks)
+            public_count = sum(chunk.public_count for chunk in chunks)
+            print(
+                "\nNumber of cars that couldn't run private only: {}/{}\nCars without private charging: {}".format(
+                    exception_count, region.car_amount - public_count, public_count
+                )
+            )
+
+        region_directory = pathlib.Path(self.save_directory, str(region.id))
+        region_directory.mkdir(parents=True, exist_ok=True)
+        region.create_grid_timeseries()
+        if region.region_type.output:
+            if grid_time_series is None:
+                grid_time_series = sum(chunk.grid_time_series for chunk in chunks)
+            region.set_grid_timeseries(grid_time_series)
+        region.export_grid_timeseries(region_directory)
+        analysis_summary = None
+        if self.output_options["analyze"]:
+            region.analyze_array = np.concatenate([chunk.analysis for chunk in chunks])
+            analysis_summary = helpers.export_analysis(
+                region.analyze_array,
+                region_directory,
+                self.start_date_output,
+                self.end_date,
+                region.id,
+            )
+        if self.output_options["region_plot"] and region.grid_data_frame is not None:
+            plot.plot_region_gridtimeseries(self, region.number, region.grid_data_frame)
+        print(f" - done (Region {region.number + 1}) at {datetime.datetime.now()}")
+        grid_data_frame = region.grid_data_frame
+        region.release_grid_timeseries()
+        region.analyze_array = None
+        return grid_data_frame, analysis_summary
+
+    def get_charging_capacity(
+        self, location=None, use_case=None, distance=None, rng=None
+    ):
         """Determines charging capacity for specific charging event
 
         Parameters
@@ -693,13 +1454,36 @@ class SimBEV:
             Charging use case.
         distance : float
             Distance of trip.
+        rng : Generator
+            Random number generator of the vehicle, SimBEV.rng is used if None.
 
         Returns
         -------
         Float
             Returns charging capacity.
         """
+        if rng is None:
+            rng = self.rng
+        probability = self.get_charging_probability(location, use_case, distance)
+        return float(helpers.get_column_by_random_number(probability, rng.random()))
+
+    def get_charging_probability(self, location=None, use_case=None, distance=None):
+        """Returns the probabilities of the charging capacities of a charging event.
+
+        Parameters
+        ----------
+        location : str
+            Current location of the vehicle.
+        use_case : str
+            Charging use case.
+        distance : float
+            Distance of trip.
 
+        Returns
+        -------
+        Series
+            Probability by charging capacity.
+        """
         if self.power_by_usecase:
             if use_case == "hpc":
                 if distance > self.distance_threshold_extra_urban:
@@ -708,21 +1492,13 @@ class SimBEV:
                     use_case = "urban_fast"
                 probability = self.charging_probabilities["use_case"]
                 probability = probability.loc[use_case, :]
-                probability = probability.squeeze()
-                return float(
-                    helpers.get_column_by_random_number(probability, self.rng.random())
-                )
+                return probability.squeeze()
             if use_case:
                 # todo check if use-case exitis in probability
                 probability = self.charging_probabilities["use_case"]
                 try:
                     probability = probability.loc[use_case, :]
-                    probability = probability.squeeze()
-                    return float(
-                        helpers.get_column_by_random_number(
-                            probability, self.rng.random()
-                        )
-                    )
+                    return probability.squeeze()
                 except KeyError:
                     if not self.charging_probability_warning_flag:
                         self.charging_probability_warning_flag = True
@@ -742,22 +1518,16 @@ class SimBEV:
             probability = probability.loc[
                 [d for d in probability.index if location == d]
             ]
-            probability = probability.squeeze()
-            return float(
-                helpers.get_column_by_random_number(probability, self.rng.random())
-            )
+            return probability.squeeze()
 
         if location:
             probability = self.charging_probabilities["slow"]
             probability = probability.loc[
                 [d for d in probability.index if location in d]
             ]
-            probability = probability.squeeze()
-            return float(
-                helpers.get_column_by_random_number(probability, self.rng.random())
-            )
+            return probability.squeeze()
 
-        raise ValueError("Missing arguments in get_charging_capacity.")
+        raise ValueError("Missing arguments in get_charging_probability.")
 
     def hours_to_time_steps(self, t):
         """Converts time in hours to timesteps.
@@ -809,69 +1579,35 @@ class SimBEV:
                         previous_trip = trip
 
     def set_user_group(self, work_parking, home_parking, work_capacity, home_capacity):
-        """Decides on a user group based on private charging infrastructure available."""
-        if home_capacity and home_parking:
-            if work_capacity and work_parking:
-                user_group = 0  # private LIS at home and at work
-            else:
-                user_group = 1  # private LIS at home but not at work
-        else:
-            if work_capacity and work_parking:
-                user_group = 2  # private LIS not at home but at work
-            else:
-                user_group = 3  # private LIS not at home and not at work
-        return user_group
+        """Decides on a user group based on private charging infrastructure available (see fleet.get_user_groups)."""
+        return int(
+            get_user_groups(work_parking, home_parking, work_capacity, home_capacity)
+        )
 
     def _log_grid_data(self, result):
-        """Appends grid-timeseries of current region to a list.
+        """Adds grid-timeseries and analysis summary of current region to the totals of all regions.
 
         Parameters
         ----------
-        result : DataFrame
-            Grid-timeseries of current region.
+        result : tuple
+            Grid-timeseries of current region and its analysis summary.
         """
         result_grid = result[0]
         result_analysis = result[1]
-        self.grid_data_list.append(result_grid)
-
-        columns = [
-            "car_type",
-            "drive_count",
-            "drive_max_length",
-            "drive_min_length",
-            "drive_mean_length",
-            "drive_max_consumption",
-            "drive_min_consumption",
-            "drive_mean_consumption",
-            "average_driving_time",
-            "average_distance",
-            "distance_home",
-            "distance_work",
-            "distance_business",
-            "distance_school",
-            "distance_shopping",
-            "distance_private",
-            "distance_leisure",
-            "distance_hpc",
-            "distance_cumulated",
-            "charge_count",
-            "hpc_count",
-            "charge_max_length",
-            "charge_min_length",
-            "charge_mean_length",
-            "charge_max_energy",
-            "charge_min_energy",
-            "charge_mean_energy",
-            "hpc_mean_energy",
-            "home_mean_energy",
-            "work_mean_energy",
-            "public_mean_energy",
-            "public_count",
-            "private_count",
-        ]
-        df_result_analysis = pd.DataFrame(result_analysis, columns=[columns])
+        if result_grid is not None:
+            values = result_grid.drop(columns="timestamp")
+            if self.grid_time_series_total is None:
+                self.grid_time_series_total = values.to_numpy(dtype=np.float64)
+                self.grid_time_series_template = result_grid.iloc[:0]
+                self.grid_timestamps = result_grid["timestamp"].to_numpy()
+            else:
+                self.grid_time_series_total += values.to_numpy(dtype=np.float64)
 
-        self.analysis_data_list.append(df_result_analysis)
+        if result_analysis is not None:
+            if self.analysis_summary is None:
+                self.analysis_summary = result_analysis
+            else:
+                self.analysis_summary = self.analysis_summary.merge(result_analysis)
 
     def export_grid_timeseries_all_regions(self):
         """Export of grid-timeseries of all regions.
@@ -882,104 +1618,42 @@ class SimBEV:
             Returns grid-timeseries for all regions.
         """
 
-        start_date = self.start_date
-        number_of_days = self.end_date - start_date
-        number_of_days = number_of_days.days - 6  # deduction of 7 day cutoff
-        if self.output_options["analyze"]:
-            analysis_collection = None
-            for data in self.analysis_data_list:
-                if analysis_collection is None:
-                    analysis_collection = data.copy()
-                else:
-                    analysis_collection = pd.concat([analysis_collection, data])
-            analysis_collection = analysis_collection.round(4)
-            analysis_collection = analysis_collection.reset_index(drop=True)
-            analysis_collection.to_csv(
+        if self.output_options["analyze"] and self.analysis_summary is not None:
+            helpers.export_analysis_all_regions(
+                [
+                    pathlib.Path(self.save_directory, str(region.id), "analysis.csv")
+                    for region in self.regions
+                ],
+                self.analysis_summary,
                 pathlib.Path(self.save_directory, self.file_name_analysis_all),
-                index=False,
+                pathlib.Path(self.save_directory, self.file_name_analysis_all_json),
+                self.start_date_input,
+                self.end_date,
             )
 
-            # get share of private and public charging events and save in .json.
-
-            array_to_numeric = [
-                "public_count",
-                "private_count",
-                "distance_cumulated",
-                "drive_count",
-            ]
-            for item in array_to_numeric:
-                analysis_collection[item] = pd.to_numeric(
-                    analysis_collection[[item]].squeeze()
-                )
-
-            share_dict = {
-                "share_private": round(
-                    analysis_collection[["private_count"]].sum().iloc[0]
-                    / (
-                        analysis_collection[["private_count"]].sum().iloc[0]
-                        + analysis_collection[["public_count"]].sum().iloc[0]
-                    ),
-                    4,
-                ),
-                "share_public": round(
-                    analysis_collection[["public_count"]].sum().iloc[0]
-                    / (
-                        analysis_collection[["private_count"]].sum().iloc[0]
-                        + analysis_collection[["public_count"]].sum().iloc[0]
-                    ),
-                    4,
-                ),
-                "trips_a_day": analysis_collection[["drive_count"]].sum().iloc[0]
-                / len(analysis_collection)
-                / number_of_days,
-                "average_distance_per_trip:": round(
-                    analysis_collection[["distance_cumulated"]].sum().iloc[0]
-                    / analysis_collection[["drive_count"]].sum().iloc[0],
-                    4,
-                ),
-                "average_distance_per_day": round(
-                    analysis_collection[["distance_cumulated"]].sum().iloc[0]
-                    / len(analysis_collection)
-                    / number_of_days,
-                    4,
-                ),
-            }
-
-            with open(
-                pathlib.Path(self.save_directory, self.file_name_analysis_all_json), "w"
-            ) as outfile:
-                json.dump(share_dict, outfile, indent=4, sort_keys=False)
-
-        if self.output_options["grid"]:
-            grid_ts_collection = None
-            for data in self.grid_data_list:
-                if grid_ts_collection is None:
-                    grid_ts_collection = data.copy()
-                else:
-                    grid_ts_collection.loc[
-                        :, grid_ts_collection.columns != "timestamp"
-                    ] += data.loc[:, data.columns != "timestamp"]
-            grid_ts_collection = grid_ts_collection.round(4)
-            grid_ts_collection.to_csv(
-                pathlib.Path(self.save_directory, self.file_name_all), index=False
+        if self.output_options["grid"] and self.grid_time_series_total is not None:
+            return helpers.export_grid_timeseries_all_regions(
+                self.grid_time_series_total,
+                self.grid_time_series_template,
+                self.grid_timestamps,
+                pathlib.Path(self.save_directory, self.file_name_all),
             )
-            return grid_ts_collection
 
-    @classmethod
-    def from_config(cls, config_path):
-        """Creates a SimBEV object from a config path string.
+    @staticmethod
+    def read_config(config_path):
+        """Reads a config file.
 
         Parameters
         ----------
-        config_path : str
-            Path string pointing to the config file.
+        config_path : pathlib.Path
+            Path pointing to the config file.
 
         Returns
         -------
-        SimBEV
-            SimBEV object, that contains all Parameters needed for simulation.
         cfg
             ConfigParser Object for reading config files.
+        scenario_path : pathlib.Path
+            Directory of the scenario.
         """
         scenario_path = config_path.parent.parent
         if not scenario_path.is_dir():
@@ -999,6 +1673,57 @@ class SimBEV:
                 f"Cannot read config file {cfg_file} - malformed?"
             ) from exc
 
+        return cfg, scenario_path
+
+    @staticmethod
+    def get_scenario_files(cfg, scenario_path):
+        """Returns the input files of the scenario directory that are set in the config.
+
+        Parameters
+        ----------
+        cfg
+            ConfigParser Object for reading config files.
+        scenario_path : pathlib.Path
+            Directory of the scenario.
+
+        Returns
+        -------
+        list
+        """
+        file_keys = [
+            ("rampup_ev", "rampup"),
+            ("charging_probabilities", "slow"),
+            ("charging_probabilities", "fast"),
+            ("charging_probabilities", "use_case"),
+            ("charging_probabilities", "home_work_private"),
+            ("charging_probabilities", "energy_min"),
+            ("tech_data", "tech_data"),
+            ("tech_data", "hpc_data"),
+            ("tech_data", "charging_curve"),
+            ("user_data", "user_groups"),
+        ]
+        return [
+            pathlib.Path(scenario_path, cfg[section][key])
+            for section, key in file_keys
+            if cfg.get(section, key, fallback=None) is not None
+        ]
+
+    @staticmethod
+    def read_input_data(cfg, scenario_path):
+        """Reads the input files of the scenario directory.
+
+        Parameters
+        ----------
+        cfg
+            ConfigParser Object for reading config files.
+        scenario_path : pathlib.Path
+            Directory of the scenario.
+
+        Returns
+        -------
+        dict
+            Input tables of the scenario.
+        """
         region_df = pd.read_csv(
             pathlib.Path(scenario_path, cfg["rampup_ev"]["rampup"]),
             sep=",",
@@ -1051,6 +1776,122 @@ class SimBEV:
         )
         energy_min = energy_min.set_index("uc")
 
+        data_dict = {
+            "charging_probabilities": charging_probabilities,
+            "regions": region_df,
+            "tech_data": tech_df,
+            "private_probabilities": home_work_private,
+            "energy_min": energy_min,
+            "hpc_data": hpc_data,
+            "charging_curve_points": charging_curve_points,
+            "user_groups_attractivity": user_groups_attractivity,
+        }
+
+        return data_dict
+
+    @classmethod
+    def compile_bundle(cls, config_path, bundle_path=None):
+        """Reads the input data of a scenario and writes it to a bundle.
+
+        Parameters
+        ----------
+        config_path : pathlib.Path
+            Path pointing to the config file.
+        bundle_path : pathlib.Path
+            Directory of the bundle, by default the one that runs of the config use.
+
+        Returns
+        -------
+        pathlib.Path
+            Directory of the bundle.
+        """
+        cfg, scenario_path = cls.read_config(config_path)
+        if bundle_path is None:
+            bundle_path = cls.get_bundle_path(cfg, scenario_path, config_path)
+        data_dict = cls.read_input_data(cfg, scenario_path)
+
+        region_types = {}
+        input_directory = pathlib.Path(
+            cfg.get("basic", "input_directory", fallback="data/probability")
+        )
+        if cfg.get("basic", "input_type", fallback="probability") == "probability":
+            for rs7_type in sorted(set(data_dict["regions"].iloc[:, 0]), key=str):
+                region_type = RegionType(rs7_type, False, None, None)
+                region_type.get_probabilities(input_directory)
+                week_data = {}
+                for season in timeseries_cache.SEASONS:
+                    if pathlib.Path(input_directory, rs7_type, season + ".csv").is_file():
+                        week_data[season] = read_week_data(
+                            rs7_type, season, input_directory
+                        )
+                region_types[rs7_type] = {
+                    "probabilities": region_type.probabilities,
+                    "week_data": week_data,
+                }
+
+        input_files = get_input_files(
+            cls.get_scenario_files(cfg, scenario_path), input_directory, region_types
+        )
+        write_bundle(
+            bundle_path, data_dict, region_types, get_source_files(input_files)
+        )
+        return bundle_path
+
+    @staticmethod
+    def get_bundle_path(cfg, scenario_path, config_path):
+        """Returns the directory of the bundle of a config.
+
+        Parameters
+        ----------
+        cfg
+            ConfigParser Object for reading config files.
+        scenario_path : pathlib.Path
+            Directory of the scenario.
+        config_path : pathlib.Path
+            Path pointing to the config file.
+
+        Returns
+        -------
+        pathlib.Path
+            Value of bundle in [basic], relative to the scenario, by default
+            bundles/<config name>.
+        """
+        return pathlib.Path(
+            scenario_path,
+            cfg.get("basic", "bundle", fallback=f"bundles/{config_path.stem}"),
+        )
+
+    @classmethod
+    def from_config(cls, config_path):
+        """Creates a SimBEV object from a config path string.
+
+        Parameters
+        ----------
+        config_path : str
+            Path string pointing to the config file.
+
+        Returns
+        -------
+        SimBEV
+            SimBEV object, that contains all Parameters needed for simulation.
+        cfg
+            ConfigParser Object for reading config files.
+        """
+        cfg, scenario_path = cls.read_config(config_path)
+        input_directory = cfg.get(
+            "basic", "input_directory", fallback="data/probability"
+        )
+        # compiled input data is used if it is up to date
+        bundle = Bundle.open(
+            cls.get_bundle_path(cfg, scenario_path, config_path),
+            cls.get_scenario_files(cfg, scenario_path),
+            input_directory,
+        )
+        if bundle is not None:
+            data_dict = bundle.get_data_dict()
+        else:
+            data_dict = cls.read_input_data(cfg, scenario_path)
+
         start_date = cfg.get("basic", "start_date")
         start_date = helpers.date_string_to_datetime(start_date)
         end_date = cfg.get("basic", "end_date")
@@ -1076,6 +1917,21 @@ class SimBEV:
             "analyze": analyze,
         }
 
+        cache_directory = None
+        if cfg.getboolean("sim_params", "cache", fallback=True):
+            cache_directory = pathlib.Path(
+                cfg.get(
+                    "sim_params",
+                    "cache_directory",
+                    fallback=timeseries_cache.get_default_cache_directory(),
+                )
+            )
+
+        fleet_directory = cfg.get("sim_params", "fleet_directory", fallback=None)
+        if fleet_directory is not None:
+            # relative to the scenario directory like the result directory
+            fleet_directory = pathlib.Path(scenario_path, fleet_directory)
+
         cfg_dict = {
             "step_size": cfg.getint("basic", "stepsize", fallback=15),
             "soc_min": cfg.getfloat("basic", "soc_min", fallback=0.2),
@@ -1103,7 +1959,16 @@ class SimBEV:
             "input_directory": cfg.get(
                 "basic", "input_directory", fallback="data/probability"
             ),
+            "cache_directory": cache_directory,
+            "bundle": bundle,
+            "fleet_directory": fleet_directory,
             "num_threads": cfg.getint("sim_params", "num_threads", fallback=1),
+            "chunk_size": cfg.getint("sim_params", "chunk_size", fallback=0),
+            "executor": cfg.get("sim_params", "executor", fallback="process"),
+            "max_retries": cfg.getint("sim_params", "max_retries", fallback=1),
+            "retry_serial": cfg.getboolean(
+                "sim_params", "retry_serial", fallback=False
+            ),
             "output_options": output_options,
             "private_only_run": cfg.getboolean(
                 "sim_params", "private_only_run", fallback=False
@@ -1135,15 +2000,4 @@ class SimBEV:
                 "basic", "night_departure_time", fallback=9.0
             ),
         }
-        data_dict = {
-            "charging_probabilities": charging_probabilities,
-            "regions": region_df,
-            "tech_data": tech_df,
-            "private_probabilities": home_work_private,
-            "energy_min": energy_min,
-            "hpc_data": hpc_data,
-            "charging_curve_points": charging_curve_points,
-            "user_groups_attractivity": user_groups_attractivity,
-        }
-
         return SimBEV(data_dict, cfg_dict, config_path.stem), cfg
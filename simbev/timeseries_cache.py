@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import pathlib
+import warnings
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from simbev.helpers import helpers
+
+# increase if the stored arrays or the way they are computed change
+CACHE_VERSION = 2
+SEASONS = ("spring", "summer", "fall", "winter")
+
+
+def get_default_cache_directory():
+    """Returns the default cache directory, ~/.cache/simbev or below XDG_CACHE_HOME.
+
+    Returns
+    -------
+    pathlib.Path
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(cache_home, "simbev")
+
+
+def get_cache_key(rs7_type, start_date, end_date, step_size, data_directory):
+    """Returns the key of the time series of a region type.
+
+    The key depends on all parameters of the time series and on size and modification time of the
+    seasonal input files, so changed input files are not read from the cache.
+
+    Parameters
+    ----------
+    rs7_type : str
+        Type of the region defined by RegioStaR7.
+    start_date : date
+        Start of the simulation, including the first week.
+    end_date : date
+        End of the simulation.
+    step_size : int
+        Step size of the simulation in minutes.
+    data_directory : pathlib.Path
+        Path to probability data directory.
+
+    Returns
+    -------
+    str
+    """
+    input_files = []
+    for season in SEASONS:
+        file_path = pathlib.Path(data_directory, rs7_type, season + ".csv").resolve()
+        if file_path.is_file():
+            stat = file_path.stat()
+            input_files.append([str(file_path), stat.st_size, stat.st_mtime_ns])
+    description = json.dumps(
+        [
+            CACHE_VERSION,
+            str(rs7_type),
+            str(start_date),
+            str(end_date),
+            step_size,
+            input_files,
+        ]
+    )
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def _get_cache_path(cache_directory, rs7_type, key):
+    return pathlib.Path(cache_directory, "timeseries", f"{rs7_type}_{key}.npz")
+
+
+def load_timeseries(cache_directory, rs7_type, key):
+    """Loads the time series of a region type from the cache.
+
+    Parameters
+    ----------
+    cache_directory : pathlib.Path
+        Directory of the cache.
+    rs7_type : str
+        Type of the region defined by RegioStaR7.
+    key : str
+        Key from get_cache_key.
+
+    Returns
+    -------
+    tuple
+        Time series (DataFrame) and trip starts (Series), None if they are not in the cache.
+    """
+    cache_path = _get_cache_path(cache_directory, rs7_type, key)
+    if not cache_path.is_file():
+        return None
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            index = pd.DatetimeIndex(data["index"])
+            time_series = pd.DataFrame(
+                data["values"], index=index, columns=data["columns"].tolist()
+            )
+            trip_starts = pd.Series(data["trip_starts"], index=index)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        # incomplete or outdated file, it is replaced with a new one
+        return None
+    return time_series, trip_starts
+
+
+def store_timeseries(cache_directory, rs7_type, key, time_series, trip_starts):
+    """Stores the time series of a region type in the cache.
+
+    The file is written with helpers.write_atomically, so runs that share the cache never read an
+    incomplete file. A cache that can't be written only gives a warning.
+
+    Parameters
+    ----------
+    cache_directory : pathlib.Path
+        Directory of the cache.
+    rs7_type : str
+        Type of the region defined by RegioStaR7.
+    key : str
+        Key from get_cache_key.
+    time_series : DataFrame
+        Time series of the region type.
+    trip_starts : Series
+        Trip start probabilities of the region type.
+    """
+    cache_path = _get_cache_path(cache_directory, rs7_type, key)
+    try:
+        with helpers.write_atomically(cache_path) as f:
+            np.savez(
+                f,
+                index=time_series.index.asi8,
+                values=time_series.to_numpy(),
+                columns=np.array(time_series.columns, dtype=str),
+                trip_starts=trip_starts.to_numpy(),
+            )
+    except OSError as e:
+        warnings.warn(f"Time series could not be cached in {cache_directory}: {e}")
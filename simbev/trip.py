@@ -1,5 +1,8 @@
 import math
 from typing import TYPE_CHECKING
+
+import numpy as np
+
 from simbev.helpers.errors import SoCError
 
 if TYPE_CHECKING:
@@ -64,6 +67,29 @@ class Trip:
         Sets car to execute the created trip.
     """
 
+    __slots__ = (
+        "destination",
+        "distance",
+        "speed",
+        "park_start",
+        "park_time",
+        "real_park_time",
+        "drive_start",
+        "drive_time",
+        "trip_end",
+        "park_timestamp",
+        "drive_timestamp",
+        "drive_found",
+        "extra_urban",
+        "location",
+        "region",
+        "car",
+        "simbev",
+        "rng",
+        "step_size",
+        "charging_use_case",
+    )
+
     def __init__(
         self,
         region: "Region",
@@ -92,7 +118,8 @@ class Trip:
         self.region = region
         self.car = car
         self.simbev = simbev
-        self.rng = simbev.rng
+        # vehicles draw from their own stream, so that no generator is shared between threads
+        self.rng = simbev.rng if car.rng is None else car.rng
         self.step_size = simbev.step_size
         self.charging_use_case = None
 
@@ -115,28 +142,48 @@ class Trip:
         list of Trip
             A list of `Trip` objects representing the trips taken by the `Car` as defined in its driving profile.
         """
-        first_trip = create_trip_from_profile_row(
-            car.driving_profile.iloc[0, :], "home", 0, region, car, simbev
-        )
-        trip_list = [None] * len(car.driving_profile.index)
-        trip_list[0] = first_trip
-
-        previous_trip = first_trip
-        for count, i in enumerate(car.driving_profile.index[1:]):
-            start_step = previous_trip.trip_end
-            if start_step > region.last_time_step:
-                continue
-            trip = create_trip_from_profile_row(
-                car.driving_profile.loc[i, :],
-                previous_trip.destination,
-                start_step,
-                region,
-                car,
-                simbev,
-                car.driving_profile.loc[i - 1, "charging_use_case"],
+        profile = car.driving_profile
+        drive_times = np.ceil(
+            np.maximum(
+                (profile["arrival_time"] - profile["departure_time"])
+                / simbev.step_size,
+                1,
+            )
+        ).astype(np.int64)
+        # a trip departs at its time step or right after the previous trip arrived,
+        # the first trip starts after the parking event at time step 0
+        departures = profile["time_step"].astype(np.int64)
+        departures[0] = max(departures[0], 1)
+        min_steps = np.cumsum(drive_times + 1) - drive_times - 1
+        drive_starts = np.maximum.accumulate(departures - min_steps) + min_steps
+        trip_ends = drive_starts + drive_times
+        park_starts = np.append(0, trip_ends[:-1])
+        # trips are created until one starts parking after the simulation end
+        trip_count = np.searchsorted(park_starts, region.last_time_step, side="right")
+
+        locations = profile["location"]
+        charging_use_cases = profile["charging_use_case"]
+        distances = profile["distance"]
+        trip_list = []
+        for i, (drive_start, drive_time, park_start) in enumerate(
+            zip(
+                drive_starts[:trip_count].tolist(),
+                drive_times[:trip_count].tolist(),
+                park_starts[:trip_count].tolist(),
             )
-            previous_trip = trip
-            trip_list[count + 1] = trip
+        ):
+            trip = Trip(region, car, park_start, simbev, locations[i], distances[i])
+            trip.location = locations[i - 1] if i else "home"
+            trip.park_time = drive_start - park_start
+            trip.drive_start = drive_start
+            trip.drive_time = drive_time
+            trip.drive_found = True
+            trip.trip_end = drive_start + drive_time
+            trip.charging_use_case = charging_use_cases[i - 1] if i else None
+            trip.fit_trip_to_timerange()
+            trip._set_timestamps()
+            trip_list.append(trip)
+        previous_trip = trip_list[-1]
 
         last_trip_end = previous_trip.trip_end
         if last_trip_end <= region.last_time_step:
@@ -345,7 +392,10 @@ class Trip:
             ):
                 # get parameters for charging at hpc station
                 charging_capacity = self.simbev.get_charging_capacity(
-                    location="hpc", use_case="hpc", distance=self.distance
+                    location="hpc",
+                    use_case="hpc",
+                    distance=self.distance,
+                    rng=self.rng,
                 )
                 self.car.charge(
                     self,
@@ -362,7 +412,7 @@ class Trip:
                     and self.park_time > self.simbev.maximum_park_time
                 ):
                     station_capacity = self.simbev.get_charging_capacity(
-                        self.location, "retail", self.distance
+                        self.location, "retail", self.distance, self.rng
                     )
                     # todo exponentialfunktion
                     max_parking_time = self.get_max_parking_time("retail")
@@ -378,7 +428,7 @@ class Trip:
                 > self.simbev.maximum_park_time
             ):
                 station_capacity = self.simbev.get_charging_capacity(
-                    self.location, "street", self.distance
+                    self.location, "street", self.distance, self.rng
                 )
                 max_parking_time = self.get_max_parking_time("street")
                 self.car.charge_public(
@@ -476,7 +526,10 @@ class Trip:
 
             # get parameters for charging at hpc station
             charging_capacity = self.simbev.get_charging_capacity(
-                location=self.car.status, use_case="hpc", distance=self.distance
+                location=self.car.status,
+                use_case="hpc",
+                distance=self.distance,
+                rng=self.rng,
             )
             self.park_start = self.drive_start + hpc_drive_time
             self.park_timestamp = self.region.region_type.time_series.index[
@@ -543,20 +596,20 @@ class Trip:
                 self.region.last_time_step + 1
             ) % self.simbev.hours_to_time_steps(24 * 7)
             if self.simbev.input_type == "probability":
-                for index, timestep in enumerate(self.car.output["event_start"]):
-                    if (
-                        timestep > replacement_day_timestep
-                        and not self.car.output["location"][index] == "driving"
-                    ):
-                        next_drive_timesteps = timestep
-                        break
+                event_log = self.car.output
+                event_starts = event_log["event_start"]
+                next_drive_timesteps = event_starts[
+                    (event_starts > replacement_day_timestep)
+                    & (event_log["location"] != event_log.code("driving"))
+                ][0]
                 self.real_park_time = (
                     self.park_time + next_drive_timesteps - replacement_day_timestep
                 )
             elif self.simbev.input_type == "profile":
-                next_drive_timesteps = self.car.driving_profile.loc[
-                    self.car.driving_profile["time_step"] > replacement_day_timestep
-                ]["time_step"].iat[0]
+                profile_time_steps = self.car.driving_profile["time_step"]
+                next_drive_timesteps = profile_time_steps[
+                    profile_time_steps > replacement_day_timestep
+                ][0]
                 self.real_park_time = (
                     self.park_time + next_drive_timesteps - replacement_day_timestep
                 )
@@ -608,73 +661,3 @@ class Trip:
         )
 
         return max(steps_until_threshold_time, 0)
-
-
-def create_trip_from_profile_row(
-    row,
-    current_location,
-    last_time_step,
-    region,
-    car,
-    simbev,
-    charging_use_case=None,
-):
-    """
-    Create a Trip object based on information from a driving profile row.
-
-    This function takes various input parameters from a driving profile row and other context data
-    to create a Trip object representing a driving trip. It calculates drive start time,
-    drive time, destination, distance, parking time, and other attributes of the trip.
-
-    Parameters:
-    -----------
-    row : pd.Series
-        A row of data from the profile containing information about the trip.
-    current_location : str
-        The current location of the vehicle.
-    last_time_step : int
-        The time step of the last action taken by the vehicle.
-    region : str
-        The region in which the trip is taking place.
-    car : Car
-        The car involved in the trip.
-    simbev : SimBEV
-        An object representing the simulation environment.
-    charging_use_case : str, optional
-        A string indicating the charging use case for the trip, if applicable.
-
-    Returns:
-    --------
-    Trip
-        A Trip object representing the created trip.
-
-    Notes:
-    ------
-    - The function calculates various attributes of the trip, such as drive start time,
-      drive time, destination, distance, parking time, and more.
-    - The `fit_trip_to_timerange()` method adjusts the trip to fit within the simulation
-      time range.
-    - The `_set_timestamps()` method sets the timestamps for the trip.
-
-    """
-    drive_start = int(row.time_step)
-    drive_time = max((row.arrival_time - row.departure_time) / simbev.step_size, 1)
-    drive_time = math.ceil(drive_time)
-    destination = row.location
-    distance = row.distance
-    location = current_location
-    park_start = last_time_step
-    if drive_start <= park_start:
-        drive_start = park_start + 1
-    park_time = drive_start - park_start
-    trip = Trip(region, car, park_start, simbev, destination, distance)
-    trip.location = location
-    trip.park_time = park_time
-    trip.drive_start = drive_start
-    trip.drive_time = drive_time
-    trip.drive_found = True
-    trip.trip_end = trip.drive_start + trip.drive_time
-    trip.charging_use_case = charging_use_case
-    trip.fit_trip_to_timerange()
-    trip._set_timestamps()
-    return trip
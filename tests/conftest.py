@@ -0,0 +1,113 @@
+import configparser
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simbev.simbev_class import SimBEV
+
+DEFAULT_SCENARIO = pathlib.Path(__file__).parent.parent / "scenarios" / "default"
+PURPOSES = ["work", "business", "school", "shopping", "private", "leisure", "home"]
+REGIONS = pd.DataFrame(
+    {
+        "RegioStaR7": ["SR_Metro", "LR_Klein", "SR_Metro"],
+        "bev_mini": [2, 1, 0],
+        "bev_medium": [1, 1, 0],
+        "bev_luxury": [0, 1, 0],
+        "phev_mini": [1, 0, 0],
+        "phev_medium": [1, 1, 0],
+        "phev_luxury": [0, 1, 0],
+    },
+    index=pd.Index(["metro_1", "klein_1", "metro_empty"], name="region_id"),
+)
+
+
+def write_probability_data(data_directory, rs7_types):
+    """Writes random MiD-data for the region types, the repository doesn't contain the real data."""
+    rng = np.random.default_rng(0)
+    hours = (np.arange(7 * 24 * 60) % (24 * 60)) / 60
+    base = np.exp(-((hours - 8) ** 2) / 4) + np.exp(-((hours - 17) ** 2) / 6) + 0.05
+    for rs7_type in rs7_types:
+        directory = pathlib.Path(data_directory, rs7_type)
+        directory.mkdir(parents=True)
+        for season in ("spring", "summer", "fall", "winter"):
+            week = pd.DataFrame(
+                {
+                    purpose: np.round(base * rng.uniform(0.5, 1.5, len(base)), 4)
+                    for purpose in PURPOSES
+                }
+            )
+            week.insert(0, "min", np.arange(len(base)))
+            week.to_csv(
+                directory / f"{season}.csv", sep=";", decimal=",", index=False
+            )
+        for purpose in PURPOSES:
+            file_purpose = "ridesharing" if purpose == "private" else purpose
+            for key, values in (
+                ("distance", np.linspace(1, 120, 20)),
+                ("speed", np.linspace(10, 100, 10)),
+                ("stand", np.linspace(0.25, 14, 15)),
+            ):
+                pd.DataFrame(
+                    {"distribution": rng.uniform(0.1, 1, len(values)), key: values}
+                ).to_csv(directory / f"{key}_{file_purpose}.csv", index=False)
+
+
+@pytest.fixture(scope="session")
+def scenario_path(tmp_path_factory):
+    """Directory of a small scenario with the input files of the default scenario."""
+    scenario_path = tmp_path_factory.mktemp("scenario")
+    for file_path in DEFAULT_SCENARIO.glob("*.csv"):
+        shutil.copy(file_path, scenario_path)
+    REGIONS.to_csv(scenario_path / "regions.csv")
+    write_probability_data(
+        scenario_path / "data" / "probability", sorted(set(REGIONS["RegioStaR7"]))
+    )
+    (scenario_path / "configs").mkdir()
+    return scenario_path
+
+
+@pytest.fixture
+def create_simbev(scenario_path):
+    """Returns a function that creates the scenario with a new config and runs setup.
+
+    Keyword arguments are written to [sim_params], configs need different names so that their
+    results are saved in different directories.
+    """
+
+    def create_simbev(name, setup=True, **sim_params):
+        cfg = configparser.ConfigParser()
+        cfg.read(DEFAULT_SCENARIO / "configs" / "default.cfg")
+        cfg["basic"]["input_directory"] = str(scenario_path / "data" / "probability")
+        cfg["basic"]["start_date"] = "2021-09-17"
+        cfg["basic"]["end_date"] = "2021-09-19"
+        cfg["output"]["analyze"] = "true"
+        cfg["sim_params"].update(
+            {"num_threads": "1", "cache": "false", "max_retries": "1"}
+        )
+        cfg["sim_params"].update({key: str(value) for key, value in sim_params.items()})
+        config_path = scenario_path / "configs" / f"{name}.cfg"
+        with open(config_path, "w") as config_file:
+            cfg.write(config_file)
+        simbev, _ = SimBEV.from_config(config_path)
+        if setup:
+            simbev.setup()
+        return simbev
+
+    return create_simbev
+
+
+@pytest.fixture
+def read_results():
+    """Returns a function that reads all result files of a run by their path in the result directory."""
+
+    def read_results(save_directory):
+        save_directory = pathlib.Path(save_directory)
+        return {
+            file_path.relative_to(save_directory).as_posix(): file_path.read_bytes()
+            for file_path in sorted(save_directory.rglob("*.csv"))
+        }
+
+    return read_results
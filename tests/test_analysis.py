@@ -0,0 +1,79 @@
+import datetime
+import json
+import math
+import warnings
+
+import numpy as np
+
+from simbev.analysis import ANALYSIS_DTYPE, AnalysisSummary, VehicleStatistics
+from simbev.helpers import helpers
+
+
+def test_vehicle_statistics():
+    # 15 minute steps, first week has 672 steps
+    statistics = VehicleStatistics(50, 15, soc=0.8)
+    statistics.add(0, 600, "home", 0.8)
+    # driving event of the first week is left out
+    statistics.add(600, 4, "", 0.7, distance=20, destination="work")
+    # charging event across the end of the first week is cut to 32 steps
+    statistics.add(604, 100, "work", 0.9, average_charging_power=0.4)
+    statistics.add(704, 4, "", 0.8, distance=30, destination="home")
+    statistics.add(708, 8, "public", 0.9, average_charging_power=11)
+
+    record = np.zeros(1, dtype=ANALYSIS_DTYPE)
+    record[0] = statistics.record("bev_mini")
+    record = record[0]
+    assert record["car_type"] == "bev_mini"
+    assert record["drive_count"] == 1
+    assert record["distance_home"] == 30
+    assert math.isnan(record["distance_work"])
+    assert record["charge_count"] == 2
+    assert record["private_count"] == 1 and record["public_count"] == 1
+    # 10 kWh charged at 0.4 kW, 68 steps of it in the first week
+    assert math.isnan(record["home_mean_energy"])
+    assert np.isclose(record["work_mean_energy"], 10 - 0.4 * 68 / 4)
+    assert record["charge_min_length"] == 8 and record["charge_max_length"] == 32
+
+
+def test_analysis_summary_merge():
+    records = np.zeros(3, dtype=ANALYSIS_DTYPE)
+    records["car_type"] = ["bev_mini", "phev_mini", "bev_mini"]
+    records["drive_count"] = [10, 20, 30]
+    records["distance_work"] = [5, np.nan, 7]
+    first = AnalysisSummary.from_records(records[:2])
+    second = AnalysisSummary.from_records(records[2:])
+    merged = second.merge(first)
+    assert merged.vehicle_count == 3
+    assert merged.sum("drive_count") == 60
+    assert merged.mean("drive_count", "bev_mini") == 20
+    assert merged.mean("distance_work") == 6
+    assert math.isnan(merged.mean("drive_count", "bev_luxury"))
+
+
+def test_export_analysis_without_charging(tmp_path):
+    records = np.zeros(2, dtype=ANALYSIS_DTYPE)
+    records["car_type"] = "bev_mini"
+    records["drive_count"] = [2, 4]
+    records["distance_cumulated"] = [10, 30]
+    start_date = datetime.datetime(2021, 9, 17)
+    end_date = datetime.date(2021, 9, 18)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        summary = helpers.export_analysis(records, tmp_path, start_date, end_date, "A")
+        helpers.export_analysis_all_regions(
+            [tmp_path / "analysis.csv"],
+            summary,
+            tmp_path / "analysis_all_regions.csv",
+            tmp_path / "analysis_all_regions.json",
+            start_date.date(),
+            end_date,
+        )
+    # shares of regions without charging events are null
+    with open(tmp_path / "analysis_mid_A.json") as f:
+        analysis = json.load(f)
+    assert analysis["charging_event_share_private"] is None
+    assert analysis["charging_event_share_public"] is None
+    with open(tmp_path / "analysis_all_regions.json") as f:
+        analysis = json.load(f)
+    assert analysis["share_private"] is None and analysis["share_public"] is None
+    assert analysis["trips_a_day"] == 1.5
@@ -0,0 +1,72 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from simbev.bundle import Bundle, write_bundle
+
+
+def test_bundle(tmp_path):
+    regions = pd.DataFrame(
+        {"RegioStaR7": ["SR_Metro", "LR_Klein"], "bev_mini": [3, 5]},
+        index=pd.Index(["A", "B"], name="region_id"),
+    )
+    charging_curve = pd.DataFrame(
+        {"key": [0.1, 0.3], "bev_mini": [0.9, np.nan], "label": ["a", np.nan]}
+    )
+    probability = pd.DataFrame(
+        [[0.5, 0.5], [0.2, 0.8]],
+        index=pd.Index(["work", "home"], name="destination"),
+        columns=["0", "3.7"],
+    )
+    data_dict = {
+        "regions": regions,
+        "charging_curve_points": charging_curve,
+        "charging_probabilities": {"slow": probability},
+        "hpc_data": {"soc_end_min": 0.8},
+    }
+    week_data = pd.DataFrame(np.arange(14.0).reshape(7, 2), columns=["work", "home"])
+    region_types = {
+        "SR_Metro": {
+            "probabilities": {"charge": probability, "speed": {"work": probability}},
+            "week_data": {"fall": week_data},
+        }
+    }
+    write_bundle(tmp_path / "bundle", data_dict, region_types, [])
+
+    bundle = Bundle(tmp_path / "bundle")
+    bundle_data = bundle.get_data_dict()
+    pd.testing.assert_frame_equal(bundle_data["regions"], regions)
+    pd.testing.assert_frame_equal(
+        bundle_data["charging_curve_points"], charging_curve, check_index_type=True
+    )
+    pd.testing.assert_frame_equal(
+        bundle_data["charging_probabilities"]["slow"], probability
+    )
+    assert bundle_data["hpc_data"] == {"soc_end_min": 0.8}
+    assert bundle.region_types == ["SR_Metro"]
+    probabilities = bundle.get_probabilities("SR_Metro")
+    pd.testing.assert_frame_equal(probabilities["charge"], probability)
+    pd.testing.assert_frame_equal(probabilities["speed"]["work"], probability)
+    pd.testing.assert_frame_equal(bundle.get_week_data("SR_Metro")["fall"], week_data)
+
+
+def test_bundle_pickle(tmp_path):
+    regions = pd.DataFrame(
+        np.arange(20000.0).reshape(-1, 2), columns=["bev_mini", "bev_medium"]
+    )
+    data_dict = {"regions": regions, "charging_probabilities": {}, "hpc_data": {}}
+    write_bundle(tmp_path / "bundle", data_dict, {}, [])
+    bundle = Bundle(tmp_path / "bundle")
+    data_dict = bundle.get_data_dict()
+    # frames are sent as references, the arrays are mapped again when they are unpickled
+    data = pickle.dumps(data_dict)
+    assert len(data) < 1000
+    unpickled = pickle.loads(data)
+    pd.testing.assert_frame_equal(unpickled["regions"], regions)
+    array = unpickled["regions"].to_numpy()
+    while array.base is not None and not isinstance(array, np.memmap):
+        array = array.base
+    assert isinstance(array, np.memmap)
+    # frames derived from a bundle frame are pickled with their values
+    assert type(data_dict["regions"] * 2) is pd.DataFrame
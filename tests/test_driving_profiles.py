@@ -0,0 +1,63 @@
+import datetime
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from simbev.driving_profiles import (
+    DrivingProfileInput,
+    DrivingProfiles,
+    assemble_profiles,
+    get_profile_weeks,
+)
+
+
+def test_driving_profile_input(tmp_path):
+    data = pd.DataFrame(
+        {
+            "id": [3, 1, 3, 1, 2],
+            "day": [0, 0, 0, 1, 4],
+            "location": ["work", "home", "home", "shopping", "leisure"],
+            "departure_time": [400, 500, 1000, 600, 700],
+            "arrival_time": [430, 520, 1030, 640, 720],
+            "distance": [10.0, 5.0, 10.0, 3.0, 7.5],
+            "charging_use_case": ["", "street", "", "retail", ""],
+            "unused": [0, 0, 0, 0, 0],
+        }
+    )
+    data.to_parquet(tmp_path / "driving_profiles_urban_mini.gzip")
+
+    input_data = DrivingProfileInput(tmp_path)
+    profiles = input_data.get("urban", "mini")
+    assert profiles.ids.tolist() == [1, 2, 3]
+    assert profiles.offsets.tolist() == [0, 2, 3, 5]
+    assert "unused" not in profiles.data.columns
+    assert profiles.data["location"].dtype == "category"
+    # trips of a profile keep their order
+    assert profiles.get_profile(3)["departure_time"].tolist() == [400, 1000]
+    assert profiles.get_profile(1)["location"].tolist() == ["home", "shopping"]
+
+    # read profiles are not sent to other processes
+    assert pickle.loads(pickle.dumps(input_data))._profiles == {}
+
+
+def test_assemble_profiles():
+    profiles = DrivingProfiles(
+        pd.DataFrame(
+            {
+                "id": [1, 1, 2, 2],
+                "day": [0, 5, 2, 6],
+                "departure_time": [60, 120, 30, 90],
+            }
+        )
+    )
+    # Friday to Tuesday: a partial week from Friday and one from Monday
+    weeks = get_profile_weeks(datetime.date(2021, 9, 17), datetime.date(2021, 9, 21))
+    assert weeks.tolist() == [[0, 4, 6], [3, 0, 1]]
+
+    draws = np.array([[0.0, 0.0], [0.9, 0.9]])
+    batch = assemble_profiles(profiles, draws, weeks, 60)
+    assert batch.offsets.tolist() == [0, 2, 3]
+    # profile 1 on Saturday and Monday, profile 2 on Sunday
+    assert batch.get_vehicle_profile(0)["time_step"].tolist() == [26, 73]
+    assert batch.get_vehicle_profile(1)["time_step"].tolist() == [49]
@@ -0,0 +1,22 @@
+import numpy as np
+
+from simbev.event_log import EventLog
+
+
+def test_event_log_grows_and_decodes():
+    log = EventLog(capacity=1)
+    log.append(0, 4, "home", "home", "home_detached", 0.81234, 11, 3.21234)
+    log.append(4, 2, "driving", "", "", 0.6, 0, 0)
+    log.append(6, 3, "work", "public", "custom_use_case", 0.6, 0, 0)
+    assert len(log) == 3
+    assert log["event_start"].dtype == np.int32
+    assert log["soc_end"].dtype == np.float32
+    assert list(log.decode("location")) == ["home", "driving", "work"]
+    assert list(log.decode("charging_use_case")) == [
+        "home_detached",
+        "",
+        "custom_use_case",
+    ]
+    copied = log.copy()
+    copied.append(9, 1, "driving", "", "", 0.5, 0, 0)
+    assert len(log) == 3 and len(copied) == 4
@@ -0,0 +1,113 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from simbev.executor import (
+    TASKS_PER_WORKER,
+    ProcessExecutor,
+    SerialExecutor,
+    ThreadExecutor,
+    get_executor,
+)
+
+_offset = None
+
+
+def _set_offset(offset):
+    global _offset
+    _offset = offset
+
+
+def _add_offset(value):
+    return value + _offset, os.getpid()
+
+
+def test_get_executor():
+    for name, executor_class in (
+        ("serial", SerialExecutor),
+        ("process", ProcessExecutor),
+        ("thread", ThreadExecutor),
+    ):
+        with get_executor(name, 2) as executor:
+            assert isinstance(executor, executor_class)
+    with pytest.raises(ValueError):
+        get_executor("cluster", 2)
+
+
+@pytest.mark.parametrize("name", ["serial", "process", "thread"])
+def test_executor_initializer(name):
+    _set_offset(None)
+    with get_executor(name, 2, _set_offset, (10,)) as executor:
+        # tasks are taken from a generator while results come in
+        results = list(executor.imap_unordered(_add_offset, iter(range(20))))
+    assert sorted(value for value, _ in results) == list(range(10, 30))
+    pids = {pid for _, pid in results}
+    if name == "process":
+        # the initializer runs in every process and not in this one
+        assert os.getpid() not in pids
+        assert _offset is None
+    else:
+        assert pids == {os.getpid()}
+        assert _offset == 10
+
+
+def test_executor_results(create_simbev, read_results):
+    results = []
+    for executor, num_threads in (("serial", 1), ("process", 2), ("thread", 3)):
+        simbev = create_simbev(
+            f"executor_{executor}",
+            executor=executor,
+            num_threads=num_threads,
+            chunk_size=2,
+        )
+        simbev.run_multi()
+        results.append(read_results(simbev.save_directory))
+    assert results[0]
+    assert results[1] == results[0]
+    assert results[2] == results[0]
+
+
+def _exit_on_three(value):
+    if value == 3:
+        # like a process killed by the out-of-memory killer
+        os._exit(1)
+    return value
+
+
+def test_process_executor_lost():
+    with get_executor("process", 2) as executor:
+        results = list(
+            executor.imap_unordered(
+                _exit_on_three, range(10), on_lost=lambda task: ("lost", task)
+            )
+        )
+        # the pool is replaced and still runs tasks
+        assert list(executor.imap_unordered(_exit_on_three, [5])) == [5]
+    # every task is reported once, the tasks of the broken pool as lost
+    tasks = sorted(
+        result[1] if isinstance(result, tuple) else result for result in results
+    )
+    assert tasks == list(range(10))
+    assert ("lost", 3) in results
+
+    with pytest.raises(BrokenProcessPool):
+        with get_executor("process", 2) as executor:
+            list(executor.imap_unordered(_exit_on_three, range(10)))
+
+
+def _touch(path):
+    path.touch()
+    return path
+
+
+@pytest.mark.parametrize("name", ["process", "thread"])
+def test_executor_exit(name, tmp_path):
+    paths = [tmp_path / str(i) for i in range(100)]
+    with pytest.raises(ZeroDivisionError):
+        with get_executor(name, 2) as executor:
+            for _ in executor.imap_unordered(_touch, paths):
+                1 / 0
+    # tasks that were handed to the pool but had not started are cancelled
+    assert executor.pending == {}
+    assert len(list(tmp_path.iterdir())) <= TASKS_PER_WORKER * 2
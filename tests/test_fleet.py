@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simbev.fleet import (
+    FLEET_DTYPE,
+    generate_fleet,
+    get_car_types,
+    get_user_groups,
+    load_fleet,
+    store_fleet,
+)
+from simbev.helpers import helpers
+from simbev.simbev_class import SimBEV
+
+
+def test_get_columns_by_random_numbers():
+    probability = pd.Series([0.2, 0.0, 0.5, 0.3], index=["a", "b", "c", "d"])
+    random_numbers = np.array([0.0, 0.1999, 0.2, 0.5, 0.7, 0.99])
+    columns = helpers.get_columns_by_random_numbers(probability, random_numbers)
+    assert columns.tolist() == [
+        helpers.get_column_by_random_number(probability, r) for r in random_numbers
+    ]
+
+
+def test_store_fleet(tmp_path, monkeypatch):
+    region = SimpleNamespace(id="SR_Metro", car_dict={"bev_mini": 2, "phev_mini": 1})
+    fleet = np.zeros(3, dtype=FLEET_DTYPE)
+    fleet["car_type"] = get_car_types(region)
+    fleet["home_capacity"] = [11.0, np.nan, 3.7]
+    fleet_path = tmp_path / "fleets" / "SR_Metro_3.npy"
+    assert load_fleet(fleet_path, region) is None
+
+    store_fleet(fleet_path, fleet)
+    stored_fleet = load_fleet(fleet_path, region)
+    for field in FLEET_DTYPE.names:
+        np.testing.assert_array_equal(stored_fleet[field], fleet[field])
+
+    # changed vehicle numbers
+    region.car_dict["phev_mini"] = 2
+    with pytest.raises(ValueError):
+        load_fleet(fleet_path, region)
+
+    # a failed write keeps the stored fleet and leaves no temporary file
+    def save(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, "save", save)
+    with pytest.warns(UserWarning):
+        store_fleet(fleet_path, np.zeros(3, dtype=FLEET_DTYPE))
+    assert [path.name for path in fleet_path.parent.iterdir()] == [fleet_path.name]
+    region.car_dict["phev_mini"] = 1
+    np.testing.assert_array_equal(
+        load_fleet(fleet_path, region)["home_capacity"], fleet["home_capacity"]
+    )
+
+
+def test_get_user_groups():
+    user_groups = get_user_groups(
+        np.array([True, False, True, True, False, True]),
+        np.array([True, True, False, True, False, True]),
+        np.array([11.0, 11.0, 22.0, 0.0, np.nan, 11.0]),
+        np.array([11.0, 3.7, np.nan, 11.0, np.nan, 0.0]),
+    )
+    assert user_groups.tolist() == [0, 1, 2, 1, 3, 2]
+    # single vehicles without charging points have capacity None
+    assert get_user_groups(True, True, None, 11.0) == 1
+    assert get_user_groups(True, False, 22.0, None) == 2
+    assert SimBEV.set_user_group(None, True, True, 11.0, 11.0) == 0
+
+
+def test_generate_fleet(create_simbev, scenario_path):
+    simbev = create_simbev("fleet")
+    region = SimpleNamespace(
+        car_dict={"bev_mini": 20000, "phev_mini": 10000},
+        car_amount=30000,
+        region_type=SimpleNamespace(rs7_type="SR_Metro"),
+    )
+    simbev.tech_data = pd.read_csv(
+        scenario_path / "tech_data_by_probability.csv", index_col=0
+    )
+    fleet = generate_fleet(simbev, region, np.random.default_rng(3))
+    assert fleet.dtype == FLEET_DTYPE
+    assert fleet["car_type"].tolist() == [0] * 20000 + [1] * 10000
+
+    # attributes are drawn with their probabilities
+    bev_slow = fleet["charging_capacity_slow"][:20000]
+    for capacity, probability in ((3.7, 0.05), (11.0, 0.8), (22.0, 0.15)):
+        assert np.mean(bev_slow == capacity) == pytest.approx(probability, abs=0.01)
+    assert set(fleet["charging_capacity_fast"][20000:]) == {50.0}
+    assert fleet["work_parking"].mean() == pytest.approx(0.7, abs=0.01)
+    assert fleet["home_parking"].mean() == pytest.approx(0.4, abs=0.01)
+    assert fleet["home_detached"].mean() == pytest.approx(0.3, abs=0.01)
+    for location in ("work", "home"):
+        capacities = fleet[f"{location}_capacity"]
+        assert np.array_equal(np.isnan(capacities), ~fleet[f"{location}_parking"])
+        probability = simbev.get_charging_probability(location, use_case=location)
+        possible = {float(str(column).split("_")[-1]) for column in probability.index}
+        assert set(capacities[~np.isnan(capacities)]) <= possible
+
+    # user groups follow the charging points of each vehicle
+    expected = [
+        simbev.set_user_group(*vehicle)
+        for vehicle in zip(
+            fleet["work_parking"],
+            fleet["home_parking"],
+            np.where(fleet["work_parking"], fleet["work_capacity"], None),
+            np.where(fleet["home_parking"], fleet["home_capacity"], None),
+        )
+    ]
+    assert fleet["user_group"].tolist() == expected
+    assert set(expected) == {0, 1, 2, 3}
+
+    # a part of the fleet equals that part of the whole fleet
+    part = generate_fleet(simbev, region, np.random.default_rng(3), 12345, 23456)
+    for field in FLEET_DTYPE.names:
+        np.testing.assert_array_equal(part[field], fleet[field][12345:23456])
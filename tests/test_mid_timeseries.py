@@ -0,0 +1,30 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from simbev.mid_timeseries import get_timeseries
+
+
+def test_get_timeseries(tmp_path):
+    # every minute holds its weekday and season, so each day can be checked
+    for season_number, season in enumerate(["spring", "summer", "fall", "winter"]):
+        (tmp_path / "SR_Metro").mkdir(exist_ok=True)
+        minutes = np.arange(10080)
+        data = {"min": minutes}
+        for column in range(7):
+            data[column] = minutes // 1440 + 10 * season_number
+        pd.DataFrame(data).to_csv(
+            tmp_path / "SR_Metro" / f"{season}.csv", sep=";", index=False
+        )
+
+    # season boundary after one day, in the middle of a week
+    start = datetime.date(2021, 11, 30)
+    end = datetime.date(2021, 12, 9)
+    time_series = get_timeseries(start, end, "SR_Metro", 60, tmp_path)
+    assert len(time_series.index) == 10 * 24
+    assert time_series.index[0] == pd.Timestamp(start)
+    for day, values in time_series.groupby(time_series.index.date):
+        season_number = 3 if day.month == 12 else 2
+        expected = 60 * (day.weekday() + 10 * season_number)
+        assert (values.to_numpy() == expected).all()
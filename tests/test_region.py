@@ -0,0 +1,57 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from simbev.event_log import ChargingLog
+from simbev.mid_timeseries import get_empty_timeseries
+from simbev.region import Region, RegionType
+
+
+def create_region():
+    charging_probabilities = {
+        "slow": pd.DataFrame([[0.5, 0.5]], columns=["0", "11.0"], index=["home"]),
+        "fast": pd.DataFrame([[1.0]], columns=["150.0"], index=["urban"]),
+    }
+    region_type = RegionType("SR_Metro", True, 15, charging_probabilities)
+    region_type.time_series = get_empty_timeseries(
+        datetime.date(2021, 9, 10), datetime.date(2021, 9, 12), 15
+    )
+    region = Region("test", region_type, 0, {"bev_mini": 2}, {"bev_mini": 1.5})
+    region.create_grid_timeseries()
+    return region
+
+
+def test_grid_timeseries_accumulation():
+    region = create_region()
+    events = [
+        # use_case, chargepower, power, start, end, step, park_ts_end
+        ("home_detached", 11.0, 11.0, 3, 4, 0, 10),
+        ("home_detached", 5.5, 11.0, 4, 5, 1, 10),
+        ("urban_fast", 120.0, 150.0, 280, 281, 0, 300),
+        ("street", 3.0, 22.0, 7, 8, 0, 9),
+    ]
+    expected = np.zeros(
+        (len(region.region_type.time_series.index), len(region.header_grid_ts))
+    )
+    charging_log = ChargingLog()
+    for use_case, chargepower, power, start, end, step, park_ts_end in events:
+        occupancy_column, use_case_column = region.get_grid_columns(use_case, power)
+        charging_log.append(
+            occupancy_column,
+            use_case_column,
+            chargepower,
+            start,
+            end,
+            step,
+            park_ts_end,
+        )
+        code = "cars_{}_{}".format(use_case, power)
+        if step == 0 and code in region.header_grid_ts:
+            expected[start:park_ts_end, region.header_grid_ts.index(code)] += 1.5
+        for code in ("{}_total_power".format(use_case), "total_power"):
+            expected[start:end, region.header_grid_ts.index(code)] += chargepower * 1.5
+    region.update_grid_timeseries(charging_log, "bev_mini")
+
+    region.set_grid_timeseries(region.accumulate_grid_timeseries())
+    assert np.allclose(region.grid_time_series, expected)
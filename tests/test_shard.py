@@ -0,0 +1,100 @@
+import json
+import pathlib
+
+import pytest
+
+from simbev.__main__ import merge
+from simbev.helpers import helpers
+from simbev.shard import (
+    FAILURE_REPORT_FILE,
+    METADATA_FILE,
+    get_shard_region_numbers,
+    merge_shards,
+    parse_shard,
+)
+from simbev.simbev_class import SimBEV
+
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+    with pytest.raises(ValueError):
+        parse_shard("1-4")
+
+
+def test_shard_regions():
+    car_amounts = [10, 50, 20, 20, 5]
+    shards = [get_shard_region_numbers(car_amounts, i, 3) for i in range(3)]
+    # every region belongs to exactly one shard
+    assert sorted(sum(shards, [])) == list(range(len(car_amounts)))
+    assert shards == [[1], [0, 2], [3, 4]]
+    with pytest.raises(ValueError):
+        get_shard_region_numbers(car_amounts, 5, 6)
+
+
+def run_shards(create_simbev, scenario_path, name, count, **sim_params):
+    """Runs all shards of a config like separate runs of the command line and returns their directories."""
+    shard_directories = []
+    for index in range(count):
+        simbev = create_simbev(name, setup=False, **sim_params)
+        simbev.set_shard(index, count)
+        simbev.setup()
+        simbev.run_multi()
+        cfg, _ = SimBEV.read_config(scenario_path / "configs" / f"{name}.cfg")
+        helpers.export_metadata(simbev, cfg)
+        shard_directories.append(simbev.save_directory)
+    return shard_directories
+
+
+def test_merge_failed_shard(create_simbev, scenario_path, monkeypatch, tmp_path):
+    simulate_car = SimBEV.simulate_car
+
+    def fail_always(self, car, region):
+        if region.id == "klein_1":
+            raise ValueError("injected")
+        simulate_car(self, car, region)
+
+    monkeypatch.setattr(SimBEV, "simulate_car", fail_always)
+    shard_directories = run_shards(
+        create_simbev,
+        scenario_path,
+        "shards_failed",
+        2,
+        num_threads=2,
+        executor="thread",
+        chunk_size=2,
+    )
+    # the shard with klein_1 reports it, the other one is complete
+    assert [
+        pathlib.Path(directory, FAILURE_REPORT_FILE).is_file()
+        for directory in shard_directories
+    ] == [False, True]
+
+    save_directory = merge_shards(shard_directories, tmp_path / "merged")
+    with open(save_directory / FAILURE_REPORT_FILE) as f:
+        report = json.load(f)
+    assert report["regions_total"] == 3
+    assert report["regions_failed"] == 1
+    assert report["attempts"] == 2
+    assert [region["region_id"] for region in report["failed_regions"]] == ["klein_1"]
+
+    # the command line exits with an error like an unsharded run with failed regions
+    with pytest.raises(SystemExit, match="1 regions failed"):
+        merge([str(directory) for directory in shard_directories])
+
+
+def test_merge_shards(create_simbev, scenario_path, read_results, tmp_path):
+    simbev = create_simbev("shards_single")
+    simbev.run_multi()
+    shard_directories = run_shards(create_simbev, scenario_path, "shards", 2)
+    save_directory = merge_shards(shard_directories, tmp_path / "merged")
+    # merged shards give the results of a run of all regions
+    assert read_results(save_directory) == read_results(simbev.save_directory)
+    with open(save_directory / METADATA_FILE) as f:
+        metadata = json.load(f)
+    assert "shard" not in metadata
+    assert metadata["shards"] == [str(directory) for directory in shard_directories]
+
+    with pytest.raises(ValueError):
+        merge_shards(shard_directories[:1], tmp_path / "incomplete")
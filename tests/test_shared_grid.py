@@ -0,0 +1,49 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from simbev.executor import get_executor
+from simbev.shared_grid import SharedGridTimeSeries
+
+_grid = None
+
+
+def _set_grid(grid):
+    global _grid
+    _grid = grid
+
+
+def _add_ones(slot):
+    _grid.add(slot, np.ones(_grid.shape[1:]))
+    return slot
+
+
+def test_shared_grid_processes():
+    grid = SharedGridTimeSeries.create((2, 3, 4))
+    try:
+        first = grid.acquire("first")
+        second = grid.acquire("second")
+        with pytest.raises(RuntimeError):
+            grid.acquire("third")
+
+        tasks = [first] * 5 + [second] * 3
+        with get_executor("process", 2, _set_grid, (grid,)) as pool:
+            assert sorted(pool.imap_unordered(_add_ones, tasks)) == sorted(tasks)
+        np.testing.assert_array_equal(grid.release("first"), np.full((3, 4), 5.0))
+
+        # a released slot is empty when it is given to the next region
+        assert grid.acquire("third") == first
+        np.testing.assert_array_equal(grid.release("third"), np.zeros((3, 4)))
+        np.testing.assert_array_equal(grid.release("second"), np.full((3, 4), 3.0))
+    finally:
+        grid.close(unlink=True)
+
+
+def test_shared_grid_unavailable(monkeypatch):
+    def no_shared_memory(*args, **kwargs):
+        raise OSError("no shared memory")
+
+    monkeypatch.setattr(shared_memory, "SharedMemory", no_shared_memory)
+    with pytest.warns(UserWarning):
+        assert SharedGridTimeSeries.create((2, 3, 4)) is None
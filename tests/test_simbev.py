@@ -1,3 +1,12 @@
+import collections
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
 from simbev.simbev_class import SimBEV
 import pathlib
 
@@ -8,3 +17,220 @@ def test_simbev_from_config():
     # simbev_obj, cfg = SimBEV.from_config(scenario_path)
     # assert simbev_obj.name == scenario_path.stem
     assert True
+
+
+def test_get_chunks(create_simbev):
+    simbev = create_simbev("chunks")
+    simbev.num_threads = 2
+    for chunk_size in (0, 1, 2, 100):
+        simbev.chunk_size = chunk_size
+        chunks = simbev.get_chunks()
+        vehicles = collections.defaultdict(list)
+        for region, start, stop in chunks:
+            vehicles[region.number].extend(range(start, stop))
+        # every vehicle of every region is in exactly one chunk
+        assert sorted(vehicles) == [region.number for region in simbev.regions]
+        for region in simbev.regions:
+            assert vehicles[region.number] == list(range(region.car_amount))
+        # regions without vehicles get an empty chunk
+        empty_chunks = [chunk[1:] for chunk in chunks if not chunk[0].car_amount]
+        assert empty_chunks == [(0, 0)]
+
+
+def test_chunk_size_results(create_simbev, read_results, tmp_path):
+    simbev = create_simbev("chunk_results")
+    simbev.num_threads = 2
+    results = []
+    for chunk_size in (1, 2, 100):
+        simbev.chunk_size = chunk_size
+        simbev.save_directory = tmp_path / str(chunk_size)
+        region_chunks = collections.defaultdict(list)
+        for region, start, stop in simbev.get_chunks():
+            region_chunks[region.number].append(simbev.run_chunk(region, start, stop))
+        for region in simbev.regions:
+            simbev.export_region(region, region_chunks[region.number])
+        results.append(read_results(simbev.save_directory))
+    assert results[0]
+    assert results[1] == results[0]
+    assert results[2] == results[0]
+
+
+def test_order_chunks(create_simbev):
+    simbev = create_simbev("order")
+    metro, klein, empty = simbev.regions
+    time_steps = len(metro.region_type.time_series.index)
+    assert simbev.estimate_chunk_cost((metro, 1, 4)) == 3 * time_steps
+    assert simbev.estimate_chunk_cost((empty, 0, 0)) == 0
+
+    chunks = [
+        (0, (metro, 0, 1)),
+        (0, (metro, 1, 3)),
+        (0, (klein, 0, 2)),
+        (0, (klein, 2, 5)),
+        (0, (empty, 0, 0)),
+        (1, (metro, 0, 4)),
+    ]
+    # largest regions first, chunks of a region together and largest first
+    assert simbev.order_chunks(chunks) == [
+        (0, (klein, 2, 5)),
+        (0, (klein, 0, 2)),
+        (1, (metro, 0, 4)),
+        (0, (metro, 1, 3)),
+        (0, (metro, 0, 1)),
+        (0, (empty, 0, 0)),
+    ]
+
+
+def test_create_iteration(create_simbev, read_results):
+    sim_params = {"num_threads": 2, "executor": "thread", "chunk_size": 2}
+    simbev = create_simbev("iterations", seed=3, **sim_params)
+    simbev.fleets[0] = None
+    iterations = [simbev.create_iteration(i) for i in range(2)]
+    for i, iteration in enumerate(iterations):
+        assert iteration.rng_seed == 3 + i
+        assert iteration.save_directory == simbev.save_directory / f"iteration_{i}"
+        assert iteration.fleets == {}
+        # setup is shared
+        assert iteration.regions is simbev.regions
+    simbev.fleets.clear()
+
+    simbev.run_multi(iterations)
+    for region in simbev.regions:
+        assert region.grid_intervals is None
+        assert region.grid_time_series is None
+        assert region.analyze_array is None
+
+    # iterations on one pool give the results of separate runs with their seeds
+    for i, iteration in enumerate(iterations):
+        single = create_simbev(f"iteration_seed_{3 + i}", seed=3 + i, **sim_params)
+        single.run_multi()
+        assert read_results(iteration.save_directory) == read_results(
+            single.save_directory
+        )
+    assert read_results(iterations[0].save_directory) != read_results(
+        iterations[1].save_directory
+    )
+
+
+def test_failed_chunks(create_simbev, read_results, monkeypatch):
+    sim_params = {"num_threads": 2, "executor": "thread", "chunk_size": 2}
+    clean = create_simbev("failures_clean", **sim_params)
+    clean.run_multi()
+    clean_results = read_results(clean.save_directory)
+
+    simulate_car = SimBEV.simulate_car
+    failed_vehicles = []
+
+    def fail_once(self, car, region):
+        if region.id == "klein_1" and not failed_vehicles:
+            failed_vehicles.append(car.number)
+            raise ValueError("injected")
+        simulate_car(self, car, region)
+
+    # the failed chunk is retried and the results are complete
+    monkeypatch.setattr(SimBEV, "simulate_car", fail_once)
+    simbev = create_simbev("failures_once", **sim_params)
+    simbev.run_multi()
+    assert failed_vehicles
+    assert simbev.failures == []
+    assert read_results(simbev.save_directory) == clean_results
+    assert not (simbev.save_directory / simbev.file_name_failure_report).exists()
+
+    def fail_always(self, car, region):
+        if region.id == "klein_1":
+            raise ValueError("injected")
+        simulate_car(self, car, region)
+
+    # other regions are kept, the failed region is reported with all of its chunks
+    monkeypatch.setattr(SimBEV, "simulate_car", fail_always)
+    simbev = create_simbev("failures_always", **sim_params)
+    simbev.run_multi()
+    results = read_results(simbev.save_directory)
+    for region_id in ("metro_1", "metro_empty"):
+        region_results = {
+            path: content
+            for path, content in clean_results.items()
+            if path.startswith(region_id + "/")
+        }
+        assert region_results
+        assert region_results.items() <= results.items()
+    assert not any(path.startswith("klein_1/") and "grid" in path for path in results)
+    report_path = simbev.save_directory / simbev.file_name_failure_report
+    report = json.loads(report_path.read_text())
+    assert report["attempts"] == 2
+    assert report["regions_total"] == 3
+    assert report["regions_failed"] == 1
+    (failed_region,) = report["failed_regions"]
+    assert failed_region["region_id"] == "klein_1"
+    assert [chunk["vehicles"] for chunk in failed_region["failed_chunks"]] == [
+        [0, 2],
+        [2, 4],
+        [4, 5],
+    ]
+    for chunk in failed_region["failed_chunks"]:
+        assert chunk["error"] == "ValueError: injected"
+        assert "injected" in chunk["traceback"]
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="pool processes have to inherit the patched simulate_car",
+)
+def test_lost_process(create_simbev, read_results, monkeypatch, tmp_path):
+    sim_params = {"num_threads": 2, "executor": "process", "chunk_size": 2}
+    clean = create_simbev("lost_clean", **sim_params)
+    clean.run_multi()
+
+    simulate_car = SimBEV.simulate_car
+    marker = tmp_path / "killed"
+
+    def exit_once(self, car, region):
+        if region.id == "klein_1":
+            try:
+                marker.touch(exist_ok=False)
+            except FileExistsError:
+                pass
+            else:
+                # like a process killed by the out-of-memory killer
+                os._exit(1)
+        simulate_car(self, car, region)
+
+    # all regions of the broken pool are simulated again, including their shared grid time series
+    monkeypatch.setattr(SimBEV, "simulate_car", exit_once)
+    simbev = create_simbev("lost_once", **sim_params)
+    simbev.run_multi()
+    assert marker.exists()
+    assert simbev.failures == []
+    assert read_results(simbev.save_directory) == read_results(clean.save_directory)
+
+
+def assert_probabilities_equal(probabilities, expected):
+    assert probabilities.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            assert_probabilities_equal(probabilities[key], value)
+        else:
+            pd.testing.assert_frame_equal(probabilities[key], value)
+
+
+def test_create_region_types(create_simbev):
+    serial = create_simbev("region_types_serial", executor="serial")
+    pool = create_simbev("region_types_process", executor="process", num_threads=2)
+    # region types built in pool processes equal those built in this process
+    assert sorted(pool.created_region_types) == ["LR_Klein", "SR_Metro"]
+    assert pool.created_region_types.keys() == serial.created_region_types.keys()
+    for rs7_type, expected in serial.created_region_types.items():
+        region_type = pool.created_region_types[rs7_type]
+        pd.testing.assert_frame_equal(region_type.time_series, expected.time_series)
+        pd.testing.assert_series_equal(region_type.trip_starts, expected.trip_starts)
+        assert expected.probabilities["distance"]
+        assert_probabilities_equal(region_type.probabilities, expected.probabilities)
+
+
+def test_get_profile_draws(create_simbev):
+    simbev = create_simbev("profile_draws")
+    region = simbev.regions[0]
+    draws = simbev.get_profile_draws(region, 0, region.car_amount, 3)
+    assert draws.shape == (region.car_amount, 3)
+    # a chunk only draws its vehicles and gets their numbers of the whole region
+    np.testing.assert_array_equal(simbev.get_profile_draws(region, 2, 4, 3), draws[2:4])
@@ -0,0 +1,41 @@
+import datetime
+import os
+
+import pandas as pd
+
+from simbev import timeseries_cache
+
+
+def test_timeseries_cache(tmp_path):
+    data_directory = tmp_path / "data"
+    (data_directory / "SR_Metro").mkdir(parents=True)
+    season_file = data_directory / "SR_Metro" / "fall.csv"
+    season_file.write_text("a;b\n1;2\n")
+
+    start = datetime.date(2021, 9, 10)
+    end = datetime.date(2021, 9, 30)
+    key = timeseries_cache.get_cache_key("SR_Metro", start, end, 15, data_directory)
+    cache_directory = tmp_path / "cache"
+    assert timeseries_cache.load_timeseries(cache_directory, "SR_Metro", key) is None
+
+    index = pd.date_range("2021-09-10", periods=4, freq="15min")
+    time_series = pd.DataFrame({"work": [0.0, 1.5, 2, 0], "home": [1.0, 0, 0, 3]}, index)
+    trip_starts = time_series.sum(axis=1) / 3
+    timeseries_cache.store_timeseries(
+        cache_directory, "SR_Metro", key, time_series, trip_starts
+    )
+    cached_series, cached_starts = timeseries_cache.load_timeseries(
+        cache_directory, "SR_Metro", key
+    )
+    pd.testing.assert_frame_equal(cached_series, time_series, check_freq=False)
+    pd.testing.assert_series_equal(cached_starts, trip_starts, check_freq=False)
+
+    # changed input files and parameters give a new key
+    stat = season_file.stat()
+    os.utime(season_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert key != timeseries_cache.get_cache_key(
+        "SR_Metro", start, end, 15, data_directory
+    )
+    assert key != timeseries_cache.get_cache_key(
+        "SR_Metro", start, end, 5, data_directory
+    )